@@ -4,29 +4,38 @@
 測試 Telegram 連接
 """
 
+import os
+import sys
 import requests
 from pathlib import Path
 
+# 添加項目根目錄到路徑
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.utils.env import parsed_env
+
 def load_config():
-    """載入 .env 配置"""
-    config = {}
+    """載入 .env 配置（環境變數優先）"""
     env_file = Path('.env')
     
     if not env_file.exists():
         print("❌ 未找到 .env 文件")
         return None
     
-    with open(env_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                config[key.strip()] = value.strip()
-    
+    config = parsed_env(env_file)
+    for key in ('TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID'):
+        if os.environ.get(key):
+            config[key] = os.environ[key]
     return config
 
 def test_telegram(token, chat_id):
     """測試 Telegram 連接"""
+    # getMe 與 sendMessage 共用同一條 keep-alive 連線（只做一次 TLS 握手）
+    with requests.Session() as session:
+        return _run_checks(session, token, chat_id)
+
+def _run_checks(session, token, chat_id):
+    """以共用連線依序測試 Bot Token 與發送訊息"""
     print("=" * 60)
     print("測試 Telegram 連接")
     print("=" * 60)
@@ -38,7 +47,7 @@ def test_telegram(token, chat_id):
     url = f"https://api.telegram.org/bot{token}/getMe"
     
     try:
-        response = requests.get(url, timeout=10)
+        response = session.get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -77,7 +86,7 @@ def test_telegram(token, chat_id):
     }
     
     try:
-        response = requests.post(url, data=data, timeout=10)
+        response = session.post(url, data=data, timeout=10)
         response.raise_for_status()
         result = response.json()
         
@@ -24,8 +24,7 @@ def load_market_data(symbol: str) -> dict:
     for tf in timeframes:
         filename = f"market_data_{symbol}_{tf}.csv"
         if Path(filename).exists():
-            df = pd.read_csv(filename)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            df = pd.read_csv(filename, parse_dates=['timestamp'])
             data[tf] = df
     
     return data
@@ -19,17 +19,13 @@ def load_market_data():
     
     # 嘗試載入真實數據
     try:
-        data_1h = pd.read_csv('market_data_ETHUSDT_1h.csv')
-        data_1h['timestamp'] = pd.to_datetime(data_1h['timestamp'])
+        data_1h = pd.read_csv('market_data_ETHUSDT_1h.csv', parse_dates=['timestamp'])
         
-        data_4h = pd.read_csv('market_data_ETHUSDT_4h.csv')
-        data_4h['timestamp'] = pd.to_datetime(data_4h['timestamp'])
+        data_4h = pd.read_csv('market_data_ETHUSDT_4h.csv', parse_dates=['timestamp'])
         
-        data_1d = pd.read_csv('market_data_ETHUSDT_1d.csv')
-        data_1d['timestamp'] = pd.to_datetime(data_1d['timestamp'])
+        data_1d = pd.read_csv('market_data_ETHUSDT_1d.csv', parse_dates=['timestamp'])
         
-        data_15m = pd.read_csv('market_data_ETHUSDT_15m.csv')
-        data_15m['timestamp'] = pd.to_datetime(data_15m['timestamp'])
+        data_15m = pd.read_csv('market_data_ETHUSDT_15m.csv', parse_dates=['timestamp'])
         
         market_data = {
             '15m': data_15m,
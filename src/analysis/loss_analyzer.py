@@ -5,7 +5,7 @@
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
 from datetime import datetime
 import pandas as pd
 
@@ -60,6 +60,7 @@ class LossAnalyzer:
         'POOR_RISK_REWARD': '風險回報比不佳',
         'UNKNOWN': '未知原因',
     }
+    LOSS_REASONS_SET: FrozenSet[str] = frozenset(LOSS_REASONS)
     
     def __init__(self, custom_rules: Optional[Dict[str, Any]] = None):
         """初始化虧損分析器
@@ -90,6 +91,46 @@ class LossAnalyzer:
         if trade.is_winning():
             raise ValueError(f"交易 {trade.trade_id} 不是虧損交易")
         
+        analysis = self._build_analysis(trade, market_data)
+        
+        # 記錄到歷史
+        self.loss_history.append(analysis)
+        
+        return analysis
+    
+    def analyze_trades(
+        self,
+        trades: List[Trade],
+        market_data: Optional[pd.DataFrame] = None
+    ) -> List[LossAnalysis]:
+        """批次分析多筆虧損交易
+        
+        結果同逐筆呼叫 analyze_trade，但先檢查全部交易再分析，
+        任一筆不是虧損交易時拋出 ValueError 且不寫入歷史；
+        分析結果一次 extend 進歷史。
+        
+        Args:
+            trades: 交易記錄列表
+            market_data: 市場數據（可選，用於更精確的分析）
+        
+        Returns:
+            List[LossAnalysis]: 與 trades 同順序的虧損分析結果
+        """
+        for trade in trades:
+            if trade.is_winning():
+                raise ValueError(f"交易 {trade.trade_id} 不是虧損交易")
+        
+        analyses = [self._build_analysis(trade, market_data) for trade in trades]
+        self.loss_history.extend(analyses)
+        
+        return analyses
+    
+    def _build_analysis(
+        self,
+        trade: Trade,
+        market_data: Optional[pd.DataFrame]
+    ) -> LossAnalysis:
+        """分類、識別貢獻因素並生成建議（不寫入歷史）"""
         # 分類虧損原因
         loss_reason, confidence = self.classify_loss_reason(trade, market_data)
         
@@ -100,7 +141,7 @@ class LossAnalyzer:
         recommendations = self.generate_recommendations(loss_reason, trade, market_data)
         
         # 創建分析結果
-        analysis = LossAnalysis(
+        return LossAnalysis(
             trade_id=trade.trade_id,
             loss_reason=loss_reason,
             confidence=confidence,
@@ -113,11 +154,6 @@ class LossAnalyzer:
                 'exit_reason': trade.exit_reason,
             }
         )
-        
-        # 記錄到歷史
-        self.loss_history.append(analysis)
-        
-        return analysis
     
     def classify_loss_reason(
         self,
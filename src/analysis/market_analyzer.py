@@ -69,8 +69,7 @@ class MarketAnalyzer:
                 return None
         
         try:
-            df = pd.read_csv(filename)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            df = pd.read_csv(filename, parse_dates=['timestamp'])
             
             # 檢查數據是否需要更新
             if len(df) > 0:
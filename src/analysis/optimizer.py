@@ -9,12 +9,15 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Any, Optional, Callable
+from typing import Dict, Iterator, List, Tuple, Any, Optional, Callable, Union
 from datetime import datetime
 from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
 import logging
 import itertools
+import os
 import random
+from collections import OrderedDict
 from copy import deepcopy
 
 from src.execution.strategy import Strategy
@@ -24,6 +27,26 @@ from src.models.backtest import BacktestResult
 
 logger = logging.getLogger(__name__)
 
+# (訓練評分, 訓練結果, 驗證評分, 驗證結果)
+Evaluation = Tuple[float, BacktestResult, float, BacktestResult]
+
+# 每個優化器最多記住的參數組合評估數（LRU）
+_EVALUATION_CACHE_SIZE = 4096
+
+# 子行程內的優化器（由 _init_worker 設定，每個 worker 只反序列化一次市場數據）
+_worker_optimizer: Optional['Optimizer'] = None
+
+
+def _init_worker(optimizer: 'Optimizer') -> None:
+    """ProcessPoolExecutor 的 initializer：保存本行程使用的優化器"""
+    global _worker_optimizer
+    _worker_optimizer = optimizer
+
+
+def _evaluate_in_worker(params: Dict[str, Any]) -> Evaluation:
+    """在子行程評估一組參數（ProcessPoolExecutor 需要模組層級函數才能 pickle）"""
+    return _worker_optimizer._evaluate_train_validation(params)
+
 
 @dataclass
 class OptimizationResult:
@@ -110,7 +133,8 @@ class Optimizer:
         train_ratio: float = 0.7,
         optimization_metric: str = 'sharpe_ratio',
         slippage: float = 0.0,
-        fill_timing: str = 'next_open'
+        fill_timing: str = 'next_open',
+        n_jobs: Optional[int] = None
     ):
         """初始化優化器
         
@@ -122,6 +146,8 @@ class Optimizer:
             commission: 手續費率
             train_ratio: 訓練集比例（0-1）
             optimization_metric: 優化指標（sharpe_ratio, profit_factor, win_rate等）
+            n_jobs: 網格搜索平行評估的行程數。各參數組合的回測彼此獨立，
+                >1 時以 ProcessPoolExecutor 分散；-1 = 使用全部 CPU；None/1 = 依序執行（預設）。
         """
         self.strategy_class = strategy_class
         self.base_config = base_config
@@ -133,10 +159,15 @@ class Optimizer:
         # 滑點與成交時點：穿進回測引擎，否則優化跑的是「不誠實」回測（無滑點）
         self.slippage = slippage
         self.fill_timing = fill_timing
+        self.n_jobs = n_jobs
 
         # 分割訓練集和驗證集
         self.train_data, self.validation_data = self._split_data()
         
+        # 回測是 (參數, 訓練集, 驗證集) 的確定性函數；訓練/驗證集在此固定，
+        # 同一組參數再次出現（隨機搜索重複抽樣、重複呼叫搜索）時直接沿用結果
+        self._evaluation_cache: 'OrderedDict[tuple, Evaluation]' = OrderedDict()
+        
         logger.info(f"優化器初始化完成，優化指標：{optimization_metric}")
     
     def _split_data(self) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
@@ -345,6 +376,90 @@ class Optimizer:
         
         return score, result
     
+    def __getstate__(self) -> dict:
+        """序列化到子行程時不帶評估快取"""
+        state = self.__dict__.copy()
+        state['_evaluation_cache'] = OrderedDict()
+        return state
+    
+    @staticmethod
+    def _cache_key(params: Dict[str, Any]) -> Optional[tuple]:
+        """參數組合的快取鍵；含不可雜湊的值（如 list）時回傳 None 表示不快取"""
+        key = tuple(sorted(params.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def _cached_evaluation(self, key: Optional[tuple]) -> Optional[Evaluation]:
+        """查詢評估快取，命中時標記為最近使用"""
+        if key is None or key not in self._evaluation_cache:
+            return None
+        self._evaluation_cache.move_to_end(key)
+        return self._evaluation_cache[key]
+    
+    def _store_evaluation(self, key: Optional[tuple], evaluation: Evaluation) -> None:
+        """寫入評估快取，超過上限時淘汰最久未使用的項目"""
+        if key is None:
+            return
+        self._evaluation_cache[key] = evaluation
+        self._evaluation_cache.move_to_end(key)
+        if len(self._evaluation_cache) > _EVALUATION_CACHE_SIZE:
+            self._evaluation_cache.popitem(last=False)
+    
+    def _evaluate_train_validation(self, params: Dict[str, Any]) -> Evaluation:
+        """在訓練集和驗證集上各評估一次參數組合（同一組參數只回測一次）"""
+        key = self._cache_key(params)
+        evaluation = self._cached_evaluation(key)
+        if evaluation is None:
+            train_score, train_result = self._evaluate_params(params, self.train_data)
+            validation_score, validation_result = self._evaluate_params(params, self.validation_data)
+            evaluation = (train_score, train_result, validation_score, validation_result)
+            self._store_evaluation(key, evaluation)
+        return evaluation
+    
+    def _iter_evaluations(
+        self,
+        param_list: List[Dict[str, Any]]
+    ) -> Iterator[Tuple[Dict[str, Any], Union[Evaluation, Exception]]]:
+        """依輸入順序逐一產出 (參數, 評估結果或例外)
+        
+        n_jobs > 1 時各組合在子行程平行評估，仍按提交順序產出，
+        最佳參數的選擇（同分取先出現者）與依序執行相同。
+        """
+        n_workers = (os.cpu_count() or 1) if self.n_jobs == -1 else (self.n_jobs or 1)
+        n_workers = min(n_workers, len(param_list))
+        
+        if n_workers <= 1:
+            for params in param_list:
+                try:
+                    yield params, self._evaluate_train_validation(params)
+                except Exception as e:
+                    yield params, e
+            return
+        
+        keys = [self._cache_key(params) for params in param_list]
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(self,)) as pool:
+            # 已快取的組合不再送進子行程
+            futures = [
+                None if self._cached_evaluation(key) is not None
+                else pool.submit(_evaluate_in_worker, params)
+                for params, key in zip(param_list, keys)
+            ]
+            for params, key, future in zip(param_list, keys, futures):
+                if future is None:
+                    yield params, self._cached_evaluation(key)
+                    continue
+                try:
+                    evaluation = future.result()
+                except Exception as e:
+                    yield params, e
+                    continue
+                self._store_evaluation(key, evaluation)
+                yield params, evaluation
+    
     def _get_score(self, result: BacktestResult) -> float:
         """獲取回測結果的評分
         
@@ -406,40 +521,35 @@ class Optimizer:
         best_train_result = None
         best_validation_result = None
         
-        for i, combination in enumerate(all_combinations):
-            # 構建參數字典
-            params = dict(zip(param_names, combination))
+        # 構建參數字典（訓練集與驗證集的評估可依 n_jobs 平行）
+        param_list = [dict(zip(param_names, combination)) for combination in all_combinations]
+        
+        for i, (params, evaluation) in enumerate(self._iter_evaluations(param_list)):
+            if isinstance(evaluation, Exception):
+                logger.error(f"評估參數組合失敗：{params}，錯誤：{evaluation}")
+                continue
             
-            try:
-                # 在訓練集上評估
-                train_score, train_result = self._evaluate_params(params, self.train_data)
-                
-                # 在驗證集上評估
-                validation_score, validation_result = self._evaluate_params(params, self.validation_data)
-                
-                # 記錄結果
-                result_entry = {
-                    'params': params,
-                    'train_score': train_score,
-                    'validation_score': validation_score,
-                    'train_trades': train_result.total_trades,
-                    'validation_trades': validation_result.total_trades,
-                }
-                all_results.append(result_entry)
-                
-                # 更新最佳結果（基於驗證集）
-                if validation_score > best_score:
-                    best_score = validation_score
-                    best_params = params
-                    best_train_result = train_result
-                    best_validation_result = validation_result
-                
-                if (i + 1) % 10 == 0:
-                    logger.info(f"進度：{i + 1}/{len(all_combinations)}，當前最佳評分：{best_score:.4f}")
+            train_score, train_result, validation_score, validation_result = evaluation
             
-            except Exception as e:
-                logger.error(f"評估參數組合失敗：{params}，錯誤：{e}")
-                continue
+            # 記錄結果
+            result_entry = {
+                'params': params,
+                'train_score': train_score,
+                'validation_score': validation_score,
+                'train_trades': train_result.total_trades,
+                'validation_trades': validation_result.total_trades,
+            }
+            all_results.append(result_entry)
+            
+            # 更新最佳結果（基於驗證集）
+            if validation_score > best_score:
+                best_score = validation_score
+                best_params = params
+                best_train_result = train_result
+                best_validation_result = validation_result
+            
+            if (i + 1) % 10 == 0:
+                logger.info(f"進度：{i + 1}/{len(all_combinations)}，當前最佳評分：{best_score:.4f}")
         
         # 計算參數敏感度
         parameter_sensitivity = self._calculate_sensitivity(all_results, param_names)
@@ -462,16 +572,22 @@ class Optimizer:
     
     def random_search(
         self,
-        param_distributions: Dict[str, Callable[[], Any]],
-        n_iterations: int = 100
+        param_distributions: Dict[str, Union[Tuple[float, float], Callable[[], Any]]],
+        n_iterations: int = 100,
+        patience: Optional[int] = None,
+        tol: float = 1e-9
     ) -> OptimizationResult:
         """隨機搜索
         
-        隨機採樣參數空間。
+        隨機採樣參數空間。(min, max) 邊界於開始前一次均勻抽出全部迭代的值，
+        採樣函數則每次迭代各呼叫一次。
         
         Args:
-            param_distributions: 參數分佈，格式：{'param_name': sampling_function}
+            param_distributions: 參數分佈，格式：{'param_name': (min, max)} 或
+                {'param_name': sampling_function}
             n_iterations: 迭代次數
+            patience: 連續多少次迭代驗證集評分未改善超過 tol 即提前停止（None = 跑完全部迭代）
+            tol: 視為改善的最小評分增量
         
         Returns:
             OptimizationResult: 優化結果
@@ -484,17 +600,26 @@ class Optimizer:
         best_params = None
         best_train_result = None
         best_validation_result = None
+        last_improvement = -1  # 最近一次評分改善超過 tol 的迭代
+        
+        # 邊界參數整批預先採樣，每個參數只呼叫一次 np.random.uniform
+        presampled = {
+            name: np.random.uniform(dist[0], dist[1], size=n_iterations).tolist()
+            for name, dist in param_distributions.items()
+            if not callable(dist)
+        }
         
         for i in range(n_iterations):
             # 隨機採樣參數
-            params = {name: sampler() for name, sampler in param_distributions.items()}
+            params = {
+                name: presampled[name][i] if name in presampled else dist()
+                for name, dist in param_distributions.items()
+            }
             
             try:
-                # 在訓練集上評估
-                train_score, train_result = self._evaluate_params(params, self.train_data)
-                
-                # 在驗證集上評估
-                validation_score, validation_result = self._evaluate_params(params, self.validation_data)
+                # 在訓練集和驗證集上評估
+                train_score, train_result, validation_score, validation_result = \
+                    self._evaluate_train_validation(params)
                 
                 # 記錄結果
                 result_entry = {
@@ -507,6 +632,8 @@ class Optimizer:
                 all_results.append(result_entry)
                 
                 # 更新最佳結果
+                if validation_score > best_score + tol:
+                    last_improvement = i
                 if validation_score > best_score:
                     best_score = validation_score
                     best_params = params
@@ -518,7 +645,10 @@ class Optimizer:
             
             except Exception as e:
                 logger.error(f"評估參數組合失敗：{params}，錯誤：{e}")
-                continue
+            
+            if patience is not None and i - last_improvement >= patience:
+                logger.info(f"連續 {patience} 次迭代未改善，於第 {i + 1}/{n_iterations} 次提前停止")
+                break
         
         # 計算參數敏感度
         param_names = list(param_distributions.keys())
@@ -581,8 +711,8 @@ class Optimizer:
             }
             
             try:
-                train_score, train_result = self._evaluate_params(params, self.train_data)
-                validation_score, validation_result = self._evaluate_params(params, self.validation_data)
+                train_score, train_result, validation_score, validation_result = \
+                    self._evaluate_train_validation(params)
                 
                 result_entry = {
                     'params': params,
@@ -625,8 +755,8 @@ class Optimizer:
                 }
             
             try:
-                train_score, train_result = self._evaluate_params(params, self.train_data)
-                validation_score, validation_result = self._evaluate_params(params, self.validation_data)
+                train_score, train_result, validation_score, validation_result = \
+                    self._evaluate_train_validation(params)
                 
                 result_entry = {
                     'params': params,
@@ -4,7 +4,9 @@
 提供統一的回測接口，支持單策略和多策略回測。
 """
 
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
@@ -13,11 +15,51 @@ from src.execution.strategy import Strategy
 from src.models.trading import Trade, Position, Signal
 from src.models.backtest import BacktestResult
 from src.models.market_data import MarketData, TimeframeData
+from src.utils.jit import njit
 
 
 logger = logging.getLogger(__name__)
 
 
+# 明確簽名讓 numba 在模組載入時即編譯（或載入磁碟快取），首次計算指標不含編譯延遲
+@njit('Tuple((int64, int64, float64, float64, float64))(float64[::1])', cache=True)
+def _pnl_totals_nb(pnl: np.ndarray):
+    """單趟走訪逐筆損益，不建立中間遮罩陣列
+
+    依序累加（同逐筆 sum），不開 fastmath 以免改變加總順序。
+
+    Returns:
+        (獲利筆數, 虧損筆數, 總獲利, 總虧損（正值）, 總損益)
+    """
+    win_count = 0
+    loss_count = 0
+    total_win = 0.0
+    total_loss = 0.0
+    total_pnl = 0.0
+    for i in range(pnl.shape[0]):
+        x = pnl[i]
+        total_pnl += x
+        if x > 0:
+            win_count += 1
+            total_win += x
+        elif x < 0:
+            loss_count += 1
+            total_loss -= x
+    return win_count, loss_count, total_win, total_loss, total_pnl
+
+
+def _run_strategy_backtest(
+    engine_args: tuple,
+    strategy: Strategy,
+    market_data: Dict[str, pd.DataFrame],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+) -> BacktestResult:
+    """在子行程跑單一策略回測（ProcessPoolExecutor 需要模組層級函數才能 pickle）"""
+    engine = BacktestEngine(*engine_args)
+    return engine.run_single_strategy(strategy, market_data, start_date, end_date)
+
+
 class BacktestEngine:
     """回測引擎
     
@@ -193,9 +235,22 @@ class BacktestEngine:
         """
         logger.info(f"開始回測策略：{strategy.get_name()}")
 
-        # 預處理 hook（向量化策略可在此預算整段訊號並快取，避免逐根 O(n²)）
+        # 預處理 hook（向量化策略可在此預算整段訊號並快取，避免逐根 O(n²)）；
+        # 回測結束（含例外）一律清除，同一實例之後實盤或換數據時不會讀到舊的預算
         strategy.prepare(market_data)
-
+        try:
+            return self._run_prepared(strategy, market_data, start_date, end_date)
+        finally:
+            strategy.clear_prepared()
+    
+    def _run_prepared(
+        self,
+        strategy: Strategy,
+        market_data: Dict[str, pd.DataFrame],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> BacktestResult:
+        """run_single_strategy 的遍歷迴圈（策略已 prepare）"""
         # 初始化
         capital = self.initial_capital
         trades: List[Trade] = []
@@ -589,7 +644,8 @@ class BacktestEngine:
         market_data: Dict[str, pd.DataFrame],
         capital_allocation: Dict[str, float],
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        max_workers: Optional[int] = None,
     ) -> Dict[str, BacktestResult]:
         """回測多策略組合
         
@@ -599,33 +655,43 @@ class BacktestEngine:
             capital_allocation: 資金分配（策略 ID -> 比例）
             start_date: 開始日期
             end_date: 結束日期
+            max_workers: 平行回測的行程數。各策略的回測彼此獨立（各自資金、各自引擎），
+                >1 時以 ProcessPoolExecutor 分散到多個行程；None/1 = 依序執行（預設）。
+                平行時策略在子行程內執行，回測過程對策略物件的狀態變更不會帶回。
         
         Returns:
             Dict[str, BacktestResult]: 策略 ID -> 回測結果
         """
         logger.info(f"開始多策略回測：{len(strategies)} 個策略")
         
-        results = {}
-        
+        jobs = []
         for strategy in strategies:
-            strategy_id = strategy.get_id()
-            
             # 獲取該策略的資金分配
-            allocation = capital_allocation.get(strategy_id, 1.0 / len(strategies))
+            allocation = capital_allocation.get(strategy.get_id(), 1.0 / len(strategies))
             strategy_capital = self.initial_capital * allocation
             
-            # 創建獨立的回測引擎（沿用滑點與成交時點設定）
-            engine = BacktestEngine(strategy_capital, self.commission, self.slippage, self.fill_timing)
-            
-            # 回測該策略
-            result = engine.run_single_strategy(
-                strategy,
-                market_data,
-                start_date,
-                end_date
-            )
-            
-            results[strategy_id] = result
+            # 獨立回測引擎的參數（沿用滑點與成交時點設定）
+            engine_args = (strategy_capital, self.commission, self.slippage, self.fill_timing)
+            jobs.append((strategy, engine_args))
+        
+        results = {}
+        
+        if max_workers is not None and max_workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+                futures = {
+                    strategy.get_id(): pool.submit(
+                        _run_strategy_backtest, engine_args, strategy,
+                        market_data, start_date, end_date,
+                    )
+                    for strategy, engine_args in jobs
+                }
+                for strategy_id, future in futures.items():
+                    results[strategy_id] = future.result()
+        else:
+            for strategy, engine_args in jobs:
+                results[strategy.get_id()] = _run_strategy_backtest(
+                    engine_args, strategy, market_data, start_date, end_date
+                )
         
         logger.info(f"多策略回測完成")
         
@@ -640,7 +706,22 @@ class BacktestEngine:
         Returns:
             Dict: 績效指標
         """
-        if not trades:
+        pnl = np.fromiter((t.pnl for t in trades), dtype=np.float64, count=len(trades))
+        return self.calculate_metrics_from_pnl(pnl)
+    
+    def calculate_metrics_from_pnl(self, pnl: np.ndarray) -> Dict:
+        """由連續的逐筆損益陣列計算績效指標（結果同 calculate_metrics）
+        
+        已有 float64 損益陣列時直接呼叫，不必經過 Trade 物件逐一取屬性。
+        
+        Args:
+            pnl: 依平倉順序排列的每筆交易損益
+        
+        Returns:
+            Dict: 績效指標
+        """
+        pnl = np.ascontiguousarray(pnl, dtype=np.float64)
+        if len(pnl) == 0:
             return {
                 'total_trades': 0,
                 'winning_trades': 0,
@@ -652,27 +733,18 @@ class BacktestEngine:
                 'profit_factor': 0.0,
             }
         
-        # 基本統計
-        total_trades = len(trades)
-        winning_trades = [t for t in trades if t.pnl > 0]
-        losing_trades = [t for t in trades if t.pnl < 0]
-        
-        win_count = len(winning_trades)
-        loss_count = len(losing_trades)
+        # 基本統計：單趟編譯核心同時彙總筆數與金額
+        total_trades = len(pnl)
+        win_count, loss_count, total_win, total_loss, total_pnl = _pnl_totals_nb(pnl)
         
         # 勝率
-        win_rate = win_count / total_trades if total_trades > 0 else 0.0
-        
-        # 損益統計
-        total_pnl = sum(t.pnl for t in trades)
-        total_win = sum(t.pnl for t in winning_trades)
-        total_loss = abs(sum(t.pnl for t in losing_trades))
+        win_rate = win_count / total_trades
         
         avg_win = total_win / win_count if win_count > 0 else 0.0
         avg_loss = total_loss / loss_count if loss_count > 0 else 0.0
         
-        # 獲利因子
-        profit_factor = total_win / total_loss if total_loss > 0 else 0.0
+        # 獲利因子（沒有虧損交易時為 0）
+        profit_factor = total_win / total_loss if loss_count > 0 else 0.0
         
         return {
             'total_trades': total_trades,
@@ -165,8 +165,13 @@ class MultiStrategyExecutor:
             market_data: 市場數據
         
         Returns:
-            List[Signal]: 信號列表
+            List[Signal]: 信號列表（全局已暫停交易時為空）
         """
+        # 已暫停交易時 filter_signals 必定丟棄所有信號，直接跳過各策略的信號計算
+        if self.risk_manager.global_state.trading_halted:
+            logger.debug(f"全局交易已暫停（{self.risk_manager.global_state.halt_reason}），跳過信號生成")
+            return []
+        
         signals = []
         
         for strategy_id, strategy in self.strategies.items():
@@ -495,6 +500,13 @@ class MultiStrategyExecutor:
         
         return all_trades
     
+    def reset_trade_history(self) -> None:
+        """清空所有策略的交易歷史（保留各策略的歷史列表）"""
+        for trades in self.trade_history.values():
+            trades.clear()
+        
+        logger.info("清空交易歷史")
+    
     def reset_daily_stats(self) -> None:
         """重置所有策略的每日統計"""
         for state in self.strategy_states.values():
@@ -42,6 +42,14 @@ class Strategy(ABC):
         """
         pass
 
+    def clear_prepared(self) -> None:
+        """清除 prepare() 快取的 hook（預設 no-op）
+
+        引擎在回測結束後（含例外）呼叫。覆寫 prepare 的策略應在此清空預算，
+        同一實例之後實盤或在另一份數據上執行時才不會沿用舊結果。
+        """
+        pass
+
     @abstractmethod
     def generate_signal(self, market_data: MarketData) -> Signal:
         """生成交易信號
@@ -4,6 +4,10 @@
 提供統一的數據接口，支持多數據源、緩存、容錯和驗證。
 """
 
+import heapq
+import random
+import sys
+import time
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Callable
 from datetime import datetime, timedelta
@@ -13,9 +17,27 @@ import json
 
 from src.models.market_data import MarketData, TimeframeData
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:  # 可選依賴：未安裝時 save_data/load_data 退回 CSV
+    PYARROW_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+_PANDAS_MAJOR = int(pd.__version__.split('.')[0])
+
+# 緩存到期用的單調時鐘；測試替換這個鉤子即可，不必改動全域的 time.monotonic
+_now = time.monotonic
+
+
+def _copy_on_write_enabled() -> bool:
+    """pandas 是否啟用 Copy-on-Write（3.0 起恆開；2.x 由 mode.copy_on_write 決定）"""
+    if _PANDAS_MAJOR >= 3:
+        return True
+    return pd.options.mode.copy_on_write is True
+
 
 class DataSource:
     """數據源抽象類"""
@@ -55,19 +77,24 @@ class DataSource:
 
 
 class CachedData:
-    """緩存數據"""
+    """緩存數據
+    
+    到期時間以單調時鐘（_now，即 time.monotonic）記為絕對值：有效性檢查只需一次比較，
+    且不受系統時鐘調整影響。
+    """
     
     def __init__(self, data: pd.DataFrame, timestamp: datetime, ttl: int = 300):
         """初始化緩存數據
         
         Args:
             data: 數據
-            timestamp: 緩存時間
+            timestamp: 緩存時間（牆上時間，僅供記錄）
             ttl: 生存時間（秒）
         """
         self.data = data
         self.timestamp = timestamp
         self.ttl = ttl
+        self.expires_at = _now() + ttl
     
     def is_valid(self) -> bool:
         """檢查緩存是否有效
@@ -75,8 +102,7 @@ class CachedData:
         Returns:
             bool: 是否有效
         """
-        age = (datetime.now() - self.timestamp).total_seconds()
-        return age < self.ttl
+        return _now() < self.expires_at
 
 
 class DataManager:
@@ -95,7 +121,8 @@ class DataManager:
         primary_source: Optional[DataSource] = None,
         backup_sources: Optional[List[DataSource]] = None,
         cache_ttl: int = 300,
-        data_dir: str = "data/market_data"
+        data_dir: str = "data/market_data",
+        cache_ttl_jitter: float = 0.15
     ):
         """初始化數據管理器
         
@@ -104,16 +131,27 @@ class DataManager:
             backup_sources: 備用數據源列表
             cache_ttl: 緩存生存時間（秒）
             data_dir: 數據目錄
+            cache_ttl_jitter: 緩存 TTL 隨機抖動比例，每筆 TTL 取 cache_ttl × [1-j, 1+j]，
+                避免同時寫入的緩存同時到期、集中重抓（0 為固定 TTL）
         """
+        if not 0 <= cache_ttl_jitter < 1:
+            raise ValueError(f"cache_ttl_jitter 必須在 [0, 1) 範圍內，當前值：{cache_ttl_jitter}")
+        
         self.primary_source = primary_source
         self.backup_sources = backup_sources or []
         self.cache_ttl = cache_ttl
+        self.cache_ttl_jitter = cache_ttl_jitter
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
         # 緩存：(symbol, timeframe) -> CachedData
         self.cache: Dict[Tuple[str, str], CachedData] = {}
         
+        # 到期堆積 (expires_at, key) 與已知過期的鍵：get_cache_stats 只需彈出新到期的項目，
+        # 不必逐筆檢查整個緩存；被覆寫或清除的條目於彈出時比對 expires_at 略過
+        self._expiry_heap: List[Tuple[float, Tuple[str, str]]] = []
+        self._expired_keys: set = set()
+        
         # 數據獲取歷史
         self.fetch_history: List[Dict] = []
     
@@ -146,13 +184,14 @@ class DataManager:
         """
         cache_key = (symbol, timeframe)
         
-        # 檢查緩存
-        if use_cache and cache_key in self.cache:
-            cached = self.cache[cache_key]
-            if cached.is_valid():
+        # 檢查緩存（停用緩存時連查表都跳過）
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None and cached.is_valid():
                 logger.debug(f"從緩存返回數據：{symbol} {timeframe}")
                 self._record_fetch(symbol, timeframe, "cache", success=True)
-                return cached.data.copy()
+                # Copy-on-Write 下淺複製即可隔離：呼叫端修改時才複製被改的欄位
+                return cached.data.copy(deep=not _copy_on_write_enabled())
         
         # 嘗試從主數據源獲取
         if self.primary_source:
@@ -164,7 +203,7 @@ class DataManager:
                 # 驗證數據
                 if self._validate_data(data):
                     # 更新緩存
-                    self.cache[cache_key] = CachedData(data, datetime.now(), self.cache_ttl)
+                    self._store_cache(symbol, timeframe, data)
                     self._record_fetch(symbol, timeframe, self.primary_source.name, success=True)
                     logger.info(f"從主數據源獲取數據：{symbol} {timeframe}，{len(data)} 條")
                     return data
@@ -184,7 +223,7 @@ class DataManager:
                 # 驗證數據
                 if self._validate_data(data):
                     # 更新緩存
-                    self.cache[cache_key] = CachedData(data, datetime.now(), self.cache_ttl)
+                    self._store_cache(symbol, timeframe, data)
                     self._record_fetch(symbol, timeframe, backup.name, success=True)
                     logger.info(f"從備用數據源獲取數據：{backup.name}，{symbol} {timeframe}，{len(data)} 條")
                     return data
@@ -199,6 +238,37 @@ class DataManager:
         logger.error(error_msg)
         raise ValueError(error_msg)
     
+    def _store_cache(self, symbol: str, timeframe: str, data: pd.DataFrame) -> None:
+        """寫入緩存
+        
+        鍵為 (symbol, timeframe) 元組；寫入時 intern 兩個字串，之後以相同字面值查詢時
+        dict 比對物件身分即命中。
+        
+        Args:
+            symbol: 交易對
+            timeframe: 時間週期
+            data: 數據
+        """
+        cache_key = (sys.intern(symbol), sys.intern(timeframe))
+        ttl = self.cache_ttl
+        if self.cache_ttl_jitter:
+            ttl *= random.uniform(1 - self.cache_ttl_jitter, 1 + self.cache_ttl_jitter)
+        cached = CachedData(data, datetime.now(), ttl)
+        self.cache[cache_key] = cached
+        self._expired_keys.discard(cache_key)
+        heapq.heappush(self._expiry_heap, (cached.expires_at, cache_key))
+        self._collect_expired()
+    
+    def _collect_expired(self) -> None:
+        """彈出已到期的堆積項目，把仍在緩存中的對應鍵記為過期"""
+        heap = self._expiry_heap
+        now = _now()
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            cached = self.cache.get(key)
+            if cached is not None and cached.expires_at == expires_at:
+                self._expired_keys.add(key)
+    
     def _validate_data(self, data: pd.DataFrame) -> bool:
         """驗證數據完整性和準確性
         
@@ -294,6 +364,8 @@ class DataManager:
             # 清除所有緩存
             count = len(self.cache)
             self.cache.clear()
+            self._expiry_heap.clear()
+            self._expired_keys.clear()
             logger.info(f"清除所有緩存：{count} 條")
             return count
         
@@ -307,13 +379,21 @@ class DataManager:
         
         for key in keys_to_remove:
             del self.cache[key]
+            self._expired_keys.discard(key)
         
         logger.info(f"清除緩存：{len(keys_to_remove)} 條")
         return len(keys_to_remove)
     
+    def _data_path(self, symbol: str, timeframe: str, suffix: str) -> Path:
+        """數據文件路徑"""
+        return self.data_dir / f"{symbol}_{timeframe}{suffix}"
+    
     def save_data(self, symbol: str, timeframe: str, data: pd.DataFrame) -> str:
         """保存數據到文件
         
+        安裝 pyarrow 時存為 Snappy 壓縮的 Parquet（欄式、數值不經字串轉換），
+        否則存為 CSV。
+        
         Args:
             symbol: 交易對
             timeframe: 時間週期
@@ -322,10 +402,13 @@ class DataManager:
         Returns:
             str: 文件路徑
         """
-        filename = f"{symbol}_{timeframe}.csv"
-        filepath = self.data_dir / filename
-        
-        data.to_csv(filepath, index=False)
+        if PYARROW_AVAILABLE:
+            filepath = self._data_path(symbol, timeframe, '.parquet')
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            pq.write_table(table, filepath, compression='snappy')
+        else:
+            filepath = self._data_path(symbol, timeframe, '.csv')
+            data.to_csv(filepath, index=False)
         logger.info(f"保存數據到文件：{filepath}")
         
         return str(filepath)
@@ -333,6 +416,8 @@ class DataManager:
     def load_data(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
         """從文件載入數據
         
+        優先讀取 Parquet（需 pyarrow），不存在時讀取舊的 CSV 文件。
+        
         Args:
             symbol: 交易對
             timeframe: 時間週期
@@ -340,19 +425,23 @@ class DataManager:
         Returns:
             Optional[pd.DataFrame]: 數據，如果文件不存在則返回 None
         """
-        filename = f"{symbol}_{timeframe}.csv"
-        filepath = self.data_dir / filename
+        filepath = self._data_path(symbol, timeframe, '.parquet')
+        if not (PYARROW_AVAILABLE and filepath.exists()):
+            filepath = self._data_path(symbol, timeframe, '.csv')
         
         if not filepath.exists():
             logger.warning(f"數據文件不存在：{filepath}")
             return None
         
         try:
-            data = pd.read_csv(filepath)
-            
-            # 轉換 timestamp 列
-            if 'timestamp' in data.columns:
-                data['timestamp'] = pd.to_datetime(data['timestamp'])
+            if filepath.suffix == '.parquet':
+                data = pq.read_table(filepath).to_pandas()
+            else:
+                data = pd.read_csv(filepath)
+                
+                # 轉換 timestamp 列
+                if 'timestamp' in data.columns:
+                    data['timestamp'] = pd.to_datetime(data['timestamp'])
             
             logger.info(f"從文件載入數據：{filepath}，{len(data)} 條")
             return data
@@ -395,9 +484,10 @@ class DataManager:
         Returns:
             Dict: 緩存統計信息
         """
+        self._collect_expired()
         total = len(self.cache)
-        valid = sum(1 for cached in self.cache.values() if cached.is_valid())
-        expired = total - valid
+        expired = len(self._expired_keys)
+        valid = total - expired
         
         return {
             'total': total,
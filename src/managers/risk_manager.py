@@ -2,9 +2,13 @@
 風險管理器
 """
 
-from typing import Tuple, Dict, Optional
+import sys
+from collections import defaultdict
+from typing import Tuple, Dict, Optional, Sequence
 from datetime import datetime
 
+import numpy as np
+
 from src.models.risk import RiskConfig, GlobalRiskState, RiskEvent
 from src.models.trading import Signal, Trade
 from src.models.state import StrategyState
@@ -50,10 +54,14 @@ class RiskManager:
         Returns:
             Tuple[bool, str]: (是否通過, 原因)
         """
+        state = self.global_state
+        max_drawdown = self.config.global_max_drawdown
+        daily_loss_limit = self.config.daily_loss_limit
+        
         # 檢查全局回撤
-        current_drawdown = self.global_state.get_current_drawdown()
-        if current_drawdown > self.config.global_max_drawdown:
-            reason = f"全局回撤超限：{current_drawdown:.2%} > {self.config.global_max_drawdown:.2%}"
+        current_drawdown = state.get_current_drawdown()
+        if current_drawdown > max_drawdown:
+            reason = f"全局回撤超限：{current_drawdown:.2%} > {max_drawdown:.2%}"
             
             # 記錄風險事件
             event = RiskEvent(
@@ -61,18 +69,18 @@ class RiskManager:
                 event_type='drawdown',
                 strategy_id='',  # 全局事件
                 trigger_value=current_drawdown,
-                limit_value=self.config.global_max_drawdown,
+                limit_value=max_drawdown,
                 action_taken='halt_all_trading',
             )
-            self.global_state.add_risk_event(event)
-            self.global_state.halt_trading(reason)
+            state.add_risk_event(event)
+            state.halt_trading(reason)
             
             return False, reason
         
         # 檢查今日虧損
-        daily_loss_pct = self.global_state.get_daily_loss_pct()
-        if daily_loss_pct > self.config.daily_loss_limit:
-            reason = f"今日虧損超限：{daily_loss_pct:.2%} > {self.config.daily_loss_limit:.2%}"
+        daily_loss_pct = state.get_daily_loss_pct()
+        if daily_loss_pct > daily_loss_limit:
+            reason = f"今日虧損超限：{daily_loss_pct:.2%} > {daily_loss_limit:.2%}"
             
             # 記錄風險事件
             event = RiskEvent(
@@ -80,11 +88,11 @@ class RiskManager:
                 event_type='daily_loss',
                 strategy_id='',  # 全局事件
                 trigger_value=daily_loss_pct,
-                limit_value=self.config.daily_loss_limit,
+                limit_value=daily_loss_limit,
                 action_taken='halt_all_trading',
             )
-            self.global_state.add_risk_event(event)
-            self.global_state.halt_trading(reason)
+            state.add_risk_event(event)
+            state.halt_trading(reason)
             
             return False, reason
         
@@ -190,16 +198,87 @@ class RiskManager:
         # 重新計算總倉位
         self.global_state.total_position_value = sum(self.global_state.strategy_positions.values())
     
+    def update_batch(self, trades: Sequence[Trade]) -> Tuple[bool, str]:
+        """批次更新風險狀態
+        
+        等同對每筆交易依序呼叫 update_risk_state + should_halt_trading，但資金、
+        峰值、回撤與今日虧損以 NumPy 一次算完（cumsum 逐筆累加，數值與逐筆相同）：
+        第一筆觸發全局回撤或今日虧損限制的交易記錄風險事件並暫停交易，
+        之後的交易照常更新資金與倉位。
+        
+        Args:
+            trades: 依平倉順序排列的交易記錄
+        
+        Returns:
+            Tuple[bool, str]: (是否暫停, 原因)，同 should_halt_trading
+        """
+        state = self.global_state
+        if len(trades) == 0:
+            return self.should_halt_trading()
+        
+        # 資金路徑與峰值
+        pnl = np.fromiter((t.pnl for t in trades), dtype=np.float64, count=len(trades))
+        capital = np.cumsum(np.concatenate(([state.current_capital], pnl)))[1:]
+        peak = np.maximum.accumulate(np.maximum(capital, state.peak_capital))
+        
+        # 每筆交易後的回撤與今日虧損（與 GlobalRiskState 的 getter 同公式）
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.where(peak != 0, np.maximum(0.0, (peak - capital) / peak), 0.0)
+        daily_pnl = capital - state.daily_start_capital
+        if state.daily_start_capital != 0:
+            daily_loss = np.maximum(0.0, -daily_pnl / state.daily_start_capital)
+        else:
+            daily_loss = np.zeros_like(capital)
+        
+        halt_index = None
+        if not state.trading_halted:
+            breached = (drawdown > self.config.global_max_drawdown) | (daily_loss > self.config.daily_loss_limit)
+            if breached.any():
+                halt_index = int(np.argmax(breached))
+        
+        # 倉位：逐筆減少並在 0 截斷，等同一次扣除總量後截斷
+        closed_value: Dict[str, float] = defaultdict(float)
+        for trade in trades:
+            closed_value[trade.strategy_id] += trade.entry_price * trade.size
+        for strategy_id, value in closed_value.items():
+            new_position = max(0.0, state.strategy_positions.get(strategy_id, 0.0) - value)
+            if new_position > 0:
+                state.strategy_positions[strategy_id] = new_position
+            else:
+                state.strategy_positions.pop(strategy_id, None)
+        state.total_position_value = sum(state.strategy_positions.values())
+        
+        if halt_index is not None:
+            # 以觸發當下的資金狀態記錄事件（check_global_risk 先檢查回撤）
+            state.current_capital = float(capital[halt_index])
+            state.peak_capital = float(peak[halt_index])
+            state.daily_pnl = float(daily_pnl[halt_index])
+            self.check_global_risk()
+        
+        state.current_capital = float(capital[-1])
+        state.peak_capital = float(peak[-1])
+        state.daily_pnl = float(daily_pnl[-1])
+        
+        if state.trading_halted:
+            return True, state.halt_reason
+        return False, ""
+    
     def should_halt_trading(self) -> Tuple[bool, str]:
         """判斷是否應該暫停所有交易
         
         Returns:
             Tuple[bool, str]: (是否暫停, 原因)
         """
-        if self.global_state.trading_halted:
-            return True, self.global_state.halt_reason
+        state = self.global_state
+        if state.trading_halted:
+            return True, state.halt_reason
+        
+        # 資金不低於峰值且今日未虧損時，回撤與今日虧損皆為 0，不可能觸發限制：
+        # 只做比較即返回，不計算比例
+        if state.current_capital >= state.peak_capital and state.daily_pnl >= 0:
+            return False, ""
         
-        # 檢查全局風險
+        # 檢查全局風險（依序檢查，第一個觸發的限制即返回）
         passed, reason = self.check_global_risk()
         if not passed:
             return True, reason
@@ -251,6 +330,8 @@ class RiskManager:
             strategy_id: 策略 ID
             position_value: 倉位價值（USDT）
         """
+        # 鍵在此首次寫入 strategy_positions：intern 後，以同一字串物件查詢時 dict 比對身分即命中
+        strategy_id = sys.intern(strategy_id)
         current = self.global_state.strategy_positions.get(strategy_id, 0.0)
         self.global_state.strategy_positions[strategy_id] = current + position_value
         self.global_state.total_position_value += position_value
@@ -291,7 +372,7 @@ class RiskManager:
             list[RiskEvent]: 風險事件列表
         """
         if strategy_id is None:
-            return self.global_state.risk_events
+            return list(self.global_state.risk_events)
         
         return [e for e in self.global_state.risk_events if e.strategy_id == strategy_id]
     
@@ -40,6 +40,7 @@ class StrategyManager:
         self.strategies: Dict[str, Strategy] = {}
         self.strategy_states: Dict[str, StrategyState] = {}
         self.strategy_configs: Dict[str, StrategyConfig] = {}
+        self._config_files: Dict[str, Path] = {}  # 策略 ID -> 來源配置文件
         
         # 確保策略目錄存在
         self.strategies_dir.mkdir(parents=True, exist_ok=True)
@@ -51,6 +52,8 @@ class StrategyManager:
         
         掃描策略目錄中的所有 JSON 文件，嘗試載入每個策略。
         如果某個策略載入失敗，記錄錯誤但繼續載入其他策略。
+        重複呼叫是冪等的：已由同一文件載入的策略直接沿用現有實例與狀態
+        （要套用文件變更請用 reload_strategy）。
         
         Returns:
             List[str]: 成功載入的策略 ID 列表
@@ -77,6 +80,11 @@ class StrategyManager:
                     logger.error(f"配置文件 {config_file.name} 驗證失敗：{error_msg}")
                     continue
                 
+                # 同一文件先前已載入：沿用現有實例
+                if self._config_files.get(config.strategy_id) == config_file:
+                    loaded_ids.append(config.strategy_id)
+                    continue
+                
                 # 檢查 ID 唯一性
                 if config.strategy_id in self.strategies:
                     logger.error(f"策略 ID 重複：{config.strategy_id}（文件：{config_file.name}）")
@@ -88,6 +96,7 @@ class StrategyManager:
                 # 保存策略和配置
                 self.strategies[config.strategy_id] = strategy
                 self.strategy_configs[config.strategy_id] = config
+                self._config_files[config.strategy_id] = config_file
                 
                 # 初始化策略狀態
                 self.strategy_states[config.strategy_id] = StrategyState(
@@ -4,13 +4,67 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 import json
+import math
+import numpy as np
 import pandas as pd
 
 from .trading import Trade
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # 可選依賴：沒有就用標準庫 json
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:  # 可選依賴：只有 .msgpack 格式需要
+    MSGPACK_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:  # 可選依賴：只有 .parquet 格式需要
+    PYARROW_AVAILABLE = False
+
+# .parquet 格式：交易逐欄存成表格，其餘欄位（JSON）放在 schema metadata 的這個鍵
+_PARQUET_HEADER_KEY = b'backtest_result'
+
+# 欄式（to_dict_soa / .parquet）交易的字段順序，同 Trade.to_dict
+TRADE_FIELDS = (
+    'trade_id', 'strategy_id', 'symbol', 'direction', 'entry_time', 'exit_time',
+    'entry_price', 'exit_price', 'size', 'leverage', 'pnl', 'pnl_pct', 'commission',
+    'exit_reason', 'metadata',
+)
+_TRADE_FLOAT_FIELDS = ('entry_price', 'exit_price', 'size', 'pnl', 'pnl_pct', 'commission')
+
+
+def _has_nonfinite(obj: Any) -> bool:
+    """是否含 NaN/±inf（orjson 會寫成 null，載回變 None；標準庫 json 寫成 NaN/Infinity 可原樣載回）"""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_nonfinite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_nonfinite(v) for v in obj)
+    if isinstance(obj, np.ndarray):
+        return obj.dtype.kind == 'f' and not np.isfinite(obj).all()
+    return False
+
+
+def _to_builtin(obj: Any) -> Any:
+    """msgpack / 標準庫 json 無法直接編碼的值轉為內建型別（numpy 純量、時間）"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"無法序列化的型別：{type(obj).__name__}")
+
 
 @dataclass
 class BacktestResult:
@@ -50,44 +104,51 @@ class BacktestResult:
         if not self.trades:
             return
         
+        # 逐筆淨損益（手續費已於平倉時扣除）一次取成陣列，各項統計由同一陣列彙總
+        pnl = np.fromiter((t.pnl for t in self.trades), dtype=np.float64, count=len(self.trades))
+        winning = pnl > 0  # 同 Trade.is_winning
+        winning_pnls = pnl[winning]
+        losing_pnls = pnl[~winning]
+        
         # 基本統計
-        self.total_trades = len(self.trades)
-        self.winning_trades = sum(1 for t in self.trades if t.is_winning())
+        self.total_trades = len(pnl)
+        self.winning_trades = len(winning_pnls)
         self.losing_trades = self.total_trades - self.winning_trades
         self.win_rate = (self.winning_trades / self.total_trades * 100) if self.total_trades > 0 else 0.0
         
         # 損益統計
-        self.total_pnl = sum(t.pnl for t in self.trades)
+        self.total_pnl = float(pnl.sum())
         self.total_pnl_pct = ((self.final_capital / self.initial_capital) - 1) * 100
         
-        winning_pnls = [t.pnl for t in self.trades if t.is_winning()]
-        losing_pnls = [t.pnl for t in self.trades if not t.is_winning()]
+        total_wins = float(winning_pnls.sum())
+        total_losses_signed = float(losing_pnls.sum())
         
-        self.avg_win = sum(winning_pnls) / len(winning_pnls) if winning_pnls else 0.0
-        self.avg_loss = sum(losing_pnls) / len(losing_pnls) if losing_pnls else 0.0
+        self.avg_win = total_wins / len(winning_pnls) if len(winning_pnls) else 0.0
+        self.avg_loss = total_losses_signed / len(losing_pnls) if len(losing_pnls) else 0.0
         
         # 獲利因子
-        total_wins = sum(winning_pnls) if winning_pnls else 0.0
-        total_losses = abs(sum(losing_pnls)) if losing_pnls else 0.0
+        total_losses = abs(total_losses_signed)
         self.profit_factor = (total_wins / total_losses) if total_losses > 0 else 0.0
         
         # 計算資金曲線和回撤
-        self._calculate_equity_curve()
+        self._calculate_equity_curve(pnl)
         self._calculate_drawdown()
         self._calculate_sharpe_ratio()
     
-    def _calculate_equity_curve(self) -> None:
-        """計算資金曲線"""
+    def _calculate_equity_curve(self, pnl: Optional[np.ndarray] = None) -> None:
+        """計算資金曲線
+        
+        Args:
+            pnl: 逐筆損益陣列（calculate_metrics 已取出時傳入，免再走訪交易）
+        """
         if not self.trades:
             self.equity_curve = pd.Series([self.initial_capital])
             return
         
-        equity = [self.initial_capital]
-        current_capital = self.initial_capital
-        
-        for trade in self.trades:
-            current_capital += trade.pnl
-            equity.append(current_capital)
+        if pnl is None:
+            pnl = np.fromiter((t.pnl for t in self.trades), dtype=np.float64, count=len(self.trades))
+        # 初始資金放在首位一起 cumsum：逐筆依序累加，數值與逐筆 += 相同
+        equity = np.cumsum(np.concatenate(([self.initial_capital], pnl)))
         
         # 使用交易時間作為索引
         timestamps = [self.start_date] + [t.exit_time for t in self.trades]
@@ -126,12 +187,8 @@ class BacktestResult:
         # 夏普比率（假設無風險利率為 0）
         self.sharpe_ratio = (mean_return / std_return) if std_return > 0 else 0.0
     
-    def to_dict(self) -> Dict[str, Any]:
-        """轉換為字典
-        
-        Returns:
-            Dict[str, Any]: 回測結果字典
-        """
+    def _summary_dict(self) -> Dict[str, Any]:
+        """交易與資金曲線以外的欄位"""
         return {
             'strategy_id': self.strategy_id,
             'start_date': self.start_date.isoformat(),
@@ -150,38 +207,145 @@ class BacktestResult:
             'max_drawdown': self.max_drawdown,
             'max_drawdown_pct': self.max_drawdown_pct,
             'sharpe_ratio': self.sharpe_ratio,
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為字典
+        
+        Returns:
+            Dict[str, Any]: 回測結果字典
+        """
+        return {
+            **self._summary_dict(),
             'trades': [t.to_dict() for t in self.trades],
             'equity_curve': self.equity_curve.to_dict() if not self.equity_curve.empty else {},
         }
     
+    def _trade_columns(self) -> Dict[str, List[Any]]:
+        """交易逐欄取出（欄名與順序同 TRADE_FIELDS，值同 Trade.to_dict）"""
+        trades = self.trades
+        return {
+            'trade_id': [t.trade_id for t in trades],
+            'strategy_id': [t.strategy_id for t in trades],
+            'symbol': [t.symbol for t in trades],
+            'direction': [t.direction for t in trades],
+            'entry_time': [t.entry_time.isoformat() for t in trades],
+            'exit_time': [t.exit_time.isoformat() for t in trades],
+            'entry_price': [t.entry_price for t in trades],
+            'exit_price': [t.exit_price for t in trades],
+            'size': [t.size for t in trades],
+            'leverage': [t.leverage for t in trades],
+            'pnl': [t.pnl for t in trades],
+            'pnl_pct': [t.pnl_pct for t in trades],
+            'commission': [t.commission for t in trades],
+            'exit_reason': [t.exit_reason for t in trades],
+            'metadata': [t.metadata for t in trades],
+        }
+    
+    def to_dict_soa(self) -> Dict[str, Any]:
+        """轉換為欄式字典（交易每個字段一個列表，不逐筆建字典）
+        
+        交易存於 'trade_cols'（字段 -> 列表，順序見 'trade_fields'），筆數為 'trade_count'；
+        其餘欄位同 to_dict，equity_curve 的時間已轉為 ISO 字串，可直接 JSON 編碼。
+        需要逐筆字典的呼叫端仍用 to_dict()。
+        
+        Returns:
+            Dict[str, Any]: 欄式回測結果字典
+        """
+        return {
+            **self._summary_dict(),
+            'trade_fields': list(TRADE_FIELDS),
+            'trade_count': len(self.trades),
+            'trade_cols': self._trade_columns(),
+            'equity_curve': self._serializable_equity_curve(),
+        }
+    
+    def _serializable_equity_curve(self) -> Dict[str, float]:
+        """資金曲線轉為以 ISO 時間字串為鍵的字典"""
+        if self.equity_curve.empty:
+            return {}
+        return {
+            k.isoformat() if isinstance(k, datetime) else str(k): v
+            for k, v in self.equity_curve.to_dict().items()
+        }
+    
+    def _save_parquet(self, path: Path) -> None:
+        """交易逐欄寫成 Parquet（Snappy），其餘欄位以 JSON 存入 schema metadata
+        
+        時間與其他格式一樣存 ISO 字串（保留時區）；metadata 字典以 JSON 字串存。
+        """
+        columns = self._trade_columns()
+        columns['metadata'] = [json.dumps(m, ensure_ascii=False) for m in columns['metadata']]
+        
+        types = {name: pa.float64() for name in _TRADE_FLOAT_FIELDS}
+        types['leverage'] = pa.int64()
+        table = pa.table({
+            name: pa.array(values, type=types.get(name, pa.string()))
+            for name, values in columns.items()
+        })
+        
+        header = self._summary_dict()
+        header['equity_curve'] = self._serializable_equity_curve()
+        table = table.replace_schema_metadata({
+            _PARQUET_HEADER_KEY: json.dumps(header, ensure_ascii=False).encode('utf-8'),
+        })
+        pq.write_table(table, path, compression='snappy')
+    
+    @staticmethod
+    def _load_parquet(path: Path) -> Dict[str, Any]:
+        """讀回 _save_parquet 的檔案，組成與 to_dict_soa 相同結構的字典"""
+        table = pq.read_table(path)
+        data = json.loads(table.schema.metadata[_PARQUET_HEADER_KEY])
+        columns = table.to_pydict()
+        columns['metadata'] = [json.loads(m) for m in columns['metadata']]
+        data['trade_fields'] = list(columns)
+        data['trade_count'] = table.num_rows
+        data['trade_cols'] = columns
+        return data
+    
     def save(self, filepath: str) -> None:
         """保存結果到文件
         
+        依副檔名選格式：.msgpack 為 MessagePack（需 msgpack，二進位、編解碼最快）；
+        .parquet 為交易逐欄的 Parquet（需 pyarrow，交易多時最小、數值不經字串）；
+        其餘為 JSON：有 orjson 時用 orjson 編碼（非字串鍵與標準庫一樣轉為字串）；
+        數據含 NaN/±inf 時 orjson 只能寫成 null，改用標準庫 json 寫出 NaN/Infinity。
+        
         Args:
-            filepath: 文件路徑（JSON 格式）
+            filepath: 文件路徑（.json、.msgpack 或 .parquet）
         """
         path = Path(filepath)
         path.parent.mkdir(parents=True, exist_ok=True)
         
-        # 轉換為可序列化的格式
-        data = self.to_dict()
+        if path.suffix == '.parquet':
+            if not PYARROW_AVAILABLE:
+                raise ImportError("保存 .parquet 格式需要安裝 pyarrow")
+            self._save_parquet(path)
+            return
         
-        # 轉換 equity_curve 的時間戳
-        if data['equity_curve']:
-            data['equity_curve'] = {
-                k.isoformat() if isinstance(k, datetime) else str(k): v
-                for k, v in data['equity_curve'].items()
-            }
+        # 轉換為可序列化的格式（equity_curve 的時間戳轉為字串）
+        data = self.to_dict()
+        data['equity_curve'] = self._serializable_equity_curve()
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if path.suffix == '.msgpack':
+            if not MSGPACK_AVAILABLE:
+                raise ImportError("保存 .msgpack 格式需要安裝 msgpack")
+            path.write_bytes(msgpack.packb(data, use_bin_type=True, default=_to_builtin))
+        elif ORJSON_AVAILABLE and not _has_nonfinite(data):
+            path.write_bytes(orjson.dumps(
+                data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            ))
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False, default=_to_builtin)
     
     @classmethod
     def load(cls, filepath: str) -> 'BacktestResult':
         """從文件載入結果
         
         Args:
-            filepath: 文件路徑（JSON 格式）
+            filepath: 文件路徑（.json、.msgpack 或 .parquet，格式同 save）
             
         Returns:
             BacktestResult: 回測結果對象
@@ -191,31 +355,51 @@ class BacktestResult:
         if not path.exists():
             raise FileNotFoundError(f"文件不存在：{filepath}")
         
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if path.suffix == '.parquet':
+            if not PYARROW_AVAILABLE:
+                raise ImportError("載入 .parquet 格式需要安裝 pyarrow")
+            return cls.from_dict_soa(cls._load_parquet(path))
+        
+        if path.suffix == '.msgpack':
+            if not MSGPACK_AVAILABLE:
+                raise ImportError("載入 .msgpack 格式需要安裝 msgpack")
+            data = msgpack.unpackb(path.read_bytes(), raw=False)
+        elif ORJSON_AVAILABLE:
+            raw = path.read_bytes()
+            try:
+                data = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                # 含 NaN/Infinity 的檔案由標準庫 json 寫出，orjson 不接受這些字面值
+                data = json.loads(raw)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
         # 重建 Trade 對象
-        trades = []
-        for trade_data in data.get('trades', []):
-            trade = Trade(
-                trade_id=trade_data['trade_id'],
-                strategy_id=trade_data['strategy_id'],
-                symbol=trade_data['symbol'],
-                direction=trade_data['direction'],
-                entry_time=datetime.fromisoformat(trade_data['entry_time']),
-                exit_time=datetime.fromisoformat(trade_data['exit_time']),
-                entry_price=trade_data['entry_price'],
-                exit_price=trade_data['exit_price'],
-                size=trade_data['size'],
-                leverage=trade_data['leverage'],
-                pnl=trade_data['pnl'],
-                pnl_pct=trade_data['pnl_pct'],
-                commission=trade_data['commission'],
-                exit_reason=trade_data['exit_reason'],
-                metadata=trade_data.get('metadata', {}),
-            )
-            trades.append(trade)
+        trades = [Trade.from_dict(trade_data) for trade_data in data.get('trades', [])]
+        return cls._from_summary(data, trades)
+    
+    @classmethod
+    def from_dict_soa(cls, data: Dict[str, Any]) -> 'BacktestResult':
+        """由 to_dict_soa 的欄式字典重建回測結果
+        
+        Args:
+            data: to_dict_soa 的輸出（或其 JSON / msgpack 解碼結果）
         
+        Returns:
+            BacktestResult: 回測結果對象
+        """
+        fields = data['trade_fields']
+        columns = data['trade_cols']
+        trades = [
+            Trade.from_dict(dict(zip(fields, row)))
+            for row in zip(*(columns[name] for name in fields))
+        ]
+        return cls._from_summary(data, trades)
+    
+    @classmethod
+    def _from_summary(cls, data: Dict[str, Any], trades: List[Trade]) -> 'BacktestResult':
+        """由摘要欄位、ISO 字串鍵的資金曲線與已重建的交易組成結果"""
         # 重建 equity_curve
         equity_data = data.get('equity_curve', {})
         if equity_data:
@@ -5,6 +5,7 @@
 from dataclasses import dataclass, field
 from typing import Dict, List, Any, Tuple, Optional
 import json
+import sys
 from pathlib import Path
 
 
@@ -136,7 +137,7 @@ class StrategyConfig:
         )
         
         return cls(
-            strategy_id=data['strategy_id'],
+            strategy_id=sys.intern(data['strategy_id']),  # 各處以此 ID 為 dict 鍵，intern 後共用同一物件
             strategy_name=data['strategy_name'],
             version=data['version'],
             enabled=data.get('enabled', True),
@@ -190,7 +191,7 @@ class StrategyConfig:
         )
         
         return cls(
-            strategy_id=data['strategy_id'],
+            strategy_id=sys.intern(data['strategy_id']),  # 各處以此 ID 為 dict 鍵，intern 後共用同一物件
             strategy_name=data['strategy_name'],
             version=data['version'],
             enabled=data.get('enabled', True),
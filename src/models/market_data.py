@@ -2,9 +2,10 @@
 市場數據模型
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, Any
+import numpy as np
 import pandas as pd
 
 
@@ -14,6 +15,55 @@ class TimeframeData:
     timeframe: str  # 時間週期（如 '1h', '4h', '1d'）
     ohlcv: pd.DataFrame  # OHLCV 數據
     indicators: Dict[str, pd.Series]  # 技術指標
+    # (欄位, dtype) -> 連續陣列（延遲建立）。引擎每根重建 TimeframeData，
+    # 新 K 線自然換新；建立後請勿就地修改 ohlcv 的 OHLCV 欄位
+    _arrays: Dict[tuple, np.ndarray] = field(default_factory=dict, init=False, repr=False, compare=False)
+    
+    def column_array(self, column: str, dtype=np.float64) -> np.ndarray:
+        """取某欄位的連續陣列（同一實例、同一 dtype 只轉換一次）
+        
+        預設 float64：策略指標與逐根/批次結果逐位元比對，且門檻比較（EMA 交叉、
+        RSI 區間）對捨入敏感。只做粗略掃描、不進決策的場合可指定 np.float32
+        減半記憶體頻寬。
+        
+        Args:
+            column: 欄位名稱（如 'close'）
+            dtype: 陣列型別（np.float64 或 np.float32）
+            
+        Returns:
+            np.ndarray: 連續陣列
+        """
+        key = (column, np.dtype(dtype))
+        array = self._arrays.get(key)
+        if array is None:
+            array = np.ascontiguousarray(self.ohlcv[column].to_numpy(dtype=dtype))
+            self._arrays[key] = array
+        return array
+    
+    @property
+    def open_np(self) -> np.ndarray:
+        """開盤價陣列"""
+        return self.column_array('open')
+    
+    @property
+    def high_np(self) -> np.ndarray:
+        """最高價陣列"""
+        return self.column_array('high')
+    
+    @property
+    def low_np(self) -> np.ndarray:
+        """最低價陣列"""
+        return self.column_array('low')
+    
+    @property
+    def close_np(self) -> np.ndarray:
+        """收盤價陣列"""
+        return self.column_array('close')
+    
+    @property
+    def volume_np(self) -> np.ndarray:
+        """成交量陣列"""
+        return self.column_array('volume')
     
     def get_latest(self) -> Dict[str, float]:
         """獲取最新數據點
@@ -2,9 +2,10 @@
 風險管理數據模型
 """
 
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List
+from typing import Deque, Dict
 
 
 @dataclass
@@ -64,9 +65,22 @@ class RiskEvent:
         }
 
 
+# GlobalRiskState.risk_events 保留的最近事件數
+MAX_RISK_EVENTS = 10_000
+
+# 衍生比例（回撤、今日虧損、倉位使用率）所依賴的欄位
+_RISK_STATE_INPUTS = frozenset({
+    'current_capital', 'peak_capital', 'daily_start_capital', 'daily_pnl', 'total_position_value',
+})
+
+
 @dataclass
 class GlobalRiskState:
-    """全局風險狀態"""
+    """全局風險狀態
+    
+    get_current_drawdown / get_daily_loss_pct / get_position_usage 的結果快取到
+    相依欄位下次被賦值為止，逐 tick 反覆查詢不重做除法。
+    """
     initial_capital: float  # 初始資金
     current_capital: float  # 當前資金
     peak_capital: float  # 峰值資金
@@ -79,13 +93,26 @@ class GlobalRiskState:
     total_position_value: float = 0.0  # 總倉位價值（USDT）
     strategy_positions: Dict[str, float] = field(default_factory=dict)  # 策略 ID -> 倉位價值
     
-    # 風險事件記錄
-    risk_events: List[RiskEvent] = field(default_factory=list)
+    # 風險事件記錄（只保留最近 MAX_RISK_EVENTS 筆，長回測記憶體有上限）
+    risk_events: Deque[RiskEvent] = field(default_factory=lambda: deque(maxlen=MAX_RISK_EVENTS))
     
     # 交易暫停狀態
     trading_halted: bool = False
     halt_reason: str = ""
     
+    # 回撤、今日虧損、倉位使用率的快取（None 表示需重算）；
+    # 任一輸入欄位被賦值時由 __setattr__ 清除，非 dataclass 欄位
+    _drawdown = None
+    _daily_loss_pct = None
+    _position_usage = None
+    
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in _RISK_STATE_INPUTS:
+            object.__setattr__(self, '_drawdown', None)
+            object.__setattr__(self, '_daily_loss_pct', None)
+            object.__setattr__(self, '_position_usage', None)
+    
     def __post_init__(self):
         """初始化後處理"""
         if self.peak_capital == 0:
@@ -99,9 +126,14 @@ class GlobalRiskState:
         Returns:
             float: 回撤比例（0-1）
         """
-        if self.peak_capital == 0:
-            return 0.0
-        return max(0.0, (self.peak_capital - self.current_capital) / self.peak_capital)
+        drawdown = self._drawdown
+        if drawdown is None:
+            if self.peak_capital == 0:
+                drawdown = 0.0
+            else:
+                drawdown = max(0.0, (self.peak_capital - self.current_capital) / self.peak_capital)
+            object.__setattr__(self, '_drawdown', drawdown)
+        return drawdown
     
     def get_daily_loss_pct(self) -> float:
         """獲取今日虧損百分比
@@ -109,9 +141,14 @@ class GlobalRiskState:
         Returns:
             float: 虧損比例（0-1）
         """
-        if self.daily_start_capital == 0:
-            return 0.0
-        return max(0.0, -self.daily_pnl / self.daily_start_capital)
+        daily_loss_pct = self._daily_loss_pct
+        if daily_loss_pct is None:
+            if self.daily_start_capital == 0:
+                daily_loss_pct = 0.0
+            else:
+                daily_loss_pct = max(0.0, -self.daily_pnl / self.daily_start_capital)
+            object.__setattr__(self, '_daily_loss_pct', daily_loss_pct)
+        return daily_loss_pct
     
     def get_position_usage(self) -> float:
         """獲取倉位使用率
@@ -119,13 +156,20 @@ class GlobalRiskState:
         Returns:
             float: 倉位使用率（0-1）
         """
-        if self.current_capital == 0:
-            return 0.0
-        return self.total_position_value / self.current_capital
+        position_usage = self._position_usage
+        if position_usage is None:
+            if self.current_capital == 0:
+                position_usage = 0.0
+            else:
+                position_usage = self.total_position_value / self.current_capital
+            object.__setattr__(self, '_position_usage', position_usage)
+        return position_usage
     
     def get_strategy_position_usage(self, strategy_id: str) -> float:
         """獲取策略倉位使用率
         
+        不快取：strategy_positions 是就地修改的 dict，無法在寫入時失效。
+        
         Args:
             strategy_id: 策略 ID
             
@@ -145,12 +189,13 @@ class GlobalRiskState:
         """
         self.current_capital = new_capital
         
-        # 更新峰值資金
-        if new_capital > self.peak_capital:
-            self.peak_capital = new_capital
-        
         # 更新今日損益
         self.daily_pnl = new_capital - self.daily_start_capital
+        
+        # 更新峰值資金：不低於峰值時峰值即當前資金，回撤必為 0，直接寫入快取免除法
+        if new_capital >= self.peak_capital:
+            self.peak_capital = new_capital
+            object.__setattr__(self, '_drawdown', 0.0)
     
     def reset_daily_stats(self) -> None:
         """重置每日統計"""
@@ -158,7 +203,7 @@ class GlobalRiskState:
         self.daily_pnl = 0.0
     
     def add_risk_event(self, event: RiskEvent) -> None:
-        """添加風險事件
+        """添加風險事件（超過 MAX_RISK_EVENTS 筆時捨棄最舊的）
         
         Args:
             event: 風險事件
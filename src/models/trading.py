@@ -268,3 +268,20 @@ class Trade:
             'exit_reason': self.exit_reason,
             'metadata': self.metadata,
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Trade':
+        """從 to_dict 格式的字典（時間為 ISO 字串）重建交易
+        
+        Args:
+            data: 交易字典；缺少的欄位（含時間）使用 Trade 的預設值，
+                不認得的欄位引發 TypeError
+            
+        Returns:
+            Trade: 交易對象
+        """
+        record = dict(data)
+        for key in ('entry_time', 'exit_time'):
+            if key in record:
+                record[key] = datetime.fromisoformat(record[key])
+        return cls(**record)
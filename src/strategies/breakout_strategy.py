@@ -12,6 +12,7 @@ from src.execution.strategy import Strategy
 from src.models.config import StrategyConfig
 from src.models.market_data import MarketData
 from src.models.trading import Signal, Position
+from src.utils.rolling import IncrementalRolling, frame_keys
 
 
 class BreakoutStrategy(Strategy):
@@ -38,6 +39,70 @@ class BreakoutStrategy(Strategy):
         self.atr_threshold = params.get('atr_threshold', 0.02)
         self.stop_loss_atr = params.get('stop_loss_atr', 2.0)
         self.take_profit_atr = params.get('take_profit_atr', 4.0)
+        
+        # 逐根增量維護的滾動指標（相鄰呼叫只多一根時 O(1) 更新）
+        self._high_n = IncrementalRolling(self.lookback_period)
+        self._low_n = IncrementalRolling(self.lookback_period)
+        self._volume_ma = IncrementalRolling(20)
+        
+        # prepare() 預算的整段進場方向（timestamp -> 1/-1/0）；None 表示未預算（實盤）
+        self._batch_actions: Optional[Dict] = None
+    
+    def prepare(self, market_data: dict) -> None:
+        """回測前以 generate_signals_batch 一次算完整段進場方向並依 timestamp 快取"""
+        df = market_data.get('1h')
+        if df is None or len(df) == 0:
+            self._batch_actions = None
+            return
+        actions = self.generate_signals_batch(df)
+        keys = df['timestamp'] if 'timestamp' in df.columns else df.index
+        self._batch_actions = dict(zip(keys, actions.tolist()))
+    
+    def clear_prepared(self) -> None:
+        """回測結束後清除預算的進場方向，之後的 generate_signal 回到逐根判斷"""
+        self._batch_actions = None
+    
+    def generate_signals_batch(self, df: pd.DataFrame) -> np.ndarray:
+        """對整段 OHLCV 向量化計算進場方向
+        
+        與逐根 generate_signal 的進場條件一致（N 根高低點不含當根、ATR 取最近 14 根
+        真實波幅均值、成交量比率對 20 根均量），供回測一次算完，實盤仍走 generate_signal。
+        
+        Args:
+            df: OHLCV 數據框
+        
+        Returns:
+            np.ndarray: int8 陣列，1=做多、-1=做空、0=無信號
+        """
+        close = df['close']
+        high_n = df['high'].shift(1).rolling(window=self.lookback_period).max()
+        low_n = df['low'].shift(1).rolling(window=self.lookback_period).min()
+        
+        prev_close = close.shift(1)
+        tr = pd.concat([
+            df['high'] - df['low'],
+            (df['high'] - prev_close).abs(),
+            (df['low'] - prev_close).abs(),
+        ], axis=1).max(axis=1, skipna=False)
+        atr = tr.rolling(window=14).mean().fillna(0.0)
+        atr_pct = (atr / close).where(close > 0, 0.0)
+        
+        volume_ma = df['volume'].rolling(window=20).mean()
+        volume_ratio = (df['volume'] / volume_ma).where(volume_ma > 0, 0.0)
+        
+        enough_data = np.arange(len(df)) >= self.lookback_period
+        tradable = (
+            enough_data
+            & (atr_pct >= self.atr_threshold).to_numpy()
+            & (volume_ratio >= self.volume_threshold).to_numpy()
+        )
+        long_mask = tradable & (close > high_n).to_numpy()
+        short_mask = tradable & ~long_mask & (close < low_n).to_numpy()
+        
+        actions = np.zeros(len(df), dtype=np.int8)
+        actions[long_mask] = 1
+        actions[short_mask] = -1
+        return actions
     
     def generate_signal(self, market_data: MarketData) -> Signal:
         """
@@ -56,6 +121,10 @@ class BreakoutStrategy(Strategy):
         if len(tf_1h.ohlcv) < self.lookback_period + 1:
             return self._hold_signal(market_data)
         
+        # 回測已預算整段方向：無信號的根直接 HOLD，免逐根計算指標
+        if self._batch_actions is not None and self._batch_actions.get(market_data.timestamp) == 0:
+            return self._hold_signal(market_data)
+        
         # 計算指標
         indicators = self._calculate_indicators(tf_1h)
         
@@ -162,16 +231,23 @@ class BreakoutStrategy(Strategy):
         # 獲取當前價格
         price = df.iloc[-1]['close']
         
-        # 計算 N 日高點和低點
-        high_n = df['high'].rolling(window=self.lookback_period).max().iloc[-2]  # 不包括當前K線
-        low_n = df['low'].rolling(window=self.lookback_period).min().iloc[-2]
+        keys = frame_keys(df)
+        volumes = df['volume'].to_numpy()
+        
+        # 計算 N 日高點和低點（不包括當前K線）
+        # 視窗只需最後一段的極值：以增量視窗維護，新一根進來時 O(1) 滑動
+        self._high_n.update(keys[:-1], df['high'].to_numpy()[:-1])
+        self._low_n.update(keys[:-1], df['low'].to_numpy()[:-1])
+        high_n = self._high_n.max
+        low_n = self._low_n.min
         
         # 計算 ATR
         atr = self._calculate_atr(df, period=14)
         
         # 計算成交量比率
-        volume_ma = df['volume'].rolling(window=20).mean().iloc[-1]
-        current_volume = df.iloc[-1]['volume']
+        self._volume_ma.update(keys, volumes)
+        volume_ma = self._volume_ma.mean
+        current_volume = volumes[-1]
         volume_ratio = current_volume / volume_ma if volume_ma > 0 else 0
         
         # 計算 ATR 百分比（波動性）
@@ -38,6 +38,11 @@ class ConfluenceStrategy(Strategy):
         for c in self._confirmations:
             c.prepare(market_data)
 
+    def clear_prepared(self) -> None:
+        self._primary.clear_prepared()
+        for c in self._confirmations:
+            c.clear_prepared()
+
     def generate_signal(self, market_data: MarketData) -> Signal:
         sig = self._primary.generate_signal(market_data)  # 同時 stash 主來源出場脈絡
         if sig.action not in ('BUY', 'SELL'):
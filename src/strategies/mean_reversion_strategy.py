@@ -36,14 +36,57 @@ from src.execution.strategy import Strategy
 from src.models.config import StrategyConfig
 from src.models.trading import Signal, Position
 from src.models.market_data import MarketData
+from src.utils.jit import njit
+from src.utils.rolling import IncrementalRolling, frame_keys
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# === 最新值核心：generate_signal / should_exit 只讀最後一根的 RSI 與 ATR，
+# 直接對最後 period 根求和，免去每次建立整條 pandas 序列 ===
+
+@njit(cache=True)
+def _rsi_last_nb(close, period):
+    """最後一根的 RSI（同 _calculate_rsi(...).iloc[-1]：漲跌幅取 period 根簡單平均）"""
+    n = close.shape[0]
+    if period <= 0 or n < period:
+        return np.nan
+    gain = 0.0
+    loss = 0.0
+    for i in range(n - period, n):
+        if i == 0:
+            continue  # 第一根無前值，diff 為 NaN，視為 0
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            gain += delta
+        elif delta < 0:
+            loss -= delta
+    gain /= period
+    loss /= period
+    if loss == 0.0:
+        return np.nan if gain == 0.0 else 100.0
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+@njit(cache=True)
+def _atr_last_nb(high, low, close, period):
+    """最後一根的 ATR（同 _calculate_atr(...).iloc[-1]：真實波幅取 period 根簡單平均）"""
+    n = close.shape[0]
+    if period <= 0 or n < period:
+        return np.nan
+    total = 0.0
+    for i in range(n - period, n):
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = max(tr, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        total += tr
+    return total / period
+
+
 class MeanReversionStrategy(Strategy):
     """均值回歸策略
     
@@ -51,6 +94,10 @@ class MeanReversionStrategy(Strategy):
     適合在震盪市場中使用。
     """
     
+    # 批次預篩 RSI 門檻的容差：整段 rolling 與逐根核心的累加順序不同，
+    # 放寬一點確保逐根會觸發的根一定在候選內
+    RSI_BATCH_TOLERANCE = 1e-6
+    
     def __init__(self, config: StrategyConfig):
         """初始化策略
         
@@ -69,10 +116,48 @@ class MeanReversionStrategy(Strategy):
         self.bb_std = config.parameters.get('bb_std', 2.0)
         self.reversion_threshold = config.parameters.get('reversion_threshold', 0.005)
         
+        # 逐根增量維護的滾動均值（相鄰呼叫只多一根時 O(1) 更新）
+        self._sma_1h = IncrementalRolling(self.sma_period)
+        self._volume_ma_15m = IncrementalRolling(20)
+        
+        # prepare() 預算的候選進場根（timestamp -> bool）；None 表示未預算（實盤）
+        self._batch_candidates: Optional[Dict] = None
+        
         logger.info(f"Initialized {self.strategy_id} with parameters: "
                    f"SMA={self.sma_period}, deviation={self.deviation_threshold}, "
                    f"RSI={self.rsi_period}")
     
+    def prepare(self, market_data: dict) -> None:
+        """回測前以 generate_signals_batch 一次算完整段候選進場根並依 timestamp 快取"""
+        df = market_data.get('15m')
+        if df is None or len(df) == 0:
+            self._batch_candidates = None
+            return
+        candidates = self.generate_signals_batch(df)
+        keys = df['timestamp'] if 'timestamp' in df.columns else df.index
+        self._batch_candidates = dict(zip(keys, candidates.tolist()))
+    
+    def clear_prepared(self) -> None:
+        """回測結束後清除預算的候選進場根，之後的 generate_signal 回到逐根判斷"""
+        self._batch_candidates = None
+    
+    def generate_signals_batch(self, df: pd.DataFrame) -> np.ndarray:
+        """對整段 15m OHLCV 向量化標出可能進場的根
+        
+        做多要求 RSI 超賣、做空要求 RSI 超買，兩者都不成立的根不可能進場；
+        回測時這些根直接 HOLD，其餘根仍走逐根 generate_signal 判斷完整條件。
+        
+        Args:
+            df: 15m OHLCV 數據框
+        
+        Returns:
+            np.ndarray: bool 陣列，True=RSI 在超買/超賣區（候選進場根）
+        """
+        rsi = self._calculate_rsi(df['close'], self.rsi_period).to_numpy()
+        tol = self.RSI_BATCH_TOLERANCE
+        with np.errstate(invalid='ignore'):
+            return (rsi < self.rsi_oversold + tol) | (rsi > self.rsi_overbought - tol)
+    
     def generate_signal(self, market_data: MarketData) -> Signal:
         """生成交易信號
         
@@ -83,6 +168,10 @@ class MeanReversionStrategy(Strategy):
             Signal: 交易信號（BUY/SELL/HOLD）
         """
         try:
+            # 回測已預算整段候選根：RSI 不在超買/超賣區的根直接 HOLD，免逐根計算指標
+            if self._batch_candidates is not None and self._batch_candidates.get(market_data.timestamp) is False:
+                return Signal.hold(self.strategy_id, market_data.timestamp, self.config.symbol)
+            
             # 1. 驗證數據完整性
             if not self._validate_data(market_data):
                 logger.debug(f"{self.strategy_id}: Data validation failed")
@@ -157,15 +246,20 @@ class MeanReversionStrategy(Strategy):
         indicators = {}
         
         # === 1 小時指標（趨勢判斷）===
-        # 簡單移動平均線
-        indicators['sma_1h'] = df_1h['close'].rolling(window=self.sma_period).mean()
+        # 簡單移動平均線（只用最新值，增量維護）
+        close_1h = df_1h['close'].to_numpy()
+        self._sma_1h.update(frame_keys(df_1h), close_1h)
+        sma_1h = self._sma_1h.mean
+        indicators['sma_1h_last'] = sma_1h
         
         # 價格偏離度
-        indicators['deviation_1h'] = (df_1h['close'] - indicators['sma_1h']) / indicators['sma_1h']
+        indicators['deviation_1h_last'] = (float(close_1h[-1]) - sma_1h) / sma_1h
         
         # === 15 分鐘指標（進場時機）===
-        # RSI
-        indicators['rsi_15m'] = self._calculate_rsi(df_15m['close'], self.rsi_period)
+        close_15m = data_15m.close_np
+        
+        # RSI（只需最新值）
+        indicators['rsi_15m_last'] = float(_rsi_last_nb(close_15m, self.rsi_period))
         
         # 布林帶
         bb_upper, bb_middle, bb_lower = self._calculate_bollinger_bands(
@@ -175,16 +269,24 @@ class MeanReversionStrategy(Strategy):
         indicators['bb_middle_15m'] = bb_middle
         indicators['bb_lower_15m'] = bb_lower
         
-        # ATR（用於止損和目標）
-        indicators['atr_15m'] = self._calculate_atr(df_15m, 14)
+        # ATR（用於止損和目標，只需最新值）
+        indicators['atr_15m_last'] = float(
+            _atr_last_nb(data_15m.high_np, data_15m.low_np, close_15m, 14)
+        )
         
         # 成交量
-        indicators['volume_15m'] = df_15m['volume']
-        indicators['volume_ma_15m'] = df_15m['volume'].rolling(window=20).mean()
+        volume_15m = df_15m['volume'].to_numpy()
+        self._volume_ma_15m.update(frame_keys(df_15m), volume_15m)
+        indicators['volume_15m_last'] = float(volume_15m[-1])
+        indicators['volume_ma_15m_last'] = self._volume_ma_15m.mean
         
         # 當前價格
         indicators['current_price'] = df_15m['close'].iloc[-1]
         
+        # 最新值一次取出成純量，條件判斷與建立信號直接讀 *_last，免重複 .iloc[-1]
+        indicators['bb_upper_15m_last'] = float(bb_upper.iloc[-1])
+        indicators['bb_lower_15m_last'] = float(bb_lower.iloc[-1])
+        
         return indicators
     
     def _check_buy_conditions(self, indicators: Dict) -> bool:
@@ -200,12 +302,11 @@ class MeanReversionStrategy(Strategy):
         """
         # 獲取最新值
         current_price = indicators['current_price']
-        sma = indicators['sma_1h'].iloc[-1]
-        deviation = indicators['deviation_1h'].iloc[-1]
-        rsi = indicators['rsi_15m'].iloc[-1]
-        bb_lower = indicators['bb_lower_15m'].iloc[-1]
-        volume = indicators['volume_15m'].iloc[-1]
-        volume_ma = indicators['volume_ma_15m'].iloc[-1]
+        deviation = indicators['deviation_1h_last']
+        rsi = indicators['rsi_15m_last']
+        bb_lower = indicators['bb_lower_15m_last']
+        volume = indicators['volume_15m_last']
+        volume_ma = indicators['volume_ma_15m_last']
         
         # 條件 1：價格低於均線且偏離超過閾值
         price_below_sma = deviation < -self.deviation_threshold
@@ -242,12 +343,11 @@ class MeanReversionStrategy(Strategy):
         """
         # 獲取最新值
         current_price = indicators['current_price']
-        sma = indicators['sma_1h'].iloc[-1]
-        deviation = indicators['deviation_1h'].iloc[-1]
-        rsi = indicators['rsi_15m'].iloc[-1]
-        bb_upper = indicators['bb_upper_15m'].iloc[-1]
-        volume = indicators['volume_15m'].iloc[-1]
-        volume_ma = indicators['volume_ma_15m'].iloc[-1]
+        deviation = indicators['deviation_1h_last']
+        rsi = indicators['rsi_15m_last']
+        bb_upper = indicators['bb_upper_15m_last']
+        volume = indicators['volume_15m_last']
+        volume_ma = indicators['volume_ma_15m_last']
         
         # 條件 1：價格高於均線且偏離超過閾值
         price_above_sma = deviation > self.deviation_threshold
@@ -282,7 +382,7 @@ class MeanReversionStrategy(Strategy):
             Signal: 買入信號對象
         """
         current_price = indicators['current_price']
-        atr = indicators['atr_15m'].iloc[-1]
+        atr = indicators['atr_15m_last']
         
         return Signal(
             strategy_id=self.strategy_id,
@@ -297,8 +397,8 @@ class MeanReversionStrategy(Strategy):
             confidence=0.75,  # 均值回歸策略的置信度通常較低
             metadata={
                 'strategy_type': 'mean_reversion',
-                'rsi': float(indicators['rsi_15m'].iloc[-1]),
-                'deviation': float(indicators['deviation_1h'].iloc[-1]),
+                'rsi': indicators['rsi_15m_last'],
+                'deviation': indicators['deviation_1h_last'],
                 'reason': 'oversold_mean_reversion'
             }
         )
@@ -314,7 +414,7 @@ class MeanReversionStrategy(Strategy):
             Signal: 賣出信號對象
         """
         current_price = indicators['current_price']
-        atr = indicators['atr_15m'].iloc[-1]
+        atr = indicators['atr_15m_last']
         
         return Signal(
             strategy_id=self.strategy_id,
@@ -329,8 +429,8 @@ class MeanReversionStrategy(Strategy):
             confidence=0.75,
             metadata={
                 'strategy_type': 'mean_reversion',
-                'rsi': float(indicators['rsi_15m'].iloc[-1]),
-                'deviation': float(indicators['deviation_1h'].iloc[-1]),
+                'rsi': indicators['rsi_15m_last'],
+                'deviation': indicators['deviation_1h_last'],
                 'reason': 'overbought_mean_reversion'
             }
         )
@@ -415,8 +515,9 @@ class MeanReversionStrategy(Strategy):
             data_1h = market_data.get_timeframe('1h')
             
             current_price = data_15m.ohlcv['close'].iloc[-1]
-            sma = data_1h.ohlcv['close'].rolling(window=self.sma_period).mean().iloc[-1]
-            rsi = self._calculate_rsi(data_15m.ohlcv['close'], self.rsi_period).iloc[-1]
+            self._sma_1h.update(frame_keys(data_1h.ohlcv), data_1h.ohlcv['close'].to_numpy())
+            sma = self._sma_1h.mean
+            rsi = _rsi_last_nb(data_15m.close_np, self.rsi_period)
             
             # 檢查止損和目標
             if position.direction == 'long':
@@ -486,8 +587,31 @@ class MeanReversionStrategy(Strategy):
         Returns:
             Tuple[pd.Series, pd.Series, pd.Series]: (上軌, 中軌, 下軌)
         """
-        middle = series.rolling(window=period).mean()
-        std = series.rolling(window=period).std()
+        # 單趟累積和：同時維護 Σx 與 Σx²，取代 rolling().mean() + rolling().std() 兩趟掃描。
+        # 先減去序列均值再累加，降低 Σx² 大數相減的精度損失；std 與 pandas 相同取 ddof=1。
+        values = series.to_numpy(dtype=float)
+        if period <= 1 or not np.isfinite(values).all():
+            # 含 NaN/inf 時累積和會讓之後每個窗格都變 NaN；period 為 1 時 ddof=1 的 std 無定義。
+            # 這兩種情況交給 pandas，只有含非有限值的窗格才是 NaN
+            middle = series.rolling(window=period).mean()
+            std = series.rolling(window=period).std()
+            return middle + (std * std_dev), middle, middle - (std * std_dev)
+        n = len(values)
+        middle = np.full(n, np.nan)
+        std = np.full(n, np.nan)
+        if n >= period:
+            shift = np.nanmean(values)
+            centered = values - shift
+            csum = np.concatenate(([0.0], np.cumsum(centered)))
+            csum_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+            s = csum[period:] - csum[:-period]
+            ss = csum_sq[period:] - csum_sq[:-period]
+            mean = s / period
+            var = (ss - s * mean) / (period - 1)
+            middle[period - 1:] = mean + shift
+            std[period - 1:] = np.sqrt(np.clip(var, 0.0, None))
+        middle = pd.Series(middle, index=series.index)
+        std = pd.Series(std, index=series.index)
         upper = middle + (std * std_dev)
         lower = middle - (std * std_dev)
         return upper, middle, lower
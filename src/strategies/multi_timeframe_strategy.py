@@ -5,15 +5,216 @@
 遷移自 trading_alert_system.py
 """
 
-import pandas as pd
+import math
+from bisect import bisect_left, bisect_right
+
 import numpy as np
-from typing import Dict, Optional
+from dataclasses import dataclass, fields
+from enum import IntEnum
+from typing import Any, Dict, Optional
 from datetime import datetime
 
 from src.execution.strategy import Strategy
 from src.models.config import StrategyConfig
-from src.models.market_data import MarketData
+from src.models.market_data import MarketData, TimeframeData
 from src.models.trading import Signal, Position
+from src.utils.jit import njit
+from src.utils.rolling import IncrementalRolling, frame_keys
+
+
+@njit(cache=True)
+def _wilder_rsi_nb(close: np.ndarray, period: int):
+    """Wilder RSI 平均漲跌幅：前 period 根簡單平均為種子，之後以 RMA（alpha=1/period）遞迴
+
+    Returns:
+        (前一根 avg_gain, 前一根 avg_loss, 最後一根 avg_gain, 最後一根 avg_loss)；
+        資料剛好只夠種子時前一根為 NaN
+    """
+    n = close.shape[0]
+    gain = 0.0
+    loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            gain += delta
+        elif delta < 0:
+            loss -= delta
+    gain /= period
+    loss /= period
+    prev_gain = np.nan
+    prev_loss = np.nan
+    for i in range(period + 1, n):
+        delta = close[i] - close[i - 1]
+        prev_gain = gain
+        prev_loss = loss
+        gain = (gain * (period - 1) + (delta if delta > 0 else 0.0)) / period
+        loss = (loss * (period - 1) + (-delta if delta < 0 else 0.0)) / period
+    return prev_gain, prev_loss, gain, loss
+
+
+@njit(cache=True)
+def _true_range_nb(high: float, low: float, prev_close: float) -> float:
+    """單根真實波幅"""
+    tr = high - low
+    up = abs(high - prev_close)
+    down = abs(low - prev_close)
+    if up > tr:
+        tr = up
+    if down > tr:
+        tr = down
+    return tr
+
+
+@njit(cache=True)
+def _wilder_atr_nb(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int):
+    """Wilder ATR：前 period 根真實波幅簡單平均為種子，之後 RMA 遞迴
+
+    Returns:
+        (前一根 ATR, 最後一根 ATR)；資料剛好只夠種子時前一根為 NaN
+    """
+    n = close.shape[0]
+    atr = 0.0
+    for i in range(1, period + 1):
+        atr += _true_range_nb(high[i], low[i], close[i - 1])
+    atr /= period
+    prev_atr = np.nan
+    for i in range(period + 1, n):
+        prev_atr = atr
+        atr = (atr * (period - 1) + _true_range_nb(high[i], low[i], close[i - 1])) / period
+    return prev_atr, atr
+
+
+@njit(cache=True)
+def _ema_pair_tail_nb(close: np.ndarray, fast: int, slow: int):
+    """單趟同時跑快慢兩條 EMA（以首根為種子，同 ewm(adjust=False)）
+
+    Returns:
+        (前一根快線, 前一根慢線, 最後一根快線, 最後一根慢線)
+    """
+    alpha_fast = 2.0 / (fast + 1)
+    alpha_slow = 2.0 / (slow + 1)
+    prev_fast = close[0]
+    prev_slow = close[0]
+    ema_fast = close[0]
+    ema_slow = close[0]
+    for i in range(1, close.shape[0]):
+        prev_fast = ema_fast
+        prev_slow = ema_slow
+        ema_fast = alpha_fast * close[i] + (1.0 - alpha_fast) * ema_fast
+        ema_slow = alpha_slow * close[i] + (1.0 - alpha_slow) * ema_slow
+    return prev_fast, prev_slow, ema_fast, ema_slow
+
+
+@njit(cache=True)
+def _ema_pair_series_nb(close: np.ndarray, fast: int, slow: int):
+    """整段快慢 EMA 序列（與 _ema_pair_tail_nb 同一遞迴，回測批次用）"""
+    n = close.shape[0]
+    ema_fast = np.empty(n)
+    ema_slow = np.empty(n)
+    if n == 0:
+        return ema_fast, ema_slow
+    alpha_fast = 2.0 / (fast + 1)
+    alpha_slow = 2.0 / (slow + 1)
+    ema_fast[0] = close[0]
+    ema_slow[0] = close[0]
+    for i in range(1, n):
+        ema_fast[i] = alpha_fast * close[i] + (1.0 - alpha_fast) * ema_fast[i - 1]
+        ema_slow[i] = alpha_slow * close[i] + (1.0 - alpha_slow) * ema_slow[i - 1]
+    return ema_fast, ema_slow
+
+
+@njit(cache=True)
+def _wilder_rsi_series_nb(close: np.ndarray, period: int):
+    """整段 Wilder 平均漲跌幅序列；第 period 根之前為 NaN"""
+    n = close.shape[0]
+    avg_gain = np.full(n, np.nan)
+    avg_loss = np.full(n, np.nan)
+    if n <= period:
+        return avg_gain, avg_loss
+    gain = 0.0
+    loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            gain += delta
+        elif delta < 0:
+            loss -= delta
+    gain /= period
+    loss /= period
+    avg_gain[period] = gain
+    avg_loss[period] = loss
+    for i in range(period + 1, n):
+        delta = close[i] - close[i - 1]
+        gain = (gain * (period - 1) + (delta if delta > 0 else 0.0)) / period
+        loss = (loss * (period - 1) + (-delta if delta < 0 else 0.0)) / period
+        avg_gain[i] = gain
+        avg_loss[i] = loss
+    return avg_gain, avg_loss
+
+
+@njit(cache=True)
+def _wilder_atr_series_nb(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int):
+    """整段 Wilder ATR 序列；第 period 根之前為 NaN"""
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+    atr = 0.0
+    for i in range(1, period + 1):
+        atr += _true_range_nb(high[i], low[i], close[i - 1])
+    atr /= period
+    out[period] = atr
+    for i in range(period + 1, n):
+        atr = (atr * (period - 1) + _true_range_nb(high[i], low[i], close[i - 1])) / period
+        out[i] = atr
+    return out
+
+
+class Trend(IntEnum):
+    """EMA20/EMA50 趨勢方向（整數值，批次回測可直接存成 int8 陣列比較）"""
+    UNKNOWN = 0
+    UP = 1
+    DOWN = -1
+    SIDEWAYS = 2
+
+
+def _ema_distance(price: float, ema: float) -> float:
+    """價格與 EMA 的相對距離；EMA 為 0 時視為無限遠"""
+    if ema == 0:
+        return float('inf')
+    return abs(price - ema) / ema
+
+
+@dataclass
+class BarState:
+    """單根 K 線的指標快照
+
+    同一根上 generate_signal 與 should_exit 共用，不重複計算趨勢等指標。
+    """
+    trend_1d: Trend
+    trend_4h: Trend
+    trend_1h: Trend
+    trend_15m: Trend
+    rsi_15m: float
+    atr_1h: float
+    price: float
+    ema20_1h: float
+    ema50_1h: float
+    volume_ratio: float
+    dist_ema20: float
+    dist_ema50: float
+
+    def __getitem__(self, key: str) -> Any:
+        """以指標名取值，讓條件判斷可直接吃 BarState（不必先轉字典）"""
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """同 dict.get"""
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉成指標字典（進場信號的 metadata）"""
+        return dict(vars(self))
 
 
 class MultiTimeframeStrategy(Strategy):
@@ -31,6 +232,22 @@ class MultiTimeframeStrategy(Strategy):
     2. 獲利：entry_price + (ATR * take_profit_atr)
     """
     
+    # 置信度分段表：分數 = SCORES[bisect(THRESHOLDS, 值)]（批次版用 np.searchsorted，同一張表）
+    # RSI 兩端皆含端點（40 <= rsi <= 60 得 0.2…），上界以 nextafter 讓 bisect_right 包含端點
+    _RSI_THRESHOLDS = (30.0, 35.0, 40.0,
+                       math.nextafter(60.0, math.inf), math.nextafter(65.0, math.inf),
+                       math.nextafter(70.0, math.inf))
+    _RSI_SCORES = (0.0, 0.1, 0.15, 0.2, 0.15, 0.1, 0.0)
+    # 與 EMA 的最近距離（嚴格小於，bisect_right）
+    _DIST_THRESHOLDS = (0.01, 0.02, 0.03)
+    _DIST_SCORES = (0.2, 0.15, 0.1, 0.0)
+    # 成交量比率（嚴格大於，bisect_left）；末端 inf 讓 NaN 與舊版一樣不加分
+    _VOLUME_THRESHOLDS = (1.0, 1.2, 1.5, math.inf)
+    _VOLUME_SCORES = (0.0, 0.1, 0.15, 0.2, 0.0)
+    
+    _TIMEFRAMES = ('1d', '4h', '1h', '15m')
+    _BAR_FIELDS = tuple(f.name for f in fields(BarState))
+    
     def __init__(self, config: StrategyConfig):
         super().__init__(config)
         
@@ -41,6 +258,153 @@ class MultiTimeframeStrategy(Strategy):
         self.rsi_range = params.get('rsi_range', [30, 70])
         self.ema_distance = params.get('ema_distance', 0.03)
         self.volume_threshold = params.get('volume_threshold', 1.0)
+        
+        # 熱路徑用的門檻（配置固定，建構時轉成 float 一次）
+        self._rsi_lo, self._rsi_hi = float(self.rsi_range[0]), float(self.rsi_range[1])
+        self._ema_distance = float(self.ema_distance)
+        self._volume_threshold = float(self.volume_threshold)
+        self._stop_loss_atr = float(self.stop_loss_atr)
+        self._take_profit_atr = float(self.take_profit_atr)
+        
+        # 週期 -> (當根識別, {指標鍵: 值})；同一根重複呼叫（generate_signal/should_exit、
+        # 趨勢與 EMA 共用）直接取值，新 K 線進來時整個換掉
+        self._indicator_cache: Dict[str, tuple] = {}
+        
+        # (指標, 週期, period) -> (最後一根識別, 前一根狀態, 最後一根狀態)；EMA 與 Wilder
+        # RSI/ATR 都是一階遞迴，相鄰呼叫只多一根時 O(1) 推進，不必每次掃整段
+        self._recursive_state: Dict[tuple, tuple] = {}
+        
+        # 15m 成交量 20 根均量（running sum，新一根 O(1) 滑動）
+        self._volume_ma_15m = IncrementalRolling(20)
+        
+        # (當根識別, BarState)：同一根的 generate_signal / should_exit 共用
+        self._bar_state: Optional[tuple] = None
+        
+        # 回測批次預算（prepare 填入）：timestamp -> 列位置、各指標整段陣列、進場方向
+        self._batch_index: Optional[Dict] = None
+        self._batch: Optional[Dict[str, np.ndarray]] = None
+        self._batch_actions: Optional[np.ndarray] = None
+    
+    def prepare(self, market_data: dict) -> None:
+        """回測前以整段向量算完每根 1h 的指標與進場方向，依 timestamp 快取
+        
+        之後 generate_signal 在無信號的根直接回 HOLD，should_exit 與進場根的
+        BarState 直接取預算值，不再逐根推進指標。
+        """
+        if any(tf not in market_data or len(market_data[tf]) == 0 for tf in self._TIMEFRAMES):
+            self._batch_index = self._batch = self._batch_actions = None
+            return
+        
+        df_1h = market_data['1h']
+        self._batch = self._batch_indicators(market_data, frame_keys(df_1h))
+        self._batch_actions = self._batch_directions(self._batch)
+        keys = df_1h['timestamp'] if 'timestamp' in df_1h.columns else df_1h.index
+        self._batch_index = dict(zip(keys, range(len(keys))))
+        self._bar_state = None
+    
+    def clear_prepared(self) -> None:
+        """回測結束後清除批次預算，之後的 generate_signal 回到逐根計算"""
+        self._batch_index = self._batch = self._batch_actions = None
+        self._bar_state = None
+    
+    def generate_signals_batch(self, market_data: dict, timestamps=None) -> np.ndarray:
+        """對整段數據向量化計算每根的進場方向
+        
+        各週期以「timestamp <= 當根」對齊（同 BacktestEngine 逐根切片），指標為從各週期
+        首根起整段遞迴的 EMA / Wilder RSI / Wilder ATR，與逐根 generate_signal 一致
+        （逐根路徑首次冷啟動若不在資料起點，EMA50 的種子差異會隨遞迴衰減到 1e-5 以下）。
+        
+        Args:
+            market_data: 週期 -> OHLCV DataFrame（需含 1d/4h/1h/15m）
+            timestamps: 要評估的時間點，預設為 1h 全部 timestamp
+        
+        Returns:
+            np.ndarray: int8 陣列，1=做多、-1=做空、0=無信號
+        """
+        if timestamps is None:
+            timestamps = frame_keys(market_data['1h'])
+        return self._batch_directions(self._batch_indicators(market_data, np.asarray(timestamps)))
+    
+    def _batch_directions(self, batch: Dict[str, np.ndarray]) -> np.ndarray:
+        """由批次指標算進場方向（資料不齊的根為 0）"""
+        actions = self.check_entry_conditions_batch(
+            batch['trend_4h'], batch['trend_1h'], batch['rsi_15m'], batch['price'],
+            batch['ema20_1h'], batch['ema50_1h'], batch['volume_ratio'])
+        actions[~batch['valid']] = 0
+        return actions
+    
+    def _batch_indicators(self, market_data: dict, timestamps: np.ndarray) -> Dict[str, np.ndarray]:
+        """整段計算每個時間點的 BarState 欄位（陣列版）"""
+        rows = {}
+        valid = np.ones(len(timestamps), dtype=bool)
+        for tf in self._TIMEFRAMES:
+            j = np.searchsorted(frame_keys(market_data[tf]), timestamps, side='right') - 1
+            valid &= j >= 0
+            rows[tf] = np.maximum(j, 0)
+        
+        out = {'valid': valid}
+        emas = {}
+        for tf in self._TIMEFRAMES:
+            close = np.ascontiguousarray(market_data[tf]['close'].to_numpy(dtype=np.float64))
+            ema20, ema50 = _ema_pair_series_nb(close, 20, 50)
+            j = rows[tf]
+            ema20, ema50 = ema20[j], ema50[j]
+            out[f'trend_{tf}'] = np.where(
+                j + 1 < 50, Trend.UNKNOWN,
+                np.where(ema20 > ema50, Trend.UP,
+                         np.where(ema20 < ema50, Trend.DOWN, Trend.SIDEWAYS))
+            ).astype(np.int8)
+            emas[tf] = (close[j], ema20, ema50)
+        
+        # 1h 價格與 EMA（不足 50 根時慢線、不足 20 根時快線沿用收盤價，同逐根）
+        j_1h = rows['1h']
+        price, ema20_1h, ema50_1h = emas['1h']
+        out['price'] = price
+        out['ema20_1h'] = np.where(j_1h + 1 >= 20, ema20_1h, price)
+        out['ema50_1h'] = np.where(j_1h + 1 >= 50, ema50_1h, price)
+        
+        # 15m RSI（Wilder）
+        df_15m = market_data['15m']
+        j_15m = rows['15m']
+        avg_gain, avg_loss = _wilder_rsi_series_nb(
+            np.ascontiguousarray(df_15m['close'].to_numpy(dtype=np.float64)), 14)
+        avg_gain, avg_loss = avg_gain[j_15m], avg_loss[j_15m]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + avg_gain / avg_loss)))
+        out['rsi_15m'] = np.where(j_15m + 1 < 15, 50.0, rsi)
+        
+        # 1h ATR（Wilder）
+        df_1h = market_data['1h']
+        atr = _wilder_atr_series_nb(
+            np.ascontiguousarray(df_1h['high'].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(df_1h['low'].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(df_1h['close'].to_numpy(dtype=np.float64)), 14)
+        out['atr_1h'] = np.where(j_1h + 1 < 15, 0.0, atr[j_1h])
+        
+        # 15m 成交量 / 20 根均量
+        volume = np.ascontiguousarray(df_15m['volume'].to_numpy(dtype=np.float64))
+        volume_ma = np.full(len(volume), np.nan)
+        if len(volume) >= 20:
+            volume_ma[19:] = np.lib.stride_tricks.sliding_window_view(volume, 20).sum(axis=1) / 20
+        volume_ma = volume_ma[j_15m]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['volume_ratio'] = np.where(volume_ma > 0, volume[j_15m] / volume_ma, 0.0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['dist_ema20'] = np.where(
+                out['ema20_1h'] == 0, np.inf, np.abs(price - out['ema20_1h']) / out['ema20_1h'])
+            out['dist_ema50'] = np.where(
+                out['ema50_1h'] == 0, np.inf, np.abs(price - out['ema50_1h']) / out['ema50_1h'])
+        return out
+    
+    def _batch_row(self, timestamp) -> Optional[int]:
+        """當根在批次預算中的列位置；未 prepare、不在範圍或資料不齊時為 None"""
+        if self._batch_index is None:
+            return None
+        row = self._batch_index.get(timestamp)
+        if row is None or not self._batch['valid'][row]:
+            return None
+        return row
     
     def generate_signal(self, market_data: MarketData) -> Signal:
         """
@@ -52,44 +416,35 @@ class MultiTimeframeStrategy(Strategy):
         Returns:
             Signal: 交易信號
         """
-        # 獲取各週期數據
-        tf_1d = market_data.get_timeframe('1d')
-        tf_4h = market_data.get_timeframe('4h')
-        tf_1h = market_data.get_timeframe('1h')
-        tf_15m = market_data.get_timeframe('15m')
+        # 回測已預算整段方向：無信號的根直接 HOLD
+        row = self._batch_row(market_data.timestamp)
+        if row is not None and self._batch_actions[row] == 0:
+            return Signal.hold(self.config.strategy_id, market_data.timestamp, self.config.symbol)
         
-        # 計算技術指標
-        indicators = self._calculate_indicators(tf_1d, tf_4h, tf_1h, tf_15m)
+        # 計算技術指標（同一根與 should_exit 共用）
+        state = self._compute_bar_state(market_data)
         
         # 檢查進場條件
-        should_enter, direction = self._check_entry_conditions(indicators)
+        should_enter, direction = self._check_entry_conditions(state)
         
         if not should_enter:
-            return Signal(
-                strategy_id=self.config.strategy_id,
-                timestamp=market_data.timestamp,
-                symbol=self.config.symbol,
-                action='HOLD',
-                direction=None,
-                entry_price=0.0,
-                stop_loss=0.0,
-                take_profit=0.0,
-                position_size=0.0,
-                confidence=0.0,
-                metadata=indicators
-            )
+            # 絕大多數 K 線走這裡：不帶指標 metadata，也不轉字典
+            return Signal.hold(self.config.strategy_id, market_data.timestamp, self.config.symbol)
         
         # 生成進場信號
+        indicators = state.to_dict()
         price = indicators['price']
         atr = indicators['atr_1h']
         
-        # 計算止損和目標
+        # 計算止損和目標（距離各算一次，多空只差方向）
+        stop_distance = atr * self._stop_loss_atr
+        target_distance = atr * self._take_profit_atr
         if direction == 'long':
-            stop_loss = price - (atr * self.stop_loss_atr)
-            take_profit = price + (atr * self.take_profit_atr)
+            stop_loss = price - stop_distance
+            take_profit = price + target_distance
         else:
-            stop_loss = price + (atr * self.stop_loss_atr)
-            take_profit = price - (atr * self.take_profit_atr)
+            stop_loss = price + stop_distance
+            take_profit = price - target_distance
         
         # 計算倉位大小（由 BacktestEngine 或 LiveTrader 調用 calculate_position_size）
         position_size = 0.0  # 將由執行引擎計算
@@ -147,9 +502,9 @@ class MultiTimeframeStrategy(Strategy):
             float: 止損價格
         """
         if direction == 'long':
-            return entry_price - (atr * self.stop_loss_atr)
+            return entry_price - (atr * self._stop_loss_atr)
         else:
-            return entry_price + (atr * self.stop_loss_atr)
+            return entry_price + (atr * self._stop_loss_atr)
     
     def calculate_take_profit(self, entry_price: float, direction: str, atr: float) -> float:
         """
@@ -164,9 +519,9 @@ class MultiTimeframeStrategy(Strategy):
             float: 目標價格
         """
         if direction == 'long':
-            return entry_price + (atr * self.take_profit_atr)
+            return entry_price + (atr * self._take_profit_atr)
         else:
-            return entry_price - (atr * self.take_profit_atr)
+            return entry_price - (atr * self._take_profit_atr)
     
     def should_exit(self, position: Position, market_data: MarketData) -> bool:
         """
@@ -180,8 +535,7 @@ class MultiTimeframeStrategy(Strategy):
             bool: 是否應該出場
         """
         # 獲取當前價格
-        tf_15m = market_data.get_timeframe('15m')
-        current_price = tf_15m.get_latest()['close']
+        current_price = market_data.get_timeframe('15m').close_np[-1]
         
         # 檢查止損
         if position.direction == 'long':
@@ -199,47 +553,75 @@ class MultiTimeframeStrategy(Strategy):
             if current_price <= position.take_profit:
                 return True
         
-        # 檢查趨勢反轉
-        tf_4h = market_data.get_timeframe('4h')
-        tf_1h = market_data.get_timeframe('1h')
-        
-        trend_4h = self._calculate_trend(tf_4h.ohlcv)
-        trend_1h = self._calculate_trend(tf_1h.ohlcv)
+        # 檢查趨勢反轉（與同一根的 generate_signal 共用指標）
+        state = self._compute_bar_state(market_data)
+        trend_4h = state.trend_4h
+        trend_1h = state.trend_1h
         
         # 如果趨勢反轉，提前出場
-        if position.direction == 'long' and trend_4h == 'Downtrend' and trend_1h == 'Downtrend':
+        if position.direction == 'long' and trend_4h == Trend.DOWN and trend_1h == Trend.DOWN:
             return True
-        if position.direction == 'short' and trend_4h == 'Uptrend' and trend_1h == 'Uptrend':
+        if position.direction == 'short' and trend_4h == Trend.UP and trend_1h == Trend.UP:
             return True
         
         return False
     
+    def _compute_bar_state(self, market_data: MarketData) -> BarState:
+        """計算當根指標快照（以 timestamp 與各週期當根識別快取）
+        
+        Args:
+            market_data: 市場數據
+        
+        Returns:
+            BarState: 當根指標
+        """
+        row = self._batch_row(market_data.timestamp)
+        if row is not None:
+            values = {field: self._batch[field][row] for field in self._BAR_FIELDS}
+            for field in ('trend_1d', 'trend_4h', 'trend_1h', 'trend_15m'):
+                values[field] = Trend(values[field])
+            return BarState(**values)
+        
+        timeframes = tuple(market_data.get_timeframe(tf) for tf in self._TIMEFRAMES)
+        key = (market_data.timestamp,) + tuple(self._bar_stamp(tf) for tf in timeframes)
+        cached = self._bar_state
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        state = BarState(**self._calculate_indicators(*timeframes))
+        self._bar_state = (key, state)
+        return state
+    
     def _calculate_indicators(self, tf_1d, tf_4h, tf_1h, tf_15m) -> Dict:
         """計算所有需要的技術指標"""
-        # 計算趨勢
-        trend_1d = self._calculate_trend(tf_1d.ohlcv)
-        trend_4h = self._calculate_trend(tf_4h.ohlcv)
-        trend_1h = self._calculate_trend(tf_1h.ohlcv)
-        trend_15m = self._calculate_trend(tf_15m.ohlcv)
+        # 計算趨勢（四個週期各自一次推進 EMA20/EMA50）
+        trend_1d, trend_4h, trend_1h, trend_15m = (
+            self._trend(tf) for tf in (tf_1d, tf_4h, tf_1h, tf_15m)
+        )
         
         # 計算 RSI
-        rsi_15m = self._calculate_rsi(tf_15m.ohlcv, period=14)
+        rsi_15m = self._cached(tf_15m, ('rsi', 14), self._calculate_rsi, tf_15m, 14)
         
         # 計算 ATR
-        atr_1h = self._calculate_atr(tf_1h.ohlcv, period=14)
+        atr_1h = self._cached(tf_1h, ('atr', 14), self._calculate_atr, tf_1h, 14)
         
-        # 計算 EMA
-        ema20_1h = self._calculate_ema(tf_1h.ohlcv['close'], period=20)
-        ema50_1h = self._calculate_ema(tf_1h.ohlcv['close'], period=50)
+        # 計算 EMA（與 1h 趨勢判斷共用快取）
+        ema20_1h, ema50_1h = self._trend_emas(tf_1h)
         
         # 獲取當前價格
-        price = tf_1h.ohlcv.iloc[-1]['close']
+        price = tf_1h.close_np[-1]
         
         # 計算成交量比率
-        volume_20d_avg = tf_15m.ohlcv['volume'].rolling(window=20).mean().iloc[-1]
-        current_volume = tf_15m.ohlcv.iloc[-1]['volume']
+        volumes = tf_15m.volume_np
+        self._volume_ma_15m.update(frame_keys(tf_15m.ohlcv), volumes)
+        volume_20d_avg = self._volume_ma_15m.mean
+        current_volume = volumes[-1]
         volume_ratio = current_volume / volume_20d_avg if volume_20d_avg > 0 else 0
         
+        # 價格與 EMA 的相對距離（進場條件與置信度共用）
+        dist_ema20 = _ema_distance(price, ema20_1h)
+        dist_ema50 = _ema_distance(price, ema50_1h)
+        
         return {
             'trend_1d': trend_1d,
             'trend_4h': trend_4h,
@@ -250,46 +632,70 @@ class MultiTimeframeStrategy(Strategy):
             'price': price,
             'ema20_1h': ema20_1h,
             'ema50_1h': ema50_1h,
-            'volume_ratio': volume_ratio
+            'volume_ratio': volume_ratio,
+            'dist_ema20': dist_ema20,
+            'dist_ema50': dist_ema50,
         }
     
     def _check_entry_conditions(self, indicators: Dict) -> tuple[bool, Optional[str]]:
         """
         檢查進場條件
         
+        四個條件一次算完再以 & 合併（不逐條提早返回），與
+        check_entry_conditions_batch 同一套判斷。
+        
         Returns:
             (should_enter, direction): 是否進場和方向
         """
-        # 1. 檢查趨勢一致性（4H 和 1H）
         trend_4h = indicators['trend_4h']
-        trend_1h = indicators['trend_1h']
-        
-        if trend_4h != trend_1h or trend_4h not in ['Uptrend', 'Downtrend']:
-            return False, None
-        
-        direction = 'long' if trend_4h == 'Uptrend' else 'short'
-        
-        # 2. 檢查 RSI
         rsi = indicators['rsi_15m']
-        if not (self.rsi_range[0] <= rsi <= self.rsi_range[1]):
-            return False, None
-        
-        # 3. 檢查價格是否接近 EMA
-        price = indicators['price']
-        ema20 = indicators['ema20_1h']
-        ema50 = indicators['ema50_1h']
+        dist_ema20, dist_ema50 = self._ema_distances(indicators)
+        ema_distance = self._ema_distance
         
-        near_ema20 = abs(price - ema20) / ema20 < self.ema_distance
-        near_ema50 = abs(price - ema50) / ema50 < self.ema_distance
+        # 1. 趨勢一致性（4H 和 1H）；2. RSI；3. 價格接近 EMA；4. 成交量
+        trend_ok = ((trend_4h == indicators['trend_1h'])
+                    & ((trend_4h == Trend.UP) | (trend_4h == Trend.DOWN)))
+        rsi_ok = (self._rsi_lo <= rsi) & (rsi <= self._rsi_hi)
+        ema_ok = (dist_ema20 < ema_distance) | (dist_ema50 < ema_distance)
+        volume_ok = indicators['volume_ratio'] >= self._volume_threshold
         
-        if not (near_ema20 or near_ema50):
+        if not (trend_ok & rsi_ok & ema_ok & volume_ok):
             return False, None
         
-        # 4. 檢查成交量
-        if indicators['volume_ratio'] < self.volume_threshold:
-            return False, None
+        return True, 'long' if trend_4h == Trend.UP else 'short'
+    
+    def check_entry_conditions_batch(self, trend_4h: np.ndarray, trend_1h: np.ndarray,
+                                     rsi: np.ndarray, price: np.ndarray,
+                                     ema20: np.ndarray, ema50: np.ndarray,
+                                     volume_ratio: np.ndarray) -> np.ndarray:
+        """
+        逐根進場條件的向量化版本（批次回測、參數掃描用）
+        
+        各參數為等長陣列（趨勢為 Trend 整數值），
+        結果與逐根呼叫 _check_entry_conditions 一致。
         
-        return True, direction
+        Returns:
+            np.ndarray: int8 陣列，1 = 做多、-1 = 做空、0 = 不進場
+        """
+        trend_4h = np.asarray(trend_4h)
+        trend_1h = np.asarray(trend_1h)
+        rsi = np.asarray(rsi, dtype=np.float64)
+        price = np.asarray(price, dtype=np.float64)
+        ema20 = np.asarray(ema20, dtype=np.float64)
+        ema50 = np.asarray(ema50, dtype=np.float64)
+        volume_ratio = np.asarray(volume_ratio, dtype=np.float64)
+        
+        up = trend_4h == Trend.UP
+        down = trend_4h == Trend.DOWN
+        trend_mask = (trend_4h == trend_1h) & (up | down)
+        rsi_mask = (rsi >= self._rsi_lo) & (rsi <= self._rsi_hi)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ema_mask = ((np.abs(price - ema20) / ema20 < self._ema_distance)
+                        | (np.abs(price - ema50) / ema50 < self._ema_distance))
+        vol_mask = volume_ratio >= self._volume_threshold
+        
+        entry_mask = trend_mask & rsi_mask & ema_mask & vol_mask
+        return np.where(up & entry_mask, 1, np.where(down & entry_mask, -1, 0)).astype(np.int8)
     
     def _calculate_confidence(self, indicators: Dict) -> float:
         """
@@ -310,107 +716,236 @@ class MultiTimeframeStrategy(Strategy):
             confidence += 0.3
         
         # RSI 位置（最多 0.2）
-        rsi = indicators['rsi_15m']
-        if 40 <= rsi <= 60:
-            confidence += 0.2
-        elif 35 <= rsi <= 65:
-            confidence += 0.15
-        elif 30 <= rsi <= 70:
-            confidence += 0.1
+        confidence += self._RSI_SCORES[bisect_right(self._RSI_THRESHOLDS, indicators['rsi_15m'])]
         
         # 價格與 EMA 的距離（最多 0.2）
-        price = indicators['price']
-        ema20 = indicators['ema20_1h']
-        ema50 = indicators['ema50_1h']
-        
-        dist_ema20 = abs(price - ema20) / ema20
-        dist_ema50 = abs(price - ema50) / ema50
-        
+        dist_ema20, dist_ema50 = self._ema_distances(indicators)
         min_dist = min(dist_ema20, dist_ema50)
-        if min_dist < 0.01:
-            confidence += 0.2
-        elif min_dist < 0.02:
-            confidence += 0.15
-        elif min_dist < 0.03:
-            confidence += 0.1
+        confidence += self._DIST_SCORES[bisect_right(self._DIST_THRESHOLDS, min_dist)]
         
         # 成交量（最多 0.2）
-        volume_ratio = indicators['volume_ratio']
-        if volume_ratio > 1.5:
-            confidence += 0.2
-        elif volume_ratio > 1.2:
-            confidence += 0.15
-        elif volume_ratio > 1.0:
-            confidence += 0.1
+        confidence += self._VOLUME_SCORES[
+            bisect_left(self._VOLUME_THRESHOLDS, indicators['volume_ratio'])]
         
         return min(confidence, 1.0)
     
-    def _calculate_trend(self, df: pd.DataFrame) -> str:
+    def calculate_confidence_batch(self, trend_1d: np.ndarray, trend_4h: np.ndarray,
+                                   trend_1h: np.ndarray, rsi: np.ndarray,
+                                   dist_ema20: np.ndarray, dist_ema50: np.ndarray,
+                                   volume_ratio: np.ndarray) -> np.ndarray:
+        """
+        置信度的向量化版本（與 _calculate_confidence 同一組分段表）
+        
+        Returns:
+            np.ndarray: 每根的置信度（0-1）
+        """
+        trend_1d = np.asarray(trend_1d)
+        trend_4h = np.asarray(trend_4h)
+        trend_1h = np.asarray(trend_1h)
+        aligned = trend_4h == trend_1h
+        confidence = np.where(aligned & (trend_1d == trend_4h), 0.4, np.where(aligned, 0.3, 0.0))
+        
+        rsi_scores = np.asarray(self._RSI_SCORES)
+        dist_scores = np.asarray(self._DIST_SCORES)
+        volume_scores = np.asarray(self._VOLUME_SCORES)
+        min_dist = np.minimum(np.asarray(dist_ema20, dtype=np.float64),
+                              np.asarray(dist_ema50, dtype=np.float64))
+        confidence = confidence + rsi_scores[
+            np.searchsorted(self._RSI_THRESHOLDS, np.asarray(rsi, dtype=np.float64), side='right')]
+        confidence = confidence + dist_scores[
+            np.searchsorted(self._DIST_THRESHOLDS, min_dist, side='right')]
+        confidence = confidence + volume_scores[
+            np.searchsorted(self._VOLUME_THRESHOLDS, np.asarray(volume_ratio, dtype=np.float64),
+                            side='left')]
+        return np.minimum(confidence, 1.0)
+    
+    @staticmethod
+    def _ema_distances(indicators: Dict) -> tuple:
+        """取 (dist_ema20, dist_ema50)；指標字典沒帶時由價格與 EMA 現算"""
+        dist_ema20 = indicators.get('dist_ema20')
+        dist_ema50 = indicators.get('dist_ema50')
+        if dist_ema20 is None or dist_ema50 is None:
+            price = indicators['price']
+            dist_ema20 = _ema_distance(price, indicators['ema20_1h'])
+            dist_ema50 = _ema_distance(price, indicators['ema50_1h'])
+        return dist_ema20, dist_ema50
+    
+    def _cached(self, tf_data: TimeframeData, key: tuple, compute, *args):
+        """以「週期 + 當根」為範圍快取指標值
+        
+        當根以最後一根的 timestamp、收盤價與長度識別（實盤未收盤 K 線收盤價會變，
+        此時視為新的一根重算）。每個週期只保留當根的快取。
+        
+        Args:
+            tf_data: 週期數據
+            key: 指標鍵，如 ('ema', 20)
+            compute: 快取未命中時的計算函數
+            *args: 傳給 compute 的參數
+        """
+        stamp = self._bar_stamp(tf_data)
+        if stamp is None:
+            return compute(*args)
+        
+        entry = self._indicator_cache.get(tf_data.timeframe)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, {})
+            self._indicator_cache[tf_data.timeframe] = entry
+        
+        values = entry[1]
+        if key not in values:
+            values[key] = compute(*args)
+        return values[key]
+    
+    @staticmethod
+    def _bar_stamp(tf_data: TimeframeData) -> Optional[tuple]:
+        """週期當根識別：(最後一根 timestamp, 收盤價, 長度)；無資料時為 None"""
+        df = tf_data.ohlcv
+        if df.empty:
+            return None
+        return (frame_keys(df)[-1], tf_data.close_np[-1], len(df))
+    
+    def _trend_emas(self, tf_data: TimeframeData) -> tuple:
+        """取該週期收盤價 (EMA20, EMA50) 最新值（快取）"""
+        return self._cached(tf_data, ('ema', 20, 50), self._update_emas, tf_data, 20, 50)
+    
+    def _advance(self, tf_data: TimeframeData, key: tuple, cold_start, step):
+        """推進遞迴指標的狀態
+        
+        - 最後一根與上次相同（實盤未收盤 K 線更新）：以前一根狀態重算當根
+        - 上次的最後一根仍在視窗內：從那根逐根推進到當根（通常只多一根；
+          回測中沒被呼叫到的根、或大週期一次進來多根時也接得上，不重新播種）
+        - 其他（首次、上次那根已滑出視窗、回補）：cold_start 整段重算
+        
+        如此逐根結果與「從首次冷啟動起整段遞迴」一致，與 generate_signals_batch 相同。
+        
+        Args:
+            tf_data: 週期數據
+            key: 狀態鍵
+            cold_start: () -> (前一根狀態, 當根狀態)，前一根不存在時為 None
+            step: (前一根狀態, 列位置) -> 該列狀態
+        
+        Returns:
+            當根狀態
+        """
+        keys = frame_keys(tf_data.ohlcv)
+        n = len(keys)
+        state = self._recursive_state.get(key)
+        
+        if state is not None and state[0] == keys[-1] and state[1] is not None:
+            base = state[1]
+        elif state is not None and state[0] == keys[-2]:
+            base = state[2]
+        else:
+            pos = np.searchsorted(keys, state[0]) if state is not None else n
+            if pos >= n - 1 or keys[pos] != state[0]:
+                prev, current = cold_start()
+                self._recursive_state[key] = (keys[-1], prev, current)
+                return current
+            base = state[2]
+            for i in range(pos + 1, n - 1):
+                base = step(base, i)
+        
+        current = step(base, n - 1)
+        self._recursive_state[key] = (keys[-1], base, current)
+        return current
+    
+    def _update_emas(self, tf_data: TimeframeData, fast: int, slow: int) -> tuple:
+        """快慢兩條 EMA 一起遞迴更新：ema = alpha * close + (1 - alpha) * 前一根 ema
+        
+        同一根只取一次收盤價、查一次狀態；冷啟動由單一迴圈同時跑兩條線。
+        資料不足某條的週期時，該條沿用舊語意回傳最新收盤價。
+        """
+        df = tf_data.ohlcv
+        key = ('ema', tf_data.timeframe, fast, slow)
+        closes = tf_data.close_np
+        if len(df) < max(fast, slow):
+            self._recursive_state.pop(key, None)
+            values = _ema_pair_tail_nb(closes, fast, slow)
+            close = float(closes[-1])
+            return (values[2] if len(df) >= fast else close,
+                    values[3] if len(df) >= slow else close)
+        
+        alpha_fast = 2.0 / (fast + 1)
+        alpha_slow = 2.0 / (slow + 1)
+        
+        def cold_start():
+            prev_fast, prev_slow, ema_fast, ema_slow = _ema_pair_tail_nb(closes, fast, slow)
+            return (prev_fast, prev_slow), (ema_fast, ema_slow)
+        
+        def step(prev, i):
+            close = float(closes[i])
+            return (alpha_fast * close + (1 - alpha_fast) * prev[0],
+                    alpha_slow * close + (1 - alpha_slow) * prev[1])
+        
+        return self._advance(tf_data, key, cold_start, step)
+    
+    def _trend(self, tf_data: TimeframeData) -> Trend:
+        """取該週期趨勢（快取，EMA 與指標計算共用）"""
+        return self._cached(tf_data, ('trend',), self._calculate_trend, tf_data)
+    
+    def _calculate_trend(self, tf_data: TimeframeData) -> Trend:
         """
         計算趨勢方向
         
         使用 EMA 20 和 EMA 50 判斷趨勢
         """
-        if len(df) < 50:
-            return 'Unknown'
+        if len(tf_data.ohlcv) < 50:
+            return Trend.UNKNOWN
         
-        ema20 = self._calculate_ema(df['close'], period=20)
-        ema50 = self._calculate_ema(df['close'], period=50)
+        ema20, ema50 = self._trend_emas(tf_data)
         
         if ema20 > ema50:
-            return 'Uptrend'
+            return Trend.UP
         elif ema20 < ema50:
-            return 'Downtrend'
+            return Trend.DOWN
         else:
-            return 'Sideways'
+            return Trend.SIDEWAYS
     
-    def _calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> float:
-        """計算 RSI 指標"""
+    def _calculate_rsi(self, tf_data: TimeframeData, period: int = 14) -> float:
+        """計算 RSI 指標（Wilder 平滑，逐根遞迴更新）"""
+        df = tf_data.ohlcv
+        key = ('rsi', tf_data.timeframe, period)
         if len(df) < period + 1:
+            self._recursive_state.pop(key, None)
             return 50.0
         
-        close = df['close'].values
-        delta = np.diff(close)
+        close = tf_data.close_np
         
-        gain = np.where(delta > 0, delta, 0)
-        loss = np.where(delta < 0, -delta, 0)
+        def cold_start():
+            prev_gain, prev_loss, avg_gain, avg_loss = _wilder_rsi_nb(close, period)
+            prev = None if np.isnan(prev_gain) else (prev_gain, prev_loss)
+            return prev, (avg_gain, avg_loss)
         
-        avg_gain = np.mean(gain[-period:])
-        avg_loss = np.mean(loss[-period:])
+        def step(prev, i):
+            delta = float(close[i]) - float(close[i - 1])
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            return ((prev[0] * (period - 1) + gain) / period,
+                    (prev[1] * (period - 1) + loss) / period)
         
+        avg_gain, avg_loss = self._advance(tf_data, key, cold_start, step)
         if avg_loss == 0:
             return 100.0
         
         rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return 100 - (100 / (1 + rs))
     
-    def _calculate_atr(self, df: pd.DataFrame, period: int = 14) -> float:
-        """計算 ATR 指標"""
+    def _calculate_atr(self, tf_data: TimeframeData, period: int = 14) -> float:
+        """計算 ATR 指標（Wilder 平滑，逐根遞迴更新）"""
+        df = tf_data.ohlcv
+        key = ('atr', tf_data.timeframe, period)
         if len(df) < period + 1:
+            self._recursive_state.pop(key, None)
             return 0.0
         
-        high = df['high'].values
-        low = df['low'].values
-        close = df['close'].values
-        
-        tr = np.maximum(
-            high[1:] - low[1:],
-            np.maximum(
-                np.abs(high[1:] - close[:-1]),
-                np.abs(low[1:] - close[:-1])
-            )
-        )
+        high, low, close = tf_data.high_np, tf_data.low_np, tf_data.close_np
         
-        atr = np.mean(tr[-period:])
+        def cold_start():
+            prev_atr, atr = _wilder_atr_nb(high, low, close, period)
+            return (None if np.isnan(prev_atr) else prev_atr), atr
         
-        return atr
-    
-    def _calculate_ema(self, series: pd.Series, period: int) -> float:
-        """計算 EMA 指標"""
-        if len(series) < period:
-            return series.iloc[-1]
-        
-        ema = series.ewm(span=period, adjust=False).mean()
-        return ema.iloc[-1]
+        return self._advance(
+            tf_data, key, cold_start,
+            lambda prev, i: (prev * (period - 1)
+                             + _true_range_nb(float(high[i]), float(low[i]), float(close[i - 1]))) / period,
+        )
@@ -87,6 +87,10 @@ class ScalpingAdapter(Strategy):
                 'scale': float(row.get('position_scale', 1.0)),
             }
 
+    def clear_prepared(self) -> None:
+        """回測結束後清除訊號快取"""
+        self._signals = {}
+
     def generate_signal(self, market_data: MarketData) -> Signal:
         ts = market_data.timestamp
         info = self._signals.get(ts)
@@ -190,6 +194,9 @@ class DataFrameSignalAdapter(Strategy):
                 if pd.notna(sl) and pd.notna(tp):
                     self._signals[key] = ('short', float(sl), float(tp))
 
+    def clear_prepared(self) -> None:
+        self._signals = {}
+
     def generate_signal(self, market_data: MarketData) -> Signal:
         info = self._signals.get(market_data.timestamp)
         if info is None:
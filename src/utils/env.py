@@ -0,0 +1,74 @@
+"""
+.env 檔解析
+
+有 python-dotenv 時交給 dotenv_values；否則以相同語法逐筆解析：export 前綴、單/雙引號
+（含跳脫字元與跨行雙引號值）、未加引號值的行尾註解、${VAR} 與 ${VAR:-default} 展開。
+每次呼叫都重新讀檔（檔案很小），長時間執行的程序修改 .env 後即可讀到新值。
+"""
+
+import codecs
+import os
+import re
+from pathlib import Path
+from typing import Dict, Union
+
+try:
+    from dotenv import dotenv_values
+except ImportError:  # python-dotenv 為可選依賴
+    dotenv_values = None
+
+
+# 一筆 KEY=VALUE（與 python-dotenv 的語法一致）
+_BINDING = re.compile(
+    r"""[ \t]*(?:export[ \t]+)?(?P<key>[^=\#\s]+)[ \t]*=[ \t]*"""
+    r"""(?:'(?P<single>(?:\\'|[^'])*)'|"(?P<double>(?:\\"|[^"])*)"|(?P<bare>[^\r\n]*))"""
+)
+_INLINE_COMMENT = re.compile(r"\s+#.*")
+_SINGLE_QUOTE_ESCAPES = re.compile(r"\\[\\']")
+_DOUBLE_QUOTE_ESCAPES = re.compile(r"\\[\\'\"abfnrtv]")
+_POSIX_VARIABLE = re.compile(r"\$\{(?P<name>[^\}:]*)(?::-(?P<default>[^\}]*))?\}")
+
+
+def parsed_env(path: Union[str, Path] = '.env') -> Dict[str, str]:
+    """解析 .env 檔（檔案不存在回傳空字典）
+
+    Args:
+        path: .env 路徑；相對路徑以呼叫當下的工作目錄解析
+
+    Returns:
+        Dict[str, str]: 設定值（每次呼叫都是新的字典，呼叫端可自由修改）
+    """
+    env_file = Path(path)
+    if not env_file.exists():
+        return {}
+
+    if dotenv_values is not None:
+        return {k: v for k, v in dotenv_values(env_file).items() if v is not None}
+
+    return _parse_env_text(env_file.read_text(encoding='utf-8'))
+
+
+def _parse_env_text(text: str) -> Dict[str, str]:
+    """python-dotenv 未安裝時的解析器，語法與 dotenv_values 相同"""
+    config: Dict[str, str] = {}
+    pos = 0
+    while pos < len(text):
+        match = _BINDING.match(text, pos)
+        eol = text.find('\n', match.end() if match else pos)
+        pos = len(text) if eol == -1 else eol + 1
+        if match is None:
+            continue  # 空行、註解或無法解析的行
+
+        if match.group('single') is not None:
+            value = _SINGLE_QUOTE_ESCAPES.sub(lambda m: m.group()[-1], match.group('single'))
+        elif match.group('double') is not None:
+            value = _DOUBLE_QUOTE_ESCAPES.sub(
+                lambda m: codecs.decode(m.group(), 'unicode-escape'), match.group('double'))
+        else:
+            value = _INLINE_COMMENT.sub('', match.group('bare')).rstrip()
+
+        # 變數展開：先找檔案中較早定義的值，再找環境變數，最後用預設值
+        env = {**os.environ, **config}
+        config[match.group('key')] = _POSIX_VARIABLE.sub(
+            lambda m: env.get(m.group('name'), m.group('default')) or '', value)
+    return config
@@ -0,0 +1,21 @@
+"""
+Numba JIT 相容層
+
+numba 為可選依賴（pyproject 的 performance extra，requirements.txt 亦列出）。有 numba 時 njit 照常編譯；
+沒有時退化為原樣回傳函數，數值核心以純 Python 執行，結果相同只是較慢。
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - 依環境而定
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba.njit 的替身：支援 @njit 與 @njit(...) 兩種寫法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+__all__ = ['njit', 'NUMBA_AVAILABLE']
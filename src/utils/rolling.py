@@ -0,0 +1,165 @@
+"""
+增量滾動視窗
+
+逐根呼叫的策略每次都拿到「截至當根」的整段序列，但相鄰兩次呼叫之間通常只多了一根新 K 線。
+IncrementalRolling 以最後一根的 key（timestamp）判斷這件事：剛好多一根就 O(1) 滑動視窗
+（running sum + 單調佇列維護區間極值），否則（首次、跳根、資料回補）整窗重建。
+"""
+
+from collections import deque
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def frame_keys(df: pd.DataFrame) -> np.ndarray:
+    """取 OHLCV 每根的識別：有 timestamp 欄位用欄位，否則用 index"""
+    if 'timestamp' in df.columns:
+        return df['timestamp'].to_numpy()
+    return df.index.to_numpy()
+
+
+class IncrementalRolling:
+    """固定長度滾動視窗的 mean / max / min 增量維護
+
+    Example:
+        >>> vol_ma = IncrementalRolling(20)
+        >>> vol_ma.update(df['timestamp'].to_numpy(), df['volume'].to_numpy())
+        >>> vol_ma.mean
+    """
+
+    # 每滑動這麼多次就以視窗內容重算一次總和，避免浮點累加誤差漂移
+    RESUM_INTERVAL = 256
+
+    def __init__(self, window: int):
+        """初始化
+
+        Args:
+            window: 視窗長度（根數）
+        """
+        self.window = window
+        self._last_key: Optional[Any] = None
+        self._values: deque = deque()
+        self._sum = 0.0  # 只累加有限值，NaN/inf 不會污染滑出後的總和
+        self._nonfinite = 0  # 視窗內 NaN/inf 的個數
+        self._max_q: deque = deque()  # (位置, 值)，值遞減
+        self._min_q: deque = deque()  # (位置, 值)，值遞增
+        self._pos = 0
+        self._since_resum = 0
+
+    def update(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """以截至當根的整段序列更新視窗
+
+        Args:
+            keys: 每根的識別（通常是 timestamp），與 values 等長
+            values: 數值序列
+        """
+        n = len(values)
+        if n == 0:
+            self.reset()
+            return
+
+        last_key = keys[-1]
+        if self._last_key is not None:
+            # 同一根且值未變（實盤未收盤 K 線的值可能更新，變了就重建）
+            if last_key == self._last_key and values[-1] == self._values[-1]:
+                return
+            # 剛好多一根：滑動視窗
+            if self.is_full and n > self.window and keys[-2] == self._last_key:
+                self._push(float(values[-1]))
+                self._last_key = last_key
+                return
+
+        self._rebuild(values[-self.window:])
+        self._last_key = last_key
+
+    def reset(self) -> None:
+        """清空狀態（下次 update 整窗重建）"""
+        self._last_key = None
+        self._values.clear()
+        self._max_q.clear()
+        self._min_q.clear()
+        self._sum = 0.0
+        self._nonfinite = 0
+        self._pos = 0
+        self._since_resum = 0
+
+    @property
+    def is_full(self) -> bool:
+        """視窗是否已滿（未滿時 mean 對應 pandas rolling 的 NaN）"""
+        return len(self._values) == self.window
+
+    @property
+    def mean(self) -> float:
+        """視窗均值；未滿回傳 NaN"""
+        if not self.is_full:
+            return float('nan')
+        if self._nonfinite:
+            # 視窗內有 NaN/inf 時直接計算，結果與 pandas rolling 相同（NaN 或 ±inf）
+            return float(np.mean(self._values))
+        return self._sum / self.window
+
+    @property
+    def max(self) -> float:
+        """視窗最大值；空視窗或含 NaN 時回傳 NaN"""
+        if self._nonfinite:
+            return float(np.max(self._values))
+        return self._max_q[0][1] if self._max_q else float('nan')
+
+    @property
+    def min(self) -> float:
+        """視窗最小值；空視窗或含 NaN 時回傳 NaN"""
+        if self._nonfinite:
+            return float(np.min(self._values))
+        return self._min_q[0][1] if self._min_q else float('nan')
+
+    def _rebuild(self, tail: np.ndarray) -> None:
+        self.reset()
+        for value in tail:
+            self._push(float(value))
+        self._resum()
+
+    def _resum(self) -> None:
+        self._sum = float(sum(v for v in self._values if np.isfinite(v)))
+        self._since_resum = 0
+
+    def _push(self, value: float) -> None:
+        self._values.append(value)
+        if np.isfinite(value):
+            self._sum += value
+        else:
+            self._nonfinite += 1
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            if np.isfinite(old):
+                self._sum -= old
+            else:
+                self._nonfinite -= 1
+
+        pos = self._pos
+        self._pos += 1
+        oldest = pos - self.window
+        if value != value:
+            # NaN 不進單調佇列（無法比較大小）；仍要讓滑出視窗的極值出隊
+            for q in (self._max_q, self._min_q):
+                if q and q[0][0] <= oldest:
+                    q.popleft()
+            self._tick_resum()
+            return
+        while self._max_q and self._max_q[-1][1] <= value:
+            self._max_q.pop()
+        self._max_q.append((pos, value))
+        while self._min_q and self._min_q[-1][1] >= value:
+            self._min_q.pop()
+        self._min_q.append((pos, value))
+        if self._max_q[0][0] <= oldest:
+            self._max_q.popleft()
+        if self._min_q[0][0] <= oldest:
+            self._min_q.popleft()
+        self._tick_resum()
+
+    def _tick_resum(self) -> None:
+        self._since_resum += 1
+        if self._since_resum >= self.RESUM_INTERVAL:
+            self._resum()
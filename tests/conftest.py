@@ -0,0 +1,25 @@
+"""
+測試共用配置
+
+Hypothesis 設定檔（以環境變數 HYPOTHESIS_PROFILE 或 --hypothesis-profile 選擇）：
+- default：沿用 Hypothesis 預設（每個屬性 100 個範例，範例存於 .hypothesis/ 資料庫）
+- dev：每個屬性 10 個範例，開發時快速迭代
+- ci：每個屬性 50 個範例，且不使用範例資料庫，
+  pytest-xdist 多個 worker 不爭用同一個 .hypothesis/ 目錄
+- nightly：每個屬性 100 個範例（完整覆蓋）
+
+平行執行屬性測試：pytest -n auto --hypothesis-profile=ci tests/property/
+"""
+
+import os
+
+from hypothesis import settings
+
+
+settings.register_profile("dev", max_examples=10, deadline=None)
+settings.register_profile("ci", max_examples=50, database=None, deadline=None)
+settings.register_profile("nightly", max_examples=100, deadline=None)
+
+# 各屬性測試的 @settings 不指定 max_examples，範例數一律由這裡載入的設定檔決定；
+# --hypothesis-profile 由 Hypothesis 外掛在之後載入，優先於環境變數
+settings.load_profile(os.environ.get("HYPOTHESIS_PROFILE", "default"))
@@ -0,0 +1,31 @@
+"""
+測試共用的策略配置
+"""
+
+from typing import Sequence
+
+from src.models.config import StrategyConfig, RiskManagement, ExitConditions
+
+
+def backtest_config(strategy_id: str = "test-strategy", timeframes: Sequence[str] = ("1h",), *,
+                    position_size: float = 0.2, leverage: int = 1, take_profit_atr: float = 3.0,
+                    **params) -> StrategyConfig:
+    """回測用策略配置：不限每日交易次數、連續虧損與日虧損，只由策略參數決定進出場
+
+    Args:
+        strategy_id: 策略 ID（同時作為名稱）
+        timeframes: 使用的週期
+        position_size: 倉位比例
+        leverage: 槓桿
+        take_profit_atr: 止盈 ATR 倍數
+        **params: 策略參數
+
+    Returns:
+        StrategyConfig: 策略配置
+    """
+    return StrategyConfig(
+        strategy_id=strategy_id, strategy_name=strategy_id, version="1.0.0", enabled=True,
+        symbol="BTCUSDT", timeframes=list(timeframes), parameters=params,
+        risk_management=RiskManagement(position_size=position_size, leverage=leverage, max_trades_per_day=999,
+            max_consecutive_losses=999, daily_loss_limit=0.99, stop_loss_atr=1.5, take_profit_atr=take_profit_atr),
+        entry_conditions=[], exit_conditions=ExitConditions(stop_loss="", take_profit=""))
@@ -0,0 +1,87 @@
+"""
+測試共用的 OHLCV 數據生成
+
+- draw_ohlcv：由 @st.composite 策略在內部呼叫，把 draw 傳進來逐根抽樣
+- random_walk_ohlcv：固定種子的隨機漫步，單元測試的回測數據
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from hypothesis import strategies as st
+
+
+def draw_ohlcv(draw, n_rows: int, base_price: float, timestamps, *,
+               max_move: float = 0.05,
+               volume_range: Tuple[float, float] = (0, 1000000),
+               random_walk: bool = False) -> pd.DataFrame:
+    """抽樣一段 OHLCV（保證 low <= open/close <= high）
+
+    Args:
+        draw: @st.composite 傳入的 draw
+        n_rows: K 線根數
+        base_price: 起始價格
+        timestamps: 與 n_rows 等長的時間戳
+        max_move: 每根 low 低於基準價、high 高於 low 的最大比例
+        volume_range: 成交量範圍
+        random_walk: True 時以前一根收盤作為下一根的基準價
+
+    Returns:
+        pd.DataFrame: timestamp、open、high、low、close、volume
+    """
+    # 各欄位預先配置陣列逐根填入（random_walk 時價格依前一根收盤遞推，抽樣仍需逐根）
+    opens = np.empty(n_rows)
+    highs = np.empty(n_rows)
+    lows = np.empty(n_rows)
+    closes = np.empty(n_rows)
+
+    for i in range(n_rows):
+        low = base_price * draw(st.floats(min_value=1.0 - max_move, max_value=1.0))
+        high = low * draw(st.floats(min_value=1.0, max_value=1.0 + max_move))
+        opens[i] = draw(st.floats(min_value=low, max_value=high))
+        closes[i] = draw(st.floats(min_value=low, max_value=high))
+        highs[i] = high
+        lows[i] = low
+
+        if random_walk:
+            base_price = closes[i]
+
+    # 成交量與價格無關，直接串流進預定大小的陣列
+    volumes = np.fromiter(
+        (draw(st.floats(min_value=volume_range[0], max_value=volume_range[1])) for _ in range(n_rows)),
+        dtype=np.float64, count=n_rows,
+    )
+
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'open': opens,
+        'high': highs,
+        'low': lows,
+        'close': closes,
+        'volume': volumes,
+    })
+
+
+def random_walk_ohlcv(n: int = 300, seed: int = 7, freq: str = 'h') -> pd.DataFrame:
+    """固定種子的隨機漫步 OHLCV（起點 30000，收盤每根 N(0, 150) 漫步，開盤為前一根收盤）
+
+    Args:
+        n: K 線根數
+        seed: 亂數種子
+        freq: timestamp 間隔（自 2024-01-01 起）
+
+    Returns:
+        pd.DataFrame: timestamp、open、high、low、close、volume
+    """
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 150, n))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq=freq),
+        'open': open_,
+        'high': np.maximum(open_, close) + rng.uniform(0, 200, n),
+        'low': np.minimum(open_, close) - rng.uniform(0, 200, n),
+        'close': close,
+        'volume': rng.uniform(50, 300, n),
+    })
@@ -0,0 +1,259 @@
+"""
+集成測試共用工具
+
+市場數據 market_data_{symbol}_{tf}.csv 第一次讀取後轉存為同名 Parquet（需 pyarrow），
+之後直接讀欄式、已帶型別的 Parquet，免去每次解析 CSV 與字串轉時間。
+
+market_data、strategy_manager、backtest_engine 為 session 級 fixture，整個 pytest 執行只建立一次；
+回測結果以 (策略 ID, 配置, 數據內容, 視窗, 引擎參數) 的雜湊為鍵快取在 session 暫存目錄，
+輸入相同的測試直接沿用前一次的 BacktestResult。
+market_data 以唯讀映射提供，測試不得就地修改其中的 DataFrame。
+以 pytest-xdist 平行（-n auto --dist=loadgroup）時，每個 worker 各載入一次。
+"""
+
+import hashlib
+import json
+import pickle
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterator, Optional, Tuple
+
+import pandas as pd
+import pytest
+
+from src.execution.backtest_engine import BacktestEngine
+from src.managers.strategy_manager import StrategyManager
+from src.models.market_data import MarketData, TimeframeData
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:  # pyarrow 為可選依賴，沒有就只讀 CSV
+    PYARROW_AVAILABLE = False
+
+
+SYMBOLS = ['ETHUSDT', 'BTCUSDT']
+TIMEFRAMES = ['15m', '1h', '4h', '1d']
+
+
+def _load_ohlcv(symbol: str, tf: str, data_dir: str = '.') -> Optional[pd.DataFrame]:
+    """讀取單一標的、單一週期的 OHLCV
+
+    優先讀不舊於 CSV 的 Parquet；否則讀 CSV（有 pyarrow 時用其多執行緒解析器，
+    parse_dates 直接解析 timestamp）並轉存 Parquet 供下次使用。兩者都不存在時回傳 None。
+    """
+    csv_path = Path(data_dir) / f"market_data_{symbol}_{tf}.csv"
+    parquet_path = Path(data_dir) / f"market_data_{symbol}_{tf}.parquet"
+
+    if PYARROW_AVAILABLE and parquet_path.exists() and (
+            not csv_path.exists() or parquet_path.stat().st_mtime >= csv_path.stat().st_mtime):
+        return pd.read_parquet(parquet_path, engine='pyarrow')
+
+    if not csv_path.exists():
+        return None
+
+    if not PYARROW_AVAILABLE:
+        return pd.read_csv(csv_path, parse_dates=['timestamp'])
+
+    # pyarrow 引擎以多執行緒切分解析 CSV；欄位仍為 numpy dtype，與讀 Parquet 的結果一致
+    df = pd.read_csv(csv_path, engine='pyarrow', parse_dates=['timestamp'])
+    try:
+        df.to_parquet(parquet_path, engine='pyarrow', compression='snappy', index=False)
+    except OSError:
+        pass  # 唯讀目錄：下次仍讀 CSV
+    return df
+
+
+def load_market_data(symbols=SYMBOLS, timeframes=TIMEFRAMES) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """載入市場數據：標的 -> 週期 -> DataFrame（缺檔的週期略過）"""
+    data = {}
+    for symbol in symbols:
+        data[symbol] = {}
+        for tf in timeframes:
+            df = _load_ohlcv(symbol, tf)
+            if df is not None:
+                data[symbol][tf] = df
+    return data
+
+
+# 與 BacktestEngine._build_market_data 的歷史視窗一致：起點前保留這麼多根供指標暖機
+HISTORY_WINDOW = 300
+
+
+def _clip(data, start, end, lookback: int = HISTORY_WINDOW) -> Dict[str, pd.DataFrame]:
+    """把各週期 DataFrame 裁到回測視窗（起點前多留 lookback 根歷史）
+    
+    timestamp 已排序，以 searchsorted 二分求邊界，iloc 切片不複製數據。
+    逐根的歷史視窗與傳入完整數據時相同，但 prepare() 的批次 EMA／Wilder 遞迴
+    從傳入數據的第一根起算，種子不同，結果可能與完整數據回測有細微差異；
+    要比較的回測須使用相同的裁切（快取鍵已含裁切後的數據）。
+    """
+    clipped = {}
+    for tf, df in data.items():
+        lo = df['timestamp'].searchsorted(start, side='left')
+        hi = df['timestamp'].searchsorted(end, side='right')
+        clipped[tf] = df.iloc[max(lo - lookback, 0):hi]
+    return clipped
+
+
+def _end_date(df: pd.DataFrame) -> pd.Timestamp:
+    """數據最後一根的時間戳（timestamp 是欄位而非索引，不可用 df.index[-1]）"""
+    return df['timestamp'].iloc[-1]
+
+
+def _iter_windows(df: pd.DataFrame, chunk_days: int = 90) -> Iterator[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """把 df 的時間範圍切成每段 chunk_days 天、互不重疊的 (起, 迄) 視窗
+    
+    起迄皆取自 df 的實際時間戳（迄為該段最後一根），可直接作為回測的
+    start_date / end_date。
+    """
+    timestamps = df['timestamp']
+    step = pd.Timedelta(days=chunk_days)
+    i = 0
+    while i < len(timestamps):
+        hi = timestamps.searchsorted(timestamps.iloc[i] + step, side='left')
+        yield timestamps.iloc[i], timestamps.iloc[hi - 1]
+        i = hi
+
+
+def _latest_market_data(symbol: str, data: Dict[str, pd.DataFrame], bars: int = 100) -> MarketData:
+    """以各週期最近 bars 根建立 MarketData（iloc 切片不複製數據）"""
+    return MarketData(
+        symbol=symbol,
+        timestamp=datetime.now(),
+        timeframes={
+            tf: TimeframeData(timeframe=tf, ohlcv=df.iloc[-bars:], indicators={})
+            for tf, df in data.items() if len(df) > 0
+        }
+    )
+
+
+def market_data_fingerprint(market_data) -> FrozenSet[Tuple[str, FrozenSet[str]]]:
+    """市場數據的可雜湊摘要：{(標的, {週期})}（無數據的標的略過）"""
+    return frozenset(
+        (symbol, frozenset(frames))
+        for symbol, frames in market_data.items() if frames
+    )
+
+
+@lru_cache(maxsize=None)
+def _select_eligible_strategies(mgr: StrategyManager,
+                                market_data_keys_fingerprint: FrozenSet[Tuple[str, FrozenSet[str]]],
+                                symbol: Optional[str] = None) -> Tuple[str, ...]:
+    """啟用且所需週期皆有市場數據的策略 ID（依載入順序；可只取某標的）
+    
+    以 (管理器, 數據摘要, 標的) 為鍵快取；session 內策略的啟用狀態不變。
+    測試取前 N 個即可：eligible[:1]、eligible[:3]。
+    """
+    if symbol is not None:
+        return tuple(
+            sid for sid in _select_eligible_strategies(mgr, market_data_keys_fingerprint)
+            if mgr.strategies[sid].config.symbol == symbol
+        )
+    
+    available = dict(market_data_keys_fingerprint)
+    eligible = []
+    for sid in mgr.load_strategies():
+        if not mgr.get_strategy_state(sid).enabled:
+            continue
+        config = mgr.strategies[sid].config
+        if frozenset(config.timeframes) <= available.get(config.symbol, frozenset()):
+            eligible.append(sid)
+    return tuple(eligible)
+
+
+def _backtest_key(engine, strategy, data: Dict[str, pd.DataFrame], start, end) -> str:
+    """回測輸入的內容雜湊：配置或任一週期數據變動都會換鍵"""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(strategy.config.strategy_id.encode())
+    h.update(json.dumps(strategy.config.to_dict(), sort_keys=True, default=str).encode())
+    for tf in sorted(data):
+        h.update(tf.encode())
+        h.update(pd.util.hash_pandas_object(data[tf], index=False).values.tobytes())
+    h.update(f"{start}|{end}".encode())
+    h.update(repr((engine.initial_capital, engine.commission, engine.slippage, engine.fill_timing)).encode())
+    return h.hexdigest()
+
+
+def _cached_run(engine, strategy, data: Dict[str, pd.DataFrame], start, end,
+                cache_dir: Path, refresh: bool = False):
+    """執行 engine.run_single_strategy，結果依輸入內容快取（pickle）
+    
+    回測用同配置的新策略實例：session 共用的實例帶有遞迴指標與滾動視窗狀態，
+    不在快取鍵內，新實例讓結果只取決於鍵中的輸入。
+    refresh=True 時一律重跑並覆寫快取（量測執行時間的測試用）。
+    """
+    path = Path(cache_dir) / f"{_backtest_key(engine, strategy, data, start, end)}.pkl"
+    if not refresh and path.exists():
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    
+    result = engine.run_single_strategy(
+        strategy=type(strategy)(strategy.config),
+        market_data=data,
+        start_date=start,
+        end_date=end
+    )
+    with open(path, 'wb') as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return result
+
+
+@pytest.fixture(scope="session")
+def backtest_cache_dir(tmp_path_factory):
+    """回測結果快取目錄（整個 session 共用）"""
+    path = tmp_path_factory.getbasetemp() / ".btcache"
+    path.mkdir(exist_ok=True)
+    return path
+
+
+@pytest.fixture(scope="session")
+def market_data():
+    """真實市場數據（整個 session 共用，唯讀）：標的 -> 週期 -> DataFrame"""
+    return MappingProxyType({
+        symbol: MappingProxyType(frames)
+        for symbol, frames in load_market_data().items()
+    })
+
+
+@pytest.fixture(scope="session")
+def market_data_keys(market_data):
+    """market_data 的 {(標的, {週期})} 摘要（session 內只建一次）"""
+    return market_data_fingerprint(market_data)
+
+
+@pytest.fixture(scope="session")
+def strategy_manager():
+    """策略管理器（整個 session 共用；load_strategies 可重複呼叫）"""
+    return StrategyManager(strategies_dir="strategies/")
+
+
+@pytest.fixture(scope="session")
+def loaded_strategy_ids(strategy_manager):
+    """strategy_manager 載入的策略 ID（session 內只載入一次）"""
+    return tuple(strategy_manager.load_strategies())
+
+
+@pytest.fixture(scope="session")
+def backtest_engine():
+    """回測引擎（只保存資金、手續費等設定，回測之間不留狀態，整個 session 共用）"""
+    return BacktestEngine(
+        initial_capital=1000.0,
+        commission=0.0005
+    )
+
+
+@pytest.fixture(scope="session")
+def warm_strategies(strategy_manager, market_data, market_data_keys):
+    """對每個合格策略呼叫一次 generate_signal（session 內只做一次）
+    
+    numba 核心的編譯（或載入磁碟快取）只發生在首次呼叫，先暖機，
+    延遲量測就不會把編譯時間算進去。性能與回測測試以
+    @pytest.mark.usefixtures("warm_strategies") 指定，其他集成測試不需載入數據。
+    """
+    for sid in _select_eligible_strategies(strategy_manager, market_data_keys):
+        strategy = strategy_manager.strategies[sid]
+        symbol = strategy.config.symbol
+        strategy.generate_signal(_latest_market_data(symbol, market_data[symbol]))
@@ -5,48 +5,25 @@
 Requirements: 4.1, 4.4
 """
 
+import os
 import pytest
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from pathlib import Path
 import json
 
-from src.managers.strategy_manager import StrategyManager
+from tests.integration.conftest import _cached_run, _clip, _end_date, _select_eligible_strategies
 from src.managers.risk_manager import RiskManager
 from src.managers.data_manager import DataManager
-from src.execution.backtest_engine import BacktestEngine
+from src.execution.backtest_engine import _run_strategy_backtest
 from src.execution.multi_strategy_executor import MultiStrategyExecutor
 from src.models.config import StrategyConfig
 from src.models.risk import RiskConfig, GlobalRiskState
 
 
+@pytest.mark.usefixtures("warm_strategies")
 class TestEndToEndBacktest:
     """端到端回測測試"""
     
-    @pytest.fixture
-    def market_data(self):
-        """載入真實市場數據"""
-        data = {}
-        symbols = ['ETHUSDT', 'BTCUSDT']
-        timeframes = ['15m', '1h', '4h', '1d']
-        
-        for symbol in symbols:
-            data[symbol] = {}
-            for tf in timeframes:
-                file_path = f"market_data_{symbol}_{tf}.csv"
-                if Path(file_path).exists():
-                    df = pd.read_csv(file_path)
-                    df['timestamp'] = pd.to_datetime(df['timestamp'])
-                    # Keep timestamp as a column, not index
-                    data[symbol][tf] = df
-        
-        return data
-    
-    @pytest.fixture
-    def strategy_manager(self):
-        """創建策略管理器"""
-        return StrategyManager(strategies_dir="strategies/")
-    
     @pytest.fixture
     def risk_manager(self):
         """創建風險管理器"""
@@ -58,43 +35,19 @@ class TestEndToEndBacktest:
         )
         return RiskManager(config, initial_capital=1000.0)
     
-    @pytest.fixture
-    def backtest_engine(self):
-        """創建回測引擎"""
-        return BacktestEngine(
-            initial_capital=1000.0,
-            commission=0.0005
-        )
-    
-    def test_single_strategy_end_to_end(self, strategy_manager, backtest_engine, market_data):
+    def test_single_strategy_end_to_end(self, strategy_manager, loaded_strategy_ids, backtest_engine, market_data, market_data_keys, backtest_cache_dir):
         """測試單策略端到端回測流程"""
         # 載入策略
-        strategy_ids = strategy_manager.load_strategies()
+        strategy_ids = loaded_strategy_ids
         assert len(strategy_ids) > 0, "應該至少載入一個策略"
         
         # 選擇第一個啟用的策略，並確保有對應的市場數據
-        strategy_id = None
-        strategy = None
-        for sid in strategy_ids:
-            state = strategy_manager.get_strategy_state(sid)
-            if state.enabled:
-                temp_strategy = strategy_manager.strategies[sid]
-                config = temp_strategy.config
-                
-                # 檢查是否有該策略需要的市場數據
-                if config.symbol in market_data and market_data[config.symbol]:
-                    # 檢查是否有所需的時間週期
-                    available_tfs = set(market_data[config.symbol].keys())
-                    required_tfs = set(config.timeframes)
-                    
-                    if required_tfs.issubset(available_tfs):
-                        strategy_id = sid
-                        strategy = temp_strategy
-                        break
-        
-        if strategy_id is None or strategy is None:
+        eligible = _select_eligible_strategies(strategy_manager, market_data_keys)
+        if not eligible:
             pytest.skip("沒有找到有完整市場數據的啟用策略")
         
+        strategy_id = eligible[0]
+        strategy = strategy_manager.strategies[strategy_id]
         config = strategy.config
         
         # 設置回測時間範圍（最近30天）
@@ -102,15 +55,14 @@ class TestEndToEndBacktest:
         first_tf = list(symbol_data.keys())[0]
         df = symbol_data[first_tf]
         
-        end_date = df['timestamp'].iloc[-1]
+        end_date = _end_date(df)
         start_date = end_date - timedelta(days=30)
         
         # 執行回測
-        result = backtest_engine.run_single_strategy(
-            strategy=strategy,
-            market_data=symbol_data,  # Pass timeframe dict directly
-            start_date=start_date,
-            end_date=end_date
+        result = _cached_run(
+            backtest_engine, strategy,
+            _clip(symbol_data, start_date, end_date),  # 先裁到回測視窗
+            start_date, end_date, backtest_cache_dir
         )
         
         # 驗證回測結果
@@ -142,28 +94,17 @@ class TestEndToEndBacktest:
         print(f"  最大回撤: {result.max_drawdown_pct:.2f}%")
         print(f"  夏普比率: {result.sharpe_ratio:.2f}")
     
-    def test_multi_strategy_end_to_end(self, strategy_manager, backtest_engine, market_data):
+    def test_multi_strategy_end_to_end(self, strategy_manager, loaded_strategy_ids, backtest_engine, market_data, market_data_keys):
         """測試多策略端到端回測流程"""
         # 載入所有策略
-        strategy_ids = strategy_manager.load_strategies()
+        strategy_ids = loaded_strategy_ids
         assert len(strategy_ids) >= 2, "應該至少載入兩個策略用於多策略測試"
         
         # 選擇啟用的策略，並確保有對應的市場數據
-        enabled_strategies = []
-        for sid in strategy_ids:
-            state = strategy_manager.get_strategy_state(sid)
-            if state.enabled:
-                temp_strategy = strategy_manager.strategies[sid]
-                config = temp_strategy.config
-                
-                # 檢查是否有該策略需要的市場數據
-                if config.symbol in market_data and market_data[config.symbol]:
-                    # 檢查是否有所需的時間週期
-                    available_tfs = set(market_data[config.symbol].keys())
-                    required_tfs = set(config.timeframes)
-                    
-                    if required_tfs.issubset(available_tfs):
-                        enabled_strategies.append(temp_strategy)
+        enabled_strategies = [
+            strategy_manager.strategies[sid]
+            for sid in _select_eligible_strategies(strategy_manager, market_data_keys)
+        ]
         
         if len(enabled_strategies) < 2:
             pytest.skip("需要至少兩個有完整市場數據的啟用策略")
@@ -183,21 +124,21 @@ class TestEndToEndBacktest:
         first_tf = list(symbol_data.keys())[0]
         df = symbol_data[first_tf]
         
-        end_date = df['timestamp'].iloc[-1]
+        end_date = _end_date(df)
         start_date = end_date - timedelta(days=30)
         
-        # 為每個策略單獨執行回測
+        # 為每個策略單獨執行回測（互相獨立，分散到多個行程）
+        engine_args = (backtest_engine.initial_capital, backtest_engine.commission,
+                       backtest_engine.slippage, backtest_engine.fill_timing)
         strategy_results = {}
-        for strategy in test_strategies:
-            config = strategy.config
-            if config.symbol in market_data:
-                result = backtest_engine.run_single_strategy(
-                    strategy=strategy,
-                    market_data=market_data[config.symbol],
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                strategy_results[config.strategy_id] = result
+        with ProcessPoolExecutor(max_workers=min(len(test_strategies), os.cpu_count() or 1)) as ex:
+            futures = {
+                ex.submit(_run_strategy_backtest, engine_args, s,
+                          _clip(market_data[s.config.symbol], start_date, end_date), start_date, end_date): s.config.strategy_id
+                for s in test_strategies if s.config.symbol in market_data
+            }
+            for fut in as_completed(futures):
+                strategy_results[futures[fut]] = fut.result()
         
         # 驗證結果
         assert len(strategy_results) >= 2, "應該有至少兩個策略的結果"
@@ -221,59 +162,44 @@ class TestEndToEndBacktest:
         for sid, strat_result in strategy_results.items():
             print(f"  {sid}: {strat_result.total_pnl:.2f} ({strat_result.total_trades} 交易)")
     
-    def test_backtest_with_all_components(self, strategy_manager, risk_manager, backtest_engine, market_data):
+    def test_backtest_with_all_components(self, strategy_manager, loaded_strategy_ids, risk_manager, backtest_engine, market_data, market_data_keys, backtest_cache_dir):
         """測試包含所有組件的完整回測流程"""
         # 載入策略
-        strategy_ids = strategy_manager.load_strategies()
+        strategy_ids = loaded_strategy_ids
         assert len(strategy_ids) > 0, "應該載入策略"
         
-        # 選擇一個策略
-        strategy_id = None
-        for sid in strategy_ids:
-            state = strategy_manager.get_strategy_state(sid)
-            if state.enabled:
-                strategy_id = sid
-                break
-        
-        if strategy_id is None:
-            pytest.skip("沒有啟用的策略")
+        # 選擇一個有市場數據的啟用策略
+        eligible = _select_eligible_strategies(strategy_manager, market_data_keys)
+        if not eligible:
+            pytest.skip("沒有找到有完整市場數據的啟用策略")
         
+        strategy_id = eligible[0]
         strategy = strategy_manager.strategies[strategy_id]
         config = strategy.config
         
-        # 確保有市場數據
-        if config.symbol not in market_data or not market_data[config.symbol]:
-            pytest.skip(f"沒有 {config.symbol} 的市場數據")
-        
         # 設置時間範圍
         symbol_data = market_data[config.symbol]
         first_tf = list(symbol_data.keys())[0]
         df = symbol_data[first_tf]
         
-        end_date = df['timestamp'].iloc[-1]
+        end_date = _end_date(df)
         start_date = end_date - timedelta(days=30)
 
         # 執行回測（包含風險管理）
-        result = backtest_engine.run_single_strategy(
-            strategy=strategy,
-            market_data=symbol_data,
-            start_date=start_date,
-            end_date=end_date
+        result = _cached_run(
+            backtest_engine, strategy,
+            _clip(symbol_data, start_date, end_date),
+            start_date, end_date, backtest_cache_dir
         )
         
-        # 驗證風險管理器可以處理回測結果
-        for trade in result.trades:
-            # 更新風險狀態
-            risk_manager.update_risk_state(trade)
-            
-            # 檢查風險限制
-            should_halt, reason = risk_manager.should_halt_trading()
-            # 在回測中，我們只是記錄，不實際暫停
+        # 驗證風險管理器可以處理回測結果（批次更新風險狀態並檢查風險限制；
+        # 在回測中，我們只是記錄，不實際暫停）
+        should_halt, reason = risk_manager.update_batch(result.trades)
         
         # 驗證風險狀態已更新（GlobalRiskState 實際欄位：current_capital / risk_events 等，
         # 無 total_trades / current_drawdown）
         global_state = risk_manager.global_state
-        assert isinstance(global_state.risk_events, list), "風險事件應可查詢"
+        assert isinstance(risk_manager.get_risk_events(), list), "風險事件應可查詢"
         assert global_state.current_capital is not None, "風險狀態的當前資金應該被追蹤"
 
         print(f"\n完整組件回測完成:")
@@ -282,10 +208,10 @@ class TestEndToEndBacktest:
         print(f"  風險管理器當前資金: {global_state.current_capital:.2f}")
         print(f"  今日損益: {global_state.daily_pnl:.2f}")
     
-    def test_backtest_result_persistence(self, strategy_manager, backtest_engine, market_data, tmp_path):
+    def test_backtest_result_persistence(self, strategy_manager, loaded_strategy_ids, backtest_engine, market_data, backtest_cache_dir, tmp_path):
         """測試回測結果的持久化和載入"""
         # 載入策略
-        strategy_ids = strategy_manager.load_strategies()
+        strategy_ids = loaded_strategy_ids
         if not strategy_ids:
             pytest.skip("沒有可用的策略")
         
@@ -302,14 +228,13 @@ class TestEndToEndBacktest:
         first_tf = list(symbol_data.keys())[0]
         df = symbol_data[first_tf]
         
-        end_date = df['timestamp'].iloc[-1]
+        end_date = _end_date(df)
         start_date = end_date - timedelta(days=30)
 
-        result = backtest_engine.run_single_strategy(
-            strategy=strategy,
-            market_data=symbol_data,
-            start_date=start_date,
-            end_date=end_date
+        result = _cached_run(
+            backtest_engine, strategy,
+            _clip(symbol_data, start_date, end_date),
+            start_date, end_date, backtest_cache_dir
         )
         
         # 保存結果
@@ -5,76 +5,64 @@
 Requirements: 4.1
 """
 
+import gc
+import math
+import os
 import pytest
-import pandas as pd
 import time
-from datetime import datetime, timedelta
-from pathlib import Path
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
 
-from src.managers.strategy_manager import StrategyManager
-from src.execution.backtest_engine import BacktestEngine
-from src.models.market_data import MarketData, TimeframeData
+from tests.integration.conftest import (
+    SYMBOLS, _clip, _end_date, _iter_windows, _latest_market_data, _select_eligible_strategies,
+)
+from src.execution.backtest_engine import BacktestEngine, _run_strategy_backtest
+from src.utils.jit import NUMBA_AVAILABLE
 
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:  # psutil 為可選依賴，沒有就只看 tracemalloc
+    PSUTIL_AVAILABLE = False
 
+
+# 各測試互不共享狀態：依標的拆成 (測試 × 標的) 格，
+# `pytest -n auto --dist=loadgroup` 時同一標的的格在同一 worker 上執行
+per_symbol = pytest.mark.parametrize("symbol", [
+    pytest.param(symbol, marks=pytest.mark.xdist_group(name=f"perf-{symbol}"))
+    for symbol in SYMBOLS
+])
+
+# 大規模回測的分段長度（天）
+CHUNK_DAYS = 90
+
+# 信號生成平均延遲上限（ms）：指標核心經 numba 編譯時 100ms；
+# 未安裝 numba 時核心以純 Python 執行，沿用原本的 1000ms
+SIGNAL_LATENCY_BUDGET_MS = 100 if NUMBA_AVAILABLE else 1000
+
+# 全量單策略回測允許的 Python 配置峰值
+MAX_BACKTEST_PEAK_BYTES = 500 * 1024 ** 2
+
+
+def _eligible_strategy(strategy_manager, market_data_keys, symbol):
+    """取該標的第一個有完整市場數據的啟用策略（沒有則跳過測試）"""
+    eligible = _select_eligible_strategies(strategy_manager, market_data_keys, symbol)
+    if not eligible:
+        pytest.skip(f"沒有找到 {symbol} 有完整市場數據的策略")
+    return strategy_manager.strategies[eligible[0]]
+
+
+@pytest.mark.usefixtures("warm_strategies")
 class TestPerformance:
     """性能測試"""
     
-    @pytest.fixture
-    def market_data(self):
-        """載入真實市場數據"""
-        data = {}
-        symbols = ['ETHUSDT', 'BTCUSDT']
-        timeframes = ['15m', '1h', '4h', '1d']
-        
-        for symbol in symbols:
-            data[symbol] = {}
-            for tf in timeframes:
-                file_path = f"market_data_{symbol}_{tf}.csv"
-                if Path(file_path).exists():
-                    df = pd.read_csv(file_path)
-                    df['timestamp'] = pd.to_datetime(df['timestamp'])
-                    data[symbol][tf] = df
-        
-        return data
-    
-    @pytest.fixture
-    def strategy_manager(self):
-        """創建策略管理器"""
-        return StrategyManager(strategies_dir="strategies/")
-    
-    @pytest.fixture
-    def backtest_engine(self):
-        """創建回測引擎"""
-        return BacktestEngine(
-            initial_capital=1000.0,
-            commission=0.0005
-        )
-    
-    def test_large_scale_backtest_performance(self, strategy_manager, backtest_engine, market_data):
+    @per_symbol
+    def test_large_scale_backtest_performance(self, strategy_manager, backtest_engine, market_data, market_data_keys, symbol):
         """測試大規模數據回測性能"""
-        # 載入策略
-        strategy_ids = strategy_manager.load_strategies()
-        if not strategy_ids:
-            pytest.skip("沒有可用的策略")
-        
-        # 選擇一個有完整數據的策略
-        strategy = None
-        for sid in strategy_ids:
-            state = strategy_manager.get_strategy_state(sid)
-            if state.enabled:
-                temp_strategy = strategy_manager.strategies[sid]
-                config = temp_strategy.config
-                
-                if config.symbol in market_data and market_data[config.symbol]:
-                    available_tfs = set(market_data[config.symbol].keys())
-                    required_tfs = set(config.timeframes)
-                    
-                    if required_tfs.issubset(available_tfs):
-                        strategy = temp_strategy
-                        break
-        
-        if strategy is None:
-            pytest.skip("沒有找到有完整市場數據的策略")
+        # 選擇該標的有完整市場數據的啟用策略
+        strategy = _eligible_strategy(strategy_manager, market_data_keys, symbol)
         
         config = strategy.config
         symbol_data = market_data[config.symbol]
@@ -84,20 +72,32 @@ class TestPerformance:
         df = symbol_data[first_tf]
         
         start_date = df['timestamp'].iloc[0]
-        end_date = df['timestamp'].iloc[-1]
+        end_date = _end_date(df)
         
         # 計算數據點數量
         data_points = len(df)
         time_span_days = (end_date - start_date).days
         
-        # 執行回測並測量時間
+        # 分段回測並測量時間：每段只切該段（含暖機歷史）的數據，
+        # 資金與交易數逐段帶入下一段（段末持倉以「回測結束」平倉）
+        engine_state = {'capital': backtest_engine.initial_capital, 'trades': 0, 'chunks': 0}
         start_time = time.time()
-        result = backtest_engine.run_single_strategy(
-            strategy=strategy,
-            market_data=symbol_data,
-            start_date=start_date,
-            end_date=end_date
-        )
+        for chunk_start, chunk_end in _iter_windows(df, chunk_days=CHUNK_DAYS):
+            engine = BacktestEngine(
+                initial_capital=engine_state['capital'],
+                commission=backtest_engine.commission,
+                slippage=backtest_engine.slippage,
+                fill_timing=backtest_engine.fill_timing
+            )
+            chunk = engine.run_single_strategy(
+                strategy=strategy,
+                market_data=_clip(symbol_data, chunk_start, chunk_end),
+                start_date=chunk_start,
+                end_date=chunk_end
+            )
+            engine_state['capital'] = chunk.final_capital
+            engine_state['trades'] += chunk.total_trades
+            engine_state['chunks'] += 1
         end_time = time.time()
         
         execution_time = end_time - start_time
@@ -112,104 +112,65 @@ class TestPerformance:
         print(f"  時間跨度: {time_span_days} 天")
         print(f"  執行時間: {execution_time:.2f} 秒")
         print(f"  處理速度: {points_per_second:.2f} 點/秒")
-        print(f"  總交易: {result.total_trades}")
+        print(f"  分段: {engine_state['chunks']} 段（每段 {CHUNK_DAYS} 天）")
+        print(f"  總交易: {engine_state['trades']}")
+        print(f"  最終資金: {engine_state['capital']:.2f}")
         
         # 性能斷言（寬鬆的標準，確保測試不會因為機器性能而失敗）
         assert execution_time < 60, f"回測時間不應超過60秒，實際: {execution_time:.2f}秒"
         assert points_per_second > 10, f"處理速度應該至少10點/秒，實際: {points_per_second:.2f}點/秒"
     
-    def test_signal_generation_latency(self, strategy_manager, market_data):
+    @per_symbol
+    def test_signal_generation_latency(self, strategy_manager, market_data, market_data_keys, symbol):
         """測試實時信號生成延遲"""
-        # 載入策略
-        strategy_ids = strategy_manager.load_strategies()
-        if not strategy_ids:
-            pytest.skip("沒有可用的策略")
-        
-        # 選擇一個策略
-        strategy = None
-        for sid in strategy_ids:
-            state = strategy_manager.get_strategy_state(sid)
-            if state.enabled:
-                temp_strategy = strategy_manager.strategies[sid]
-                config = temp_strategy.config
-                
-                if config.symbol in market_data and market_data[config.symbol]:
-                    available_tfs = set(market_data[config.symbol].keys())
-                    required_tfs = set(config.timeframes)
-                    
-                    if required_tfs.issubset(available_tfs):
-                        strategy = temp_strategy
-                        break
-        
-        if strategy is None:
-            pytest.skip("沒有找到有完整市場數據的策略")
+        # 選擇該標的有完整市場數據的啟用策略
+        strategy = _eligible_strategy(strategy_manager, market_data_keys, symbol)
         
         config = strategy.config
         symbol_data = market_data[config.symbol]
         
-        # 構建 MarketData 對象
-        timeframe_data = {}
-        for tf, df in symbol_data.items():
-            if len(df) > 0:
-                # 使用最新的數據點
-                latest_row = df.iloc[-1]
-                timeframe_data[tf] = TimeframeData(
-                    timeframe=tf,
-                    ohlcv=df.tail(100),  # 最近100個數據點
-                    indicators={}
-                )
-        
-        market_data_obj = MarketData(
-            symbol=config.symbol,
-            timestamp=datetime.now(),
-            timeframes=timeframe_data
-        )
+        # 構建 MarketData 對象（最近100個數據點，見 conftest._latest_market_data）
+        market_data_obj = _latest_market_data(config.symbol, symbol_data)
         
-        # 測量信號生成時間（多次測量取平均）
+        # 測量信號生成時間：先暖機一次（首呼叫含快取建立），再以 perf_counter_ns 逐次計時；
+        # 量測期間停用 GC，避免回收暫停混入個別樣本
         num_iterations = 10
-        total_time = 0
+        timings_ns = array('q', [0] * (num_iterations + 1))
         
-        for _ in range(num_iterations):
-            start_time = time.time()
-            signal = strategy.generate_signal(market_data_obj)
-            end_time = time.time()
-            total_time += (end_time - start_time)
-        
-        avg_latency = (total_time / num_iterations) * 1000  # 轉換為毫秒
+        gc.collect()
+        gc.disable()
+        try:
+            for i in range(num_iterations + 1):
+                start_ns = time.perf_counter_ns()
+                signal = strategy.generate_signal(market_data_obj)
+                timings_ns[i] = time.perf_counter_ns() - start_ns
+        finally:
+            gc.enable()
+        
+        warmup_ms = timings_ns[0] / 1e6
+        timings_ns = sorted(timings_ns[1:])
+        avg_latency = sum(timings_ns) / num_iterations / 1e6  # 轉換為毫秒
+        p50_latency = timings_ns[num_iterations // 2] / 1e6
+        p95_latency = timings_ns[math.ceil(num_iterations * 0.95) - 1] / 1e6
         
         print(f"\n信號生成延遲測試:")
         print(f"  策略: {config.strategy_id}")
-        print(f"  測試次數: {num_iterations}")
-        print(f"  平均延遲: {avg_latency:.2f} ms")
-        print(f"  總時間: {total_time*1000:.2f} ms")
+        print(f"  測試次數: {num_iterations}（另暖機 1 次: {warmup_ms:.3f} ms）")
+        print(f"  平均延遲: {avg_latency:.3f} ms")
+        print(f"  p50 延遲: {p50_latency:.3f} ms")
+        print(f"  p95 延遲: {p95_latency:.3f} ms")
         
         # 性能斷言
-        # 目標：信號生成應該在100ms內完成
-        assert avg_latency < 1000, f"信號生成延遲應該小於1000ms，實際: {avg_latency:.2f}ms"
+        # 目標：信號生成應該在預算內完成（有 numba 時 JIT 已於 session 開始時暖機）
+        assert avg_latency < SIGNAL_LATENCY_BUDGET_MS, \
+            f"信號生成延遲應該小於{SIGNAL_LATENCY_BUDGET_MS}ms，實際: {avg_latency:.2f}ms"
     
-    def test_multi_strategy_backtest_performance(self, strategy_manager, backtest_engine, market_data):
+    @pytest.mark.xdist_group(name="perf")
+    def test_multi_strategy_backtest_performance(self, strategy_manager, backtest_engine, market_data, market_data_keys):
         """測試多策略回測性能"""
-        # 載入策略
-        strategy_ids = strategy_manager.load_strategies()
-        if len(strategy_ids) < 2:
-            pytest.skip("需要至少兩個策略")
-        
-        # 選擇多個策略
-        strategies = []
-        for sid in strategy_ids:
-            state = strategy_manager.get_strategy_state(sid)
-            if state.enabled:
-                temp_strategy = strategy_manager.strategies[sid]
-                config = temp_strategy.config
-                
-                if config.symbol in market_data and market_data[config.symbol]:
-                    available_tfs = set(market_data[config.symbol].keys())
-                    required_tfs = set(config.timeframes)
-                    
-                    if required_tfs.issubset(available_tfs):
-                        strategies.append(temp_strategy)
-                        if len(strategies) >= 3:  # 最多測試3個策略
-                            break
+        # 選擇多個策略（最多測試3個）
+        eligible = _select_eligible_strategies(strategy_manager, market_data_keys)
+        strategies = [strategy_manager.strategies[sid] for sid in eligible[:3]]
         
         if len(strategies) < 2:
             pytest.skip("沒有足夠的策略進行多策略測試")
@@ -220,23 +181,23 @@ class TestPerformance:
         first_tf = list(symbol_data.keys())[0]
         df = symbol_data[first_tf]
         
-        end_date = df['timestamp'].iloc[-1]
+        end_date = _end_date(df)
         start_date = end_date - timedelta(days=30)
         
-        # 執行多策略回測並測量時間
+        # 執行多策略回測並測量時間（各策略互相獨立，分散到多個行程）
         start_time = time.time()
         
+        engine_args = (backtest_engine.initial_capital, backtest_engine.commission,
+                       backtest_engine.slippage, backtest_engine.fill_timing)
         results = {}
-        for strategy in strategies:
-            config = strategy.config
-            if config.symbol in market_data:
-                result = backtest_engine.run_single_strategy(
-                    strategy=strategy,
-                    market_data=market_data[config.symbol],
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                results[config.strategy_id] = result
+        with ProcessPoolExecutor(max_workers=min(len(strategies), os.cpu_count() or 1)) as ex:
+            futures = {
+                ex.submit(_run_strategy_backtest, engine_args, s,
+                          _clip(market_data[s.config.symbol], start_date, end_date), start_date, end_date): s.config.strategy_id
+                for s in strategies if s.config.symbol in market_data
+            }
+            for fut in as_completed(futures):
+                results[futures[fut]] = fut.result()
         
         end_time = time.time()
         execution_time = end_time - start_time
@@ -252,31 +213,11 @@ class TestPerformance:
         # 性能斷言
         assert execution_time < 120, f"多策略回測時間不應超過120秒，實際: {execution_time:.2f}秒"
     
-    def test_memory_efficiency(self, strategy_manager, backtest_engine, market_data):
-        """測試內存效率（簡單驗證不會內存溢出）"""
-        # 載入策略
-        strategy_ids = strategy_manager.load_strategies()
-        if not strategy_ids:
-            pytest.skip("沒有可用的策略")
-        
-        # 選擇一個策略
-        strategy = None
-        for sid in strategy_ids:
-            state = strategy_manager.get_strategy_state(sid)
-            if state.enabled:
-                temp_strategy = strategy_manager.strategies[sid]
-                config = temp_strategy.config
-                
-                if config.symbol in market_data and market_data[config.symbol]:
-                    available_tfs = set(market_data[config.symbol].keys())
-                    required_tfs = set(config.timeframes)
-                    
-                    if required_tfs.issubset(available_tfs):
-                        strategy = temp_strategy
-                        break
-        
-        if strategy is None:
-            pytest.skip("沒有找到有完整市場數據的策略")
+    @per_symbol
+    def test_memory_efficiency(self, strategy_manager, backtest_engine, market_data, market_data_keys, symbol):
+        """測試內存效率（量測回測期間的峰值記憶體配置）"""
+        # 選擇該標的有完整市場數據的啟用策略
+        strategy = _eligible_strategy(strategy_manager, market_data_keys, symbol)
         
         config = strategy.config
         symbol_data = market_data[config.symbol]
@@ -286,23 +227,30 @@ class TestPerformance:
         df = symbol_data[first_tf]
         
         start_date = df['timestamp'].iloc[0]
-        end_date = df['timestamp'].iloc[-1]
+        end_date = _end_date(df)
         
-        # 執行回測（如果能完成就說明內存效率可接受）
+        # 執行回測並以 tracemalloc 追蹤 Python 配置的峰值（不走結果快取，確實重跑）；
+        # 有 psutil 時另記錄前後 RSS，涵蓋 tracemalloc 看不到的 C 擴充配置
+        rss_before = psutil.Process().memory_info().rss if PSUTIL_AVAILABLE else None
+        tracemalloc.start()
         try:
             result = backtest_engine.run_single_strategy(
                 strategy=strategy,
-                market_data=symbol_data,
+                market_data=_clip(symbol_data, start_date, end_date),
                 start_date=start_date,
                 end_date=end_date
             )
-            
-            print(f"\n內存效率測試:")
-            print(f"  策略: {config.strategy_id}")
-            print(f"  數據點: {len(df)}")
-            print(f"  總交易: {result.total_trades}")
-            print(f"  測試通過：沒有內存溢出")
-            
-            assert True, "內存效率測試通過"
-        except MemoryError:
-            pytest.fail("內存溢出")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        rss_after = psutil.Process().memory_info().rss if PSUTIL_AVAILABLE else None
+        
+        print(f"\n內存效率測試:")
+        print(f"  策略: {config.strategy_id}")
+        print(f"  數據點: {len(df)}")
+        print(f"  總交易: {result.total_trades}")
+        print(f"  峰值配置: {peak / 1e6:.2f} MB（{peak / len(df):.0f} bytes/點）")
+        if PSUTIL_AVAILABLE:
+            print(f"  RSS: {rss_before / 1e6:.1f} MB → {rss_after / 1e6:.1f} MB")
+        
+        assert peak < MAX_BACKTEST_PEAK_BYTES, f"回測峰值配置過高: {peak / 1e6:.1f} MB"
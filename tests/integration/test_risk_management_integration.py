@@ -31,7 +31,12 @@ class TestRiskManagementIntegration:
         """創建風險管理器"""
         return RiskManager(risk_config, initial_capital=1000.0)
     
-    def test_global_drawdown_limit_trigger(self, risk_manager):
+    @pytest.fixture
+    def show_details(self, request):
+        """只在 -s（不擷取輸出）時印出測試細節；預設擷取時連字串格式化都省略"""
+        return request.config.getoption('capture') == 'no'
+    
+    def test_global_drawdown_limit_trigger(self, risk_manager, show_details):
         """測試全局回撤限制觸發"""
         # 設置初始狀態
         risk_manager.global_state.initial_capital = 1000.0
@@ -52,14 +57,15 @@ class TestRiskManagementIntegration:
         drawdown = risk_manager.global_state.get_current_drawdown()
         assert drawdown == 0.25, f"回撤應該是 25%，實際是 {drawdown*100}%"
         
-        print(f"\n全局回撤限制測試:")
-        print(f"  初始資金: {risk_manager.global_state.initial_capital}")
-        print(f"  當前資金: {risk_manager.global_state.current_capital}")
-        print(f"  回撤: {drawdown*100:.2f}%")
-        print(f"  應該暫停: {should_halt}")
-        print(f"  原因: {reason}")
+        if show_details:
+            print(f"\n全局回撤限制測試:")
+            print(f"  初始資金: {risk_manager.global_state.initial_capital}")
+            print(f"  當前資金: {risk_manager.global_state.current_capital}")
+            print(f"  回撤: {drawdown*100:.2f}%")
+            print(f"  應該暫停: {should_halt}")
+            print(f"  原因: {reason}")
     
-    def test_daily_loss_limit_trigger(self, risk_manager):
+    def test_daily_loss_limit_trigger(self, risk_manager, show_details):
         """測試每日虧損限制觸發"""
         # 設置初始狀態
         risk_manager.global_state.initial_capital = 1000.0
@@ -83,15 +89,16 @@ class TestRiskManagementIntegration:
         daily_loss_pct = risk_manager.global_state.get_daily_loss_pct()
         assert daily_loss_pct == 0.15, f"每日虧損應該是 15%，實際是 {daily_loss_pct*100}%"
         
-        print(f"\n每日虧損限制測試:")
-        print(f"  今日開始資金: {risk_manager.global_state.daily_start_capital}")
-        print(f"  當前資金: {risk_manager.global_state.current_capital}")
-        print(f"  今日損益: {risk_manager.global_state.daily_pnl}")
-        print(f"  每日虧損: {daily_loss_pct*100:.2f}%")
-        print(f"  應該暫停: {should_halt}")
-        print(f"  原因: {reason}")
+        if show_details:
+            print(f"\n每日虧損限制測試:")
+            print(f"  今日開始資金: {risk_manager.global_state.daily_start_capital}")
+            print(f"  當前資金: {risk_manager.global_state.current_capital}")
+            print(f"  今日損益: {risk_manager.global_state.daily_pnl}")
+            print(f"  每日虧損: {daily_loss_pct*100:.2f}%")
+            print(f"  應該暫停: {should_halt}")
+            print(f"  原因: {reason}")
     
-    def test_strategy_position_limit(self, risk_manager):
+    def test_strategy_position_limit(self, risk_manager, show_details):
         """測試單策略倉位限制"""
         # 設置初始狀態
         risk_manager.global_state.initial_capital = 1000.0
@@ -109,14 +116,15 @@ class TestRiskManagementIntegration:
         # 驗證超過限制
         assert position_usage > risk_manager.config.strategy_max_position, "策略倉位應該超過限制"
         
-        print(f"\n單策略倉位限制測試:")
-        print(f"  當前資金: {risk_manager.global_state.current_capital}")
-        print(f"  策略倉位: {risk_manager.global_state.strategy_positions[strategy_id]}")
-        print(f"  倉位使用率: {position_usage*100:.2f}%")
-        print(f"  限制: {risk_manager.config.strategy_max_position*100:.2f}%")
-        print(f"  超過限制: {position_usage > risk_manager.config.strategy_max_position}")
+        if show_details:
+            print(f"\n單策略倉位限制測試:")
+            print(f"  當前資金: {risk_manager.global_state.current_capital}")
+            print(f"  策略倉位: {risk_manager.global_state.strategy_positions[strategy_id]}")
+            print(f"  倉位使用率: {position_usage*100:.2f}%")
+            print(f"  限制: {risk_manager.config.strategy_max_position*100:.2f}%")
+            print(f"  超過限制: {position_usage > risk_manager.config.strategy_max_position}")
     
-    def test_global_position_limit(self, risk_manager):
+    def test_global_position_limit(self, risk_manager, show_details):
         """測試全局倉位限制"""
         # 設置初始狀態
         risk_manager.global_state.initial_capital = 1000.0
@@ -137,16 +145,17 @@ class TestRiskManagementIntegration:
         # 驗證超過限制
         assert position_usage > risk_manager.config.global_max_position, "全局倉位應該超過限制"
         
-        print(f"\n全局倉位限制測試:")
-        print(f"  當前資金: {risk_manager.global_state.current_capital}")
-        print(f"  總倉位: {risk_manager.global_state.total_position_value}")
-        print(f"  倉位使用率: {position_usage*100:.2f}%")
-        print(f"  限制: {risk_manager.config.global_max_position*100:.2f}%")
-        print(f"  超過限制: {position_usage > risk_manager.config.global_max_position}")
-        for sid, pos_value in risk_manager.global_state.strategy_positions.items():
-            print(f"    {sid}: {pos_value} ({pos_value/risk_manager.global_state.current_capital*100:.2f}%)")
+        if show_details:
+            print(f"\n全局倉位限制測試:")
+            print(f"  當前資金: {risk_manager.global_state.current_capital}")
+            print(f"  總倉位: {risk_manager.global_state.total_position_value}")
+            print(f"  倉位使用率: {position_usage*100:.2f}%")
+            print(f"  限制: {risk_manager.config.global_max_position*100:.2f}%")
+            print(f"  超過限制: {position_usage > risk_manager.config.global_max_position}")
+            for sid, pos_value in risk_manager.global_state.strategy_positions.items():
+                print(f"    {sid}: {pos_value} ({pos_value/risk_manager.global_state.current_capital*100:.2f}%)")
     
-    def test_risk_event_recording(self, risk_manager):
+    def test_risk_event_recording(self, risk_manager, show_details):
         """測試風險事件記錄"""
         # 設置初始狀態
         risk_manager.global_state.initial_capital = 1000.0
@@ -166,15 +175,16 @@ class TestRiskManagementIntegration:
         assert latest_event.limit_value > 0, "限制值應該大於0"
         assert latest_event.action_taken != "", "應該記錄採取的行動"
         
-        print(f"\n風險事件記錄測試:")
-        print(f"  風險事件數量: {len(risk_manager.global_state.risk_events)}")
-        print(f"  最新事件:")
-        print(f"    類型: {latest_event.event_type}")
-        print(f"    觸發值: {latest_event.trigger_value}")
-        print(f"    限制值: {latest_event.limit_value}")
-        print(f"    行動: {latest_event.action_taken}")
+        if show_details:
+            print(f"\n風險事件記錄測試:")
+            print(f"  風險事件數量: {len(risk_manager.global_state.risk_events)}")
+            print(f"  最新事件:")
+            print(f"    類型: {latest_event.event_type}")
+            print(f"    觸發值: {latest_event.trigger_value}")
+            print(f"    限制值: {latest_event.limit_value}")
+            print(f"    行動: {latest_event.action_taken}")
     
-    def test_automatic_halt_and_resume(self, risk_manager):
+    def test_automatic_halt_and_resume(self, risk_manager, show_details):
         """測試自動暫停和恢復功能"""
         # 初始狀態：未暫停
         assert not risk_manager.global_state.trading_halted, "初始狀態應該未暫停"
@@ -189,12 +199,13 @@ class TestRiskManagementIntegration:
         assert not risk_manager.global_state.trading_halted, "應該已恢復"
         assert risk_manager.global_state.halt_reason == "", "暫停原因應該被清除"
         
-        print(f"\n自動暫停和恢復測試:")
-        print(f"  初始狀態: 未暫停")
-        print(f"  暫停後: 已暫停")
-        print(f"  恢復後: 未暫停")
+        if show_details:
+            print(f"\n自動暫停和恢復測試:")
+            print(f"  初始狀態: 未暫停")
+            print(f"  暫停後: 已暫停")
+            print(f"  恢復後: 未暫停")
     
-    def test_multiple_risk_limits_simultaneously(self, risk_manager):
+    def test_multiple_risk_limits_simultaneously(self, risk_manager, show_details):
         """測試同時觸發多個風險限制"""
         # 設置初始狀態
         risk_manager.global_state.initial_capital = 1000.0
@@ -217,9 +228,10 @@ class TestRiskManagementIntegration:
         assert drawdown > risk_manager.config.global_max_drawdown, "回撤應該超過限制"
         assert daily_loss > risk_manager.config.daily_loss_limit, "每日虧損應該超過限制"
         
-        print(f"\n多重風險限制測試:")
-        print(f"  回撤: {drawdown*100:.2f}% (限制: {risk_manager.config.global_max_drawdown*100:.2f}%)")
-        print(f"  每日虧損: {daily_loss*100:.2f}% (限制: {risk_manager.config.daily_loss_limit*100:.2f}%)")
-        print(f"  倉位使用: {position_usage*100:.2f}% (限制: {risk_manager.config.global_max_position*100:.2f}%)")
-        print(f"  應該暫停: {should_halt}")
-        print(f"  原因: {reason}")
+        if show_details:
+            print(f"\n多重風險限制測試:")
+            print(f"  回撤: {drawdown*100:.2f}% (限制: {risk_manager.config.global_max_drawdown*100:.2f}%)")
+            print(f"  每日虧損: {daily_loss*100:.2f}% (限制: {risk_manager.config.daily_loss_limit*100:.2f}%)")
+            print(f"  倉位使用: {position_usage*100:.2f}% (限制: {risk_manager.config.global_max_position*100:.2f}%)")
+            print(f"  應該暫停: {should_halt}")
+            print(f"  原因: {reason}")
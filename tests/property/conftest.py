@@ -0,0 +1,11 @@
+"""
+屬性測試共用 fixture
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def roundtrip_dir(tmp_path_factory):
+    """往返測試共用的暫存目錄：每個樣本覆寫同一檔案，不逐樣本建立、刪除目錄"""
+    return tmp_path_factory.mktemp("roundtrip")
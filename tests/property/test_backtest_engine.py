@@ -5,16 +5,18 @@ BacktestEngine 屬性測試
 """
 
 import pytest
+import numpy as np
 import pandas as pd
-from hypothesis import given, strategies as st, assume, settings
-from datetime import datetime, timedelta
-from typing import Dict
+from hypothesis import given, strategies as st, settings
+from datetime import datetime
+from functools import lru_cache
 
 from src.execution.backtest_engine import BacktestEngine
 from src.execution.strategy import Strategy
 from src.models.config import StrategyConfig, RiskManagement, ExitConditions, NotificationConfig
-from src.models.trading import Trade
+from src.models.trading import Signal, Trade
 from src.models.market_data import MarketData
+from tests.fixtures.market_data import draw_ohlcv
 
 
 # ============================================================================
@@ -26,28 +28,11 @@ def market_data_strategy(draw, n_candles=100):
     """生成市場數據"""
     base_price = draw(st.floats(min_value=1000, max_value=100000))
     
-    data = []
-    current_time = datetime(2024, 1, 1)
-    
-    for i in range(n_candles):
-        low = base_price * draw(st.floats(min_value=0.98, max_value=1.0))
-        high = low * draw(st.floats(min_value=1.0, max_value=1.02))
-        open_price = draw(st.floats(min_value=low, max_value=high))
-        close_price = draw(st.floats(min_value=low, max_value=high))
-        volume = draw(st.floats(min_value=100, max_value=10000))
-        
-        data.append({
-            'timestamp': current_time + timedelta(hours=i),
-            'open': open_price,
-            'high': high,
-            'low': low,
-            'close': close_price,
-            'volume': volume,
-        })
-        
-        base_price = close_price
-    
-    return pd.DataFrame(data)
+    return draw_ohlcv(
+        draw, n_candles, base_price,
+        pd.date_range(datetime(2024, 1, 1), periods=n_candles, freq='1h'),
+        max_move=0.02, volume_range=(100, 10000), random_walk=True,
+    )
 
 
 class SimpleStrategy(Strategy):
@@ -56,15 +41,15 @@ class SimpleStrategy(Strategy):
     def __init__(self, config: StrategyConfig):
         super().__init__(config)
         self.signal_count = 0
+        # 共用的 HOLD 信號：回測引擎只讀 action，不必每根 K 線重建
+        self._hold = Signal.hold(config.strategy_id, None, config.symbol)
     
     def generate_signal(self, market_data: MarketData):
         """生成信號：每 10 次生成一個買入信號"""
-        from src.models.trading import Signal
-        
         self.signal_count += 1
         
         if self.signal_count % 10 == 0:
-            timeframe = list(market_data.timeframes.keys())[0]
+            timeframe = next(iter(market_data.timeframes))
             latest = market_data.timeframes[timeframe].get_latest()
             
             return Signal(
@@ -80,18 +65,7 @@ class SimpleStrategy(Strategy):
                 confidence=0.8,
             )
         
-        return Signal(
-            strategy_id=self.config.strategy_id,
-            timestamp=market_data.timestamp,
-            symbol=self.config.symbol,
-            action='HOLD',
-            direction=None,
-            entry_price=0.0,
-            stop_loss=0.0,
-            take_profit=0.0,
-            position_size=0.0,
-            confidence=0.0,
-        )
+        return self._hold
     
     def calculate_position_size(self, capital: float, price: float) -> float:
         """計算倉位大小"""
@@ -116,9 +90,10 @@ class SimpleStrategy(Strategy):
         return False
 
 
-def create_test_strategy(strategy_id: str = "test-strategy") -> Strategy:
-    """創建測試策略"""
-    config = StrategyConfig(
+@lru_cache(maxsize=None)
+def _test_strategy_config(strategy_id: str) -> StrategyConfig:
+    """測試策略配置（同一 ID 共用一份；回測不修改配置）"""
+    return StrategyConfig(
         strategy_id=strategy_id,
         strategy_name="Test Strategy",
         version="1.0.0",
@@ -141,8 +116,11 @@ def create_test_strategy(strategy_id: str = "test-strategy") -> Strategy:
             take_profit="",
         ),
     )
-    
-    return SimpleStrategy(config)
+
+
+def create_test_strategy(strategy_id: str = "test-strategy") -> Strategy:
+    """創建測試策略（策略有逐根計數狀態，每次新建實例，只快取配置）"""
+    return SimpleStrategy(_test_strategy_config(strategy_id))
 
 
 # ============================================================================
@@ -373,6 +351,9 @@ def test_calculate_metrics_all_wins():
     assert metrics['losing_trades'] == 0
     assert metrics['win_rate'] == 1.0
     assert metrics['total_pnl'] == 1000.0
+    assert metrics['avg_win'] == 100.0
+    assert metrics['avg_loss'] == 0.0
+    assert metrics['profit_factor'] == 0.0
 
 
 def test_calculate_metrics_all_losses():
@@ -402,6 +383,47 @@ def test_calculate_metrics_all_losses():
     assert metrics['profit_factor'] == 0.0
 
 
+def test_calculate_metrics_from_pnl_matches_trades():
+    """測試由損益陣列計算的指標與由交易列表計算的相同"""
+    pnls = [120.5, -80.0, 0.0, 45.25, -10.0]
+    trades = []
+    for pnl in pnls:
+        trade = Trade(
+            strategy_id="test",
+            symbol="BTCUSDT",
+            direction="long",
+            entry_price=50000.0,
+            exit_price=50000.0,
+            size=0.1,
+            leverage=1,
+        )
+        trade.pnl = pnl
+        trades.append(trade)
+    
+    engine = BacktestEngine(10000.0)
+    
+    assert engine.calculate_metrics_from_pnl(np.array(pnls)) == engine.calculate_metrics(trades)
+    assert engine.calculate_metrics_from_pnl(np.empty(0)) == engine.calculate_metrics([])
+
+
+@given(pnls=st.lists(st.floats(min_value=-1e4, max_value=1e4, allow_nan=False), max_size=200))
+@settings(deadline=None)
+def test_calculate_metrics_from_pnl_matches_python_sums(pnls):
+    """測試編譯核心的彙總與逐筆 Python 加總一致"""
+    engine = BacktestEngine(10000.0)
+    metrics = engine.calculate_metrics_from_pnl(np.array(pnls, dtype=np.float64))
+    
+    wins = [p for p in pnls if p > 0]
+    losses = [p for p in pnls if p < 0]
+    
+    assert metrics['total_trades'] == len(pnls)
+    assert metrics['winning_trades'] == len(wins)
+    assert metrics['losing_trades'] == len(losses)
+    assert metrics['total_pnl'] == pytest.approx(sum(pnls), abs=1e-6)
+    assert metrics['avg_win'] == pytest.approx(sum(wins) / len(wins) if wins else 0.0)
+    assert metrics['avg_loss'] == pytest.approx(abs(sum(losses)) / len(losses) if losses else 0.0)
+
+
 def test_backtest_with_date_range():
     """測試指定日期範圍的回測"""
     # 創建市場數據
@@ -5,14 +5,16 @@ DataManager 屬性測試
 """
 
 import pytest
+import numpy as np
 import pandas as pd
-from hypothesis import given, strategies as st, assume, settings, HealthCheck
-from datetime import datetime, timedelta
+from hypothesis import given, strategies as st, settings, HealthCheck
+from datetime import datetime
 from typing import Optional
 import tempfile
 from pathlib import Path
 
-from src.managers.data_manager import DataManager, DataSource, CachedData
+from src.managers.data_manager import DataManager, DataSource, CachedData, _copy_on_write_enabled
+from tests.fixtures.market_data import draw_ohlcv
 
 
 # ============================================================================
@@ -27,27 +29,10 @@ def ohlcv_dataframe_strategy(draw, min_rows=10, max_rows=100):
     # 生成基礎價格
     base_price = draw(st.floats(min_value=100, max_value=100000))
     
-    data = []
-    current_time = datetime.now()
-    
-    for i in range(n_rows):
-        # 生成 OHLCV 數據，確保 high >= low，且 open/close 在 high/low 之間
-        low = base_price * draw(st.floats(min_value=0.95, max_value=1.0))
-        high = low * draw(st.floats(min_value=1.0, max_value=1.05))
-        open_price = draw(st.floats(min_value=low, max_value=high))
-        close_price = draw(st.floats(min_value=low, max_value=high))
-        volume = draw(st.floats(min_value=0, max_value=1000000))
-        
-        data.append({
-            'timestamp': current_time - timedelta(minutes=i),
-            'open': open_price,
-            'high': high,
-            'low': low,
-            'close': close_price,
-            'volume': volume,
-        })
-    
-    return pd.DataFrame(data)
+    return draw_ohlcv(
+        draw, n_rows, base_price,
+        pd.Timestamp.now() - pd.to_timedelta(np.arange(n_rows), unit='min'),  # 每分鐘往回一根
+    )
 
 
 class MockDataSource(DataSource):
@@ -74,7 +59,8 @@ class MockDataSource(DataSource):
             raise ValueError(f"模擬數據源失敗：{self.name}")
         
         if self.data is not None:
-            return self.data.copy()
+            # Copy-on-Write 下淺複製即可隔離，不必每次複製整份數據
+            return self.data.copy(deep=not _copy_on_write_enabled())
         
         # 生成默認數據
         return pd.DataFrame({
@@ -87,6 +73,19 @@ class MockDataSource(DataSource):
         })
 
 
+@pytest.fixture(scope="module")
+def tiny_ohlcv():
+    """單根 K 線的共用數據；MockDataSource 回傳副本，測試不會改到它"""
+    return pd.DataFrame({
+        'timestamp': [datetime.now()],
+        'open': [50000.0],
+        'high': [51000.0],
+        'low': [49000.0],
+        'close': [50500.0],
+        'volume': [1000.0],
+    })
+
+
 # ============================================================================
 # Property 28: 數據源容錯切換
 # ============================================================================
@@ -189,18 +188,10 @@ def test_cache_efficiency(data, num_requests):
         pd.testing.assert_frame_equal(result, result1)
 
 
-def test_cache_expiration():
+def test_cache_expiration(tiny_ohlcv):
     """測試緩存過期"""
     # 創建數據源
-    data = pd.DataFrame({
-        'timestamp': [datetime.now()],
-        'open': [50000.0],
-        'high': [51000.0],
-        'low': [49000.0],
-        'close': [50500.0],
-        'volume': [1000.0],
-    })
-    source = MockDataSource("test", should_fail=False, data=data)
+    source = MockDataSource("test", should_fail=False, data=tiny_ohlcv)
     
     # 創建數據管理器（緩存 TTL 很短）
     manager = DataManager(
@@ -216,26 +207,18 @@ def test_cache_expiration():
     manager.get_ohlcv("BTCUSDT", "1h", use_cache=True)
     assert source.call_count == 1
     
-    # 等待緩存過期
+    # 等待緩存過期（TTL 含 ±15% 抖動，最長 1.15 秒）
     import time
-    time.sleep(1.1)
+    time.sleep(1.2)
     
     # 再次請求（緩存已過期，應該重新調用數據源）
     manager.get_ohlcv("BTCUSDT", "1h", use_cache=True)
     assert source.call_count == 2
 
 
-def test_cache_disabled():
+def test_cache_disabled(tiny_ohlcv):
     """測試禁用緩存"""
-    data = pd.DataFrame({
-        'timestamp': [datetime.now()],
-        'open': [50000.0],
-        'high': [51000.0],
-        'low': [49000.0],
-        'close': [50500.0],
-        'volume': [1000.0],
-    })
-    source = MockDataSource("test", should_fail=False, data=data)
+    source = MockDataSource("test", should_fail=False, data=tiny_ohlcv)
     
     manager = DataManager(primary_source=source, cache_ttl=3600)
     
@@ -245,6 +228,23 @@ def test_cache_disabled():
         assert source.call_count == i + 1, f"禁用緩存時，每次請求都應該調用數據源"
 
 
+def test_cache_hit_isolated_from_caller_mutation(tiny_ohlcv):
+    """測試修改緩存返回的數據不影響緩存內容"""
+    source = MockDataSource("test", should_fail=False, data=tiny_ohlcv)
+    
+    manager = DataManager(primary_source=source, cache_ttl=3600)
+    manager.get_ohlcv("BTCUSDT", "1h")
+    
+    # 緩存命中後就地修改返回值
+    result = manager.get_ohlcv("BTCUSDT", "1h")
+    result.loc[0, 'close'] = 1.0
+    result['volume'] *= 2
+    
+    cached = manager.get_ohlcv("BTCUSDT", "1h")
+    assert source.call_count == 1
+    pd.testing.assert_frame_equal(cached, tiny_ohlcv)
+
+
 # ============================================================================
 # Property 30: 數據完整性驗證
 # ============================================================================
@@ -269,27 +269,25 @@ def test_data_integrity_validation(data):
     for field in required_fields:
         assert field in result.columns, f"數據應該包含字段：{field}"
     
-    # 驗證：沒有空值
-    assert not result[required_fields].isnull().any().any(), "數據不應該包含空值"
+    # 數值欄位一次取成 (N, 5) 陣列，以下檢查都在同一塊連續記憶體上完成
+    arr = result[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+    o, h, l, c, v = arr.T
     
-    # 驗證：high >= low
-    assert (result['high'] >= result['low']).all(), "high 應該 >= low"
+    # 驗證：沒有空值
+    assert not result['timestamp'].isna().any(), "數據不應該包含空值"
+    assert not np.isnan(arr).any(), "數據不應該包含空值"
     
-    # 驗證：high >= open 和 high >= close
-    assert (result['high'] >= result['open']).all(), "high 應該 >= open"
-    assert (result['high'] >= result['close']).all(), "high 應該 >= close"
+    # 驗證：high >= low / open / close
+    assert (h >= np.maximum.reduce([o, l, c])).all(), "high 應該 >= open、low、close"
     
-    # 驗證：low <= open 和 low <= close
-    assert (result['low'] <= result['open']).all(), "low 應該 <= open"
-    assert (result['low'] <= result['close']).all(), "low 應該 <= close"
+    # 驗證：low <= open / close
+    assert (l <= np.minimum(o, c)).all(), "low 應該 <= open、close"
     
     # 驗證：volume >= 0
-    assert (result['volume'] >= 0).all(), "volume 應該 >= 0"
+    assert (v >= 0).all(), "volume 應該 >= 0"
     
     # 驗證：價格 > 0
-    price_fields = ['open', 'high', 'low', 'close']
-    for field in price_fields:
-        assert (result[field] > 0).all(), f"{field} 應該 > 0"
+    assert (arr[:, :4] > 0).all(), "open、high、low、close 應該 > 0"
 
 
 def test_invalid_data_rejection():
@@ -340,36 +338,32 @@ def test_missing_field_rejection():
 @given(
     data=ohlcv_dataframe_strategy(),
 )
-def test_data_export_import_roundtrip(data):
+def test_data_export_import_roundtrip(data, roundtrip_dir):
     """
     對於任何市場數據或交易數據，導出到文件後再導入，
     應該得到等價的數據（所有字段相同）。
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # 創建數據管理器
-        manager = DataManager(data_dir=tmpdir)
-        
-        # 保存數據
-        filepath = manager.save_data("BTCUSDT", "1h", data)
-        assert Path(filepath).exists(), "文件應該被創建"
-        
-        # 載入數據
-        loaded_data = manager.load_data("BTCUSDT", "1h")
-        assert loaded_data is not None, "應該能夠載入數據"
-        
-        # 驗證：載入的數據與原始數據相同
-        assert len(loaded_data) == len(data), "數據長度應該相同"
-        assert list(loaded_data.columns) == list(data.columns), "數據列應該相同"
-        
-        # 驗證：數值相同（允許小的浮點數誤差）
-        for col in data.columns:
-            if col == 'timestamp':
-                # timestamp 可能需要特殊處理
-                continue
-            if data[col].dtype in ['float64', 'float32']:
-                assert loaded_data[col].equals(data[col]) or \
-                       (loaded_data[col] - data[col]).abs().max() < 1e-6, \
-                       f"列 {col} 的數值應該相同"
+    # 創建數據管理器
+    manager = DataManager(data_dir=str(roundtrip_dir))
+    
+    # 保存數據
+    filepath = manager.save_data("BTCUSDT", "1h", data)
+    assert Path(filepath).exists(), "文件應該被創建"
+    
+    # 載入數據
+    loaded_data = manager.load_data("BTCUSDT", "1h")
+    assert loaded_data is not None, "應該能夠載入數據"
+    
+    # 驗證：載入的數據與原始數據相同
+    assert len(loaded_data) == len(data), "數據長度應該相同"
+    assert list(loaded_data.columns) == list(data.columns), "數據列應該相同"
+    
+    # 驗證：數值相同（允許小的浮點數誤差），所有浮點欄位一次比較
+    num_cols = data.select_dtypes(include=['float32', 'float64']).columns
+    assert np.allclose(
+        loaded_data[num_cols].to_numpy(), data[num_cols].to_numpy(),
+        rtol=0, atol=1e-6, equal_nan=True,
+    ), "數值欄位應該相同"
 
 
 # ============================================================================
@@ -387,18 +381,9 @@ def test_data_manager_initialization():
     assert len(manager.fetch_history) == 0
 
 
-def test_clear_cache():
+def test_clear_cache(tiny_ohlcv):
     """測試清除緩存"""
-    data = pd.DataFrame({
-        'timestamp': [datetime.now()],
-        'open': [50000.0],
-        'high': [51000.0],
-        'low': [49000.0],
-        'close': [50500.0],
-        'volume': [1000.0],
-    })
-    
-    source = MockDataSource("test", data=data)
+    source = MockDataSource("test", data=tiny_ohlcv)
     manager = DataManager(primary_source=source)
     
     # 添加緩存
@@ -417,18 +402,9 @@ def test_clear_cache():
     assert len(manager.cache) == 0
 
 
-def test_fetch_history():
+def test_fetch_history(tiny_ohlcv):
     """測試數據獲取歷史"""
-    data = pd.DataFrame({
-        'timestamp': [datetime.now()],
-        'open': [50000.0],
-        'high': [51000.0],
-        'low': [49000.0],
-        'close': [50500.0],
-        'volume': [1000.0],
-    })
-    
-    source = MockDataSource("test", data=data)
+    source = MockDataSource("test", data=tiny_ohlcv)
     manager = DataManager(primary_source=source)
     
     # 獲取數據
@@ -445,18 +421,23 @@ def test_fetch_history():
     assert btc_history[0]['symbol'] == "BTCUSDT"
 
 
-def test_cache_stats():
-    """測試緩存統計"""
-    data = pd.DataFrame({
-        'timestamp': [datetime.now()],
-        'open': [50000.0],
-        'high': [51000.0],
-        'low': [49000.0],
-        'close': [50500.0],
-        'volume': [1000.0],
-    })
+def test_mock_source_returns_isolated_frames(tiny_ohlcv):
+    """測試模擬數據源回傳的數據與原始數據隔離（CoW 下共用底層緩衝區）"""
+    source = MockDataSource("test", data=tiny_ohlcv)
+    
+    first = source.fetch_ohlcv("BTCUSDT", "1h")
+    second = source.fetch_ohlcv("BTCUSDT", "1h")
+    if _copy_on_write_enabled():
+        assert np.shares_memory(first['close'].to_numpy(), second['close'].to_numpy())
     
-    source = MockDataSource("test", data=data)
+    first.loc[0, 'close'] = 1.0
+    assert second.loc[0, 'close'] == 50500.0
+    assert tiny_ohlcv.loc[0, 'close'] == 50500.0
+
+
+def test_cache_stats(tiny_ohlcv):
+    """測試緩存統計"""
+    source = MockDataSource("test", data=tiny_ohlcv)
     manager = DataManager(primary_source=source, cache_ttl=1)
     
     # 添加緩存
@@ -468,9 +449,9 @@ def test_cache_stats():
     assert stats['valid'] == 1
     assert stats['expired'] == 0
     
-    # 等待緩存過期
+    # 等待緩存過期（TTL 含 ±15% 抖動，最長 1.15 秒）
     import time
-    time.sleep(1.1)
+    time.sleep(1.2)
     
     # 再次檢查統計
     stats = manager.get_cache_stats()
@@ -479,6 +460,110 @@ def test_cache_stats():
     assert stats['expired'] == 1
 
 
+def test_cache_stats_track_refresh_and_clear(tiny_ohlcv, monkeypatch):
+    """測試緩存統計在過期、重新寫入與清除後仍與逐筆檢查一致"""
+    from src.managers import data_manager as data_manager_module
+    
+    clock = [1000.0]
+    monkeypatch.setattr(data_manager_module, '_now', lambda: clock[0])
+    
+    manager = DataManager(primary_source=MockDataSource("test", data=tiny_ohlcv), cache_ttl=10, cache_ttl_jitter=0)
+    
+    def assert_stats_match_scan():
+        stats = manager.get_cache_stats()
+        valid = sum(1 for cached in manager.cache.values() if cached.is_valid())
+        assert stats['total'] == len(manager.cache)
+        assert stats['valid'] == valid
+        assert stats['expired'] == len(manager.cache) - valid
+    
+    manager.get_ohlcv("BTCUSDT", "1h")
+    clock[0] += 5
+    manager.get_ohlcv("ETHUSDT", "1h")
+    assert_stats_match_scan()
+    
+    # BTC 過期、ETH 仍有效
+    clock[0] += 6
+    assert_stats_match_scan()
+    assert manager.get_cache_stats()['expired'] == 1
+    
+    # 過期後重新取得：BTC 重新寫入，舊的到期項目不再計入
+    manager.get_ohlcv("BTCUSDT", "1h")
+    assert_stats_match_scan()
+    assert manager.get_cache_stats()['expired'] == 0
+    
+    # 兩者都過期後清除其中一個
+    clock[0] += 20
+    assert manager.get_cache_stats()['expired'] == 2
+    manager.clear_cache(symbol="ETHUSDT")
+    assert_stats_match_scan()
+    assert manager.get_cache_stats()['expired'] == 1
+    
+    manager.clear_cache()
+    assert_stats_match_scan()
+
+
+def test_cache_ttl_jitter_spreads_expiry(monkeypatch):
+    """測試同時寫入的緩存到期時間分散在 cache_ttl × [0.85, 1.15] 內"""
+    from src.managers import data_manager as data_manager_module
+    
+    monkeypatch.setattr(data_manager_module, '_now', lambda: 0.0)
+    random_state = data_manager_module.random.getstate()
+    data_manager_module.random.seed(0)
+    try:
+        manager = DataManager(cache_ttl=300)
+        frame = pd.DataFrame({'close': [1.0]})
+        for i in range(2000):
+            manager._store_cache(f"SYM{i}", "1h", frame)
+    finally:
+        data_manager_module.random.setstate(random_state)
+    
+    expiries = np.array([cached.expires_at for cached in manager.cache.values()])
+    assert expiries.min() >= 300 * 0.85
+    assert expiries.max() <= 300 * 1.15
+    
+    # 大致均勻：十等分的每一格都有約 1/10 的條目
+    counts, _ = np.histogram(expiries, bins=10, range=(300 * 0.85, 300 * 1.15))
+    assert counts.min() > 2000 / 10 * 0.7
+
+
+def test_cache_ttl_jitter_validation():
+    """測試 cache_ttl_jitter 超出範圍時拒絕"""
+    with pytest.raises(ValueError):
+        DataManager(cache_ttl_jitter=1.0)
+    with pytest.raises(ValueError):
+        DataManager(cache_ttl_jitter=-0.1)
+
+
+def test_load_legacy_csv_data(tmp_path):
+    """測試仍能載入舊版 save_data 寫出的 CSV 文件"""
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=3, freq='h'),
+        'close': [100.0, 101.5, 99.25],
+    })
+    data.to_csv(tmp_path / "BTCUSDT_1h.csv", index=False)
+    
+    loaded = DataManager(data_dir=str(tmp_path)).load_data("BTCUSDT", "1h")
+    
+    assert loaded is not None
+    assert pd.api.types.is_datetime64_any_dtype(loaded['timestamp'])
+    assert loaded['close'].tolist() == data['close'].tolist()
+
+
+def test_save_data_uses_parquet(tmp_path):
+    """測試安裝 pyarrow 時 save_data 寫出 Parquet 並原樣讀回"""
+    pytest.importorskip("pyarrow")
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=3, freq='h'),
+        'close': [100.0, 101.5, 0.1 + 0.2],
+    })
+    manager = DataManager(data_dir=str(tmp_path))
+    
+    filepath = manager.save_data("BTCUSDT", "1h", data)
+    
+    assert Path(filepath).suffix == '.parquet'
+    pd.testing.assert_frame_equal(manager.load_data("BTCUSDT", "1h"), data)
+
+
 def test_load_nonexistent_data():
     """測試載入不存在的數據"""
     with tempfile.TemporaryDirectory() as tmpdir:
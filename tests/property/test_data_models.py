@@ -10,8 +10,7 @@ Property 31: 數據導出往返
 import pytest
 from hypothesis import given, strategies as st
 from datetime import datetime, timedelta
-import tempfile
-import os
+import math
 
 from src.models import BacktestResult, Trade, StrategyConfig
 
@@ -54,11 +53,16 @@ def trade_strategy(draw):
     return trade
 
 
+# 策略物件在模組載入時建立一次：回測結果每個樣本都要抽一串交易，不在 draw 內重建
+_TRADE_ST = trade_strategy()
+_TRADE_LIST_ST = st.lists(_TRADE_ST, min_size=1, max_size=50)
+
+
 @st.composite
 def backtest_result_strategy(draw):
     """生成隨機回測結果"""
     initial_capital = draw(st.floats(min_value=100, max_value=10000))
-    trades = draw(st.lists(trade_strategy(), min_size=1, max_size=50))
+    trades = draw(_TRADE_LIST_ST)
     
     # 計算最終資金
     final_capital = initial_capital + sum(t.pnl for t in trades)
@@ -81,50 +85,109 @@ def backtest_result_strategy(draw):
     return result
 
 
+_BACKTEST_RESULT_ST = backtest_result_strategy()
+
+
 # ============================================================================
 # Property 10: 回測結果持久化往返
 # ============================================================================
 
 # Feature: multi-strategy-system, Property 10: 回測結果持久化往返
-@given(backtest_result_strategy())
-def test_backtest_result_save_load_roundtrip(result):
+@given(result=_BACKTEST_RESULT_ST)
+def test_backtest_result_save_load_roundtrip(result, roundtrip_dir):
     """
     對於任何回測結果，將結果保存到文件後再載入，應該得到等價的結果對象（所有關鍵字段相同）
     
     Validates: Requirements 4.7
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        filepath = os.path.join(tmpdir, 'test_result.json')
-        
-        # 保存
-        result.save(filepath)
-        
-        # 載入
-        loaded_result = BacktestResult.load(filepath)
-        
-        # 驗證關鍵字段相同
-        assert loaded_result.strategy_id == result.strategy_id
-        assert loaded_result.initial_capital == result.initial_capital
-        assert loaded_result.final_capital == result.final_capital
-        assert loaded_result.total_trades == result.total_trades
-        assert loaded_result.winning_trades == result.winning_trades
-        assert loaded_result.losing_trades == result.losing_trades
-        assert abs(loaded_result.win_rate - result.win_rate) < 0.01
-        assert abs(loaded_result.total_pnl - result.total_pnl) < 0.01
-        assert abs(loaded_result.profit_factor - result.profit_factor) < 0.01
-        
-        # 驗證交易數量相同
-        assert len(loaded_result.trades) == len(result.trades)
-        
-        # 驗證每筆交易的關鍵字段
-        for original_trade, loaded_trade in zip(result.trades, loaded_result.trades):
-            assert loaded_trade.trade_id == original_trade.trade_id
-            assert loaded_trade.strategy_id == original_trade.strategy_id
-            assert loaded_trade.symbol == original_trade.symbol
-            assert loaded_trade.direction == original_trade.direction
-            assert abs(loaded_trade.entry_price - original_trade.entry_price) < 0.01
-            assert abs(loaded_trade.exit_price - original_trade.exit_price) < 0.01
-            assert abs(loaded_trade.pnl - original_trade.pnl) < 0.01
+    filepath = roundtrip_dir / 'test_result.json'
+    
+    # 保存
+    result.save(filepath)
+    
+    # 載入
+    loaded_result = BacktestResult.load(filepath)
+    
+    # 驗證關鍵字段相同
+    assert loaded_result.strategy_id == result.strategy_id
+    assert loaded_result.initial_capital == result.initial_capital
+    assert loaded_result.final_capital == result.final_capital
+    assert loaded_result.total_trades == result.total_trades
+    assert loaded_result.winning_trades == result.winning_trades
+    assert loaded_result.losing_trades == result.losing_trades
+    assert abs(loaded_result.win_rate - result.win_rate) < 0.01
+    assert abs(loaded_result.total_pnl - result.total_pnl) < 0.01
+    assert abs(loaded_result.profit_factor - result.profit_factor) < 0.01
+    
+    # 驗證交易數量相同
+    assert len(loaded_result.trades) == len(result.trades)
+    
+    # 驗證每筆交易的關鍵字段
+    for original_trade, loaded_trade in zip(result.trades, loaded_result.trades):
+        assert loaded_trade.trade_id == original_trade.trade_id
+        assert loaded_trade.strategy_id == original_trade.strategy_id
+        assert loaded_trade.symbol == original_trade.symbol
+        assert loaded_trade.direction == original_trade.direction
+        assert abs(loaded_trade.entry_price - original_trade.entry_price) < 0.01
+        assert abs(loaded_trade.exit_price - original_trade.exit_price) < 0.01
+        assert abs(loaded_trade.pnl - original_trade.pnl) < 0.01
+
+
+@given(result=_BACKTEST_RESULT_ST)
+def test_backtest_result_msgpack_roundtrip(result, roundtrip_dir):
+    """保存為 .msgpack 再載入，關鍵字段與交易時間應相同"""
+    pytest.importorskip("msgpack")
+    
+    filepath = roundtrip_dir / 'test_result.msgpack'
+    result.save(filepath)
+    loaded_result = BacktestResult.load(filepath)
+    
+    assert loaded_result.strategy_id == result.strategy_id
+    assert loaded_result.final_capital == result.final_capital
+    assert loaded_result.total_trades == result.total_trades
+    assert [t.exit_time for t in loaded_result.trades] == [t.exit_time for t in result.trades]
+
+
+@given(result=_BACKTEST_RESULT_ST)
+def test_backtest_result_parquet_roundtrip(result, roundtrip_dir):
+    """保存為 .parquet 再載入，關鍵字段與每筆交易應相同"""
+    pytest.importorskip("pyarrow")
+    
+    filepath = roundtrip_dir / 'test_result.parquet'
+    result.save(filepath)
+    loaded_result = BacktestResult.load(filepath)
+    
+    assert loaded_result.to_dict() == result.to_dict()
+
+
+def test_backtest_result_json_roundtrip_keeps_nan_and_int_keys(tmp_path):
+    """交易 metadata 含 NaN 與整數鍵時，JSON 往返與標準庫行為一致（NaN 保留、鍵轉字串）"""
+    trade = Trade(
+        strategy_id='test',
+        symbol='BTCUSDT',
+        direction='long',
+        entry_price=100.0,
+        exit_price=110.0,
+        size=1.0,
+        metadata={'mfe': float('nan'), 1: 'first'},
+    )
+    trade.calculate_pnl()
+    result = BacktestResult(
+        strategy_id='test',
+        start_date=datetime(2024, 1, 1),
+        end_date=datetime(2024, 2, 1),
+        initial_capital=1000.0,
+        final_capital=1000.0 + trade.pnl,
+        trades=[trade],
+    )
+    result.calculate_metrics()
+    
+    filepath = tmp_path / 'nan_result.json'
+    result.save(filepath)
+    loaded = BacktestResult.load(filepath).trades[0].metadata
+    
+    assert math.isnan(loaded['mfe'])
+    assert loaded['1'] == 'first'
 
 
 # ============================================================================
@@ -132,7 +195,7 @@ def test_backtest_result_save_load_roundtrip(result):
 # ============================================================================
 
 # Feature: multi-strategy-system, Property 31: 數據導出往返
-@given(trade_strategy())
+@given(_TRADE_ST)
 def test_trade_to_dict_roundtrip(trade):
     """
     對於任何交易數據，導出到字典後再重建，應該得到等價的數據（所有字段相同）
@@ -143,23 +206,7 @@ def test_trade_to_dict_roundtrip(trade):
     trade_dict = trade.to_dict()
     
     # 從字典重建
-    reconstructed_trade = Trade(
-        trade_id=trade_dict['trade_id'],
-        strategy_id=trade_dict['strategy_id'],
-        symbol=trade_dict['symbol'],
-        direction=trade_dict['direction'],
-        entry_time=datetime.fromisoformat(trade_dict['entry_time']),
-        exit_time=datetime.fromisoformat(trade_dict['exit_time']),
-        entry_price=trade_dict['entry_price'],
-        exit_price=trade_dict['exit_price'],
-        size=trade_dict['size'],
-        leverage=trade_dict['leverage'],
-        pnl=trade_dict['pnl'],
-        pnl_pct=trade_dict['pnl_pct'],
-        commission=trade_dict['commission'],
-        exit_reason=trade_dict['exit_reason'],
-        metadata=trade_dict['metadata'],
-    )
+    reconstructed_trade = Trade.from_dict(trade_dict)
     
     # 驗證所有字段相同
     assert reconstructed_trade.trade_id == trade.trade_id
@@ -177,7 +224,7 @@ def test_trade_to_dict_roundtrip(trade):
 
 
 # Feature: multi-strategy-system, Property 31: 數據導出往返
-@given(backtest_result_strategy())
+@given(_BACKTEST_RESULT_ST)
 def test_backtest_result_to_dict_roundtrip(result):
     """
     對於任何回測結果，導出到字典後應該包含所有關鍵信息
@@ -207,6 +254,22 @@ def test_backtest_result_to_dict_roundtrip(result):
     assert result_dict['final_capital'] == result.final_capital
     assert result_dict['total_trades'] == result.total_trades
     assert len(result_dict['trades']) == len(result.trades)
+    
+    # 欄式版本：每個字段一欄，逐欄取值與逐筆字典相同
+    soa = result.to_dict_soa()
+    assert soa['trade_count'] == len(result.trades)
+    assert soa['trade_fields'] == list(soa['trade_cols'])
+    for name in soa['trade_fields']:
+        assert soa['trade_cols'][name] == [t[name] for t in result_dict['trades']]
+
+
+# Feature: multi-strategy-system, Property 31: 數據導出往返
+@given(_BACKTEST_RESULT_ST)
+def test_backtest_result_soa_roundtrip(result):
+    """欄式字典導出後以 from_dict_soa 重建，應與原結果等價"""
+    loaded_result = BacktestResult.from_dict_soa(result.to_dict_soa())
+    
+    assert loaded_result.to_dict() == result.to_dict()
 
 
 # ============================================================================
@@ -255,6 +318,19 @@ def test_trade_calculate_pnl_short():
     assert abs(trade.pnl_pct - 10.0) < 0.01
 
 
+def test_trade_from_dict_missing_fields_use_defaults():
+    """缺少的欄位（含時間）使用 Trade 的預設值"""
+    trade = Trade.from_dict({'strategy_id': 'test', 'entry_time': '2024-01-01T00:00:00'})
+    
+    assert trade.strategy_id == 'test'
+    assert trade.entry_time == datetime(2024, 1, 1)
+    assert isinstance(trade.exit_time, datetime)
+    assert trade.entry_price == 0.0
+    
+    with pytest.raises(TypeError):
+        Trade.from_dict({'unknown_field': 1})
+
+
 def test_backtest_result_calculate_metrics():
     """測試回測結果指標計算"""
     # 創建測試交易
@@ -5,6 +5,7 @@ LossAnalyzer 的基於屬性的測試
 """
 
 import pytest
+import numpy as np
 from hypothesis import given, strategies as st, settings
 from datetime import datetime, timedelta
 import uuid
@@ -67,10 +68,14 @@ def losing_trade(draw):
     return trade
 
 
+# 策略物件在模組載入時建立一次，各測試共用
+_LOSING_TRADE_ST = losing_trade()
+
+
 # Feature: multi-strategy-system, Property 15: 虧損分類完整性
 # 對於任何虧損交易，系統應該自動分配至少一個虧損原因分類
-@given(trade=losing_trade())
-@settings(max_examples=100, deadline=None)
+@given(trade=_LOSING_TRADE_ST)
+@settings(deadline=None)
 def test_loss_classification_completeness(trade):
     """
     Property 15: 虧損分類完整性
@@ -90,8 +95,7 @@ def test_loss_classification_completeness(trade):
     assert isinstance(analysis.loss_reason, str), "虧損原因必須是字符串"
     
     # 驗證：虧損原因應該是預定義的分類之一
-    valid_reasons = set(LossAnalyzer.LOSS_REASONS.keys())
-    assert analysis.loss_reason in valid_reasons, \
+    assert analysis.loss_reason in LossAnalyzer.LOSS_REASONS_SET, \
         f"虧損原因 '{analysis.loss_reason}' 不在預定義分類中"
     
     # 驗證：置信度應該在 0-1 之間
@@ -108,8 +112,8 @@ def test_loss_classification_completeness(trade):
 
 # Feature: multi-strategy-system, Property 16: 虧損佔比總和
 # 對於任何虧損分析結果，所有虧損原因的佔比總和應該等於 100%
-@given(trades=st.lists(losing_trade(), min_size=5, max_size=20))
-@settings(max_examples=100, deadline=None)
+@given(trades=st.lists(_LOSING_TRADE_ST, min_size=5, max_size=20))
+@settings(deadline=None)
 def test_loss_distribution_sum(trades):
     """
     Property 16: 虧損佔比總和
@@ -139,8 +143,8 @@ def test_loss_distribution_sum(trades):
 
 # Feature: multi-strategy-system, Property 15 擴展: 虧損模式識別完整性
 # 對於任何虧損交易列表，find_common_patterns 應該識別出所有虧損交易
-@given(trades=st.lists(losing_trade(), min_size=3, max_size=15))
-@settings(max_examples=100, deadline=None)
+@given(trades=st.lists(_LOSING_TRADE_ST, min_size=3, max_size=15))
+@settings(deadline=None)
 def test_loss_pattern_completeness(trades):
     """
     Property 15 擴展: 虧損模式識別完整性
@@ -157,15 +161,19 @@ def test_loss_pattern_completeness(trades):
     # 驗證：應該有至少一個模式
     assert len(patterns) > 0, "應該至少識別出一個虧損模式"
     
+    # 非獲利（pnl <= 0，與 Trade.is_winning 相反）交易的遮罩
+    pnl = np.fromiter((t.pnl for t in trades), dtype=np.float64, count=len(trades))
+    losing_mask = pnl <= 0
+    
     # 驗證：所有模式的出現次數總和應該等於虧損交易數
     total_occurrences = sum(p.occurrence_count for p in patterns)
-    losing_count = len([t for t in trades if not t.is_winning()])
+    losing_count = int(losing_mask.sum())
     assert total_occurrences == losing_count, \
         f"模式出現次數總和 {total_occurrences} 不等於虧損交易數 {losing_count}"
     
     # 驗證：所有模式的總虧損應該等於所有虧損交易的總虧損（允許浮點誤差）
     total_pattern_loss = sum(p.total_loss for p in patterns)
-    total_trade_loss = sum(abs(t.pnl) for t in trades if not t.is_winning())
+    total_trade_loss = np.abs(pnl[losing_mask]).sum()
     assert abs(total_pattern_loss - total_trade_loss) < 0.01, \
         f"模式總虧損 {total_pattern_loss} 不等於交易總虧損 {total_trade_loss}"
     
@@ -180,8 +188,8 @@ def test_loss_pattern_completeness(trades):
 
 # Feature: multi-strategy-system, Property 15 擴展: 改進建議生成
 # 對於任何虧損原因，應該生成至少一條改進建議
-@given(trade=losing_trade())
-@settings(max_examples=100, deadline=None)
+@given(trade=_LOSING_TRADE_ST)
+@settings(deadline=None)
 def test_recommendations_generation(trade):
     """
     Property 15 擴展: 改進建議生成
@@ -209,8 +217,8 @@ def test_recommendations_generation(trade):
 
 # Feature: multi-strategy-system, Property 15 擴展: 虧損歷史記錄
 # 分析過的虧損交易應該被記錄到歷史中
-@given(trades=st.lists(losing_trade(), min_size=1, max_size=10))
-@settings(max_examples=100, deadline=None)
+@given(trades=st.lists(_LOSING_TRADE_ST, min_size=1, max_size=10))
+@settings(deadline=None)
 def test_loss_history_recording(trades):
     """
     Property 15 擴展: 虧損歷史記錄
@@ -225,8 +233,7 @@ def test_loss_history_recording(trades):
     assert len(analyzer.loss_history) == 0, "初始歷史應該為空"
     
     # 分析所有交易
-    for trade in trades:
-        analyzer.analyze_trade(trade)
+    analyzer.analyze_trades(trades)
     
     # 驗證：歷史記錄數量應該等於交易數量
     assert len(analyzer.loss_history) == len(trades), \
@@ -240,8 +247,8 @@ def test_loss_history_recording(trades):
 
 # Feature: multi-strategy-system, Property 16 擴展: 虧損模式佔比一致性
 # 虧損模式的佔比應該與 calculate_loss_distribution 的結果一致
-@given(trades=st.lists(losing_trade(), min_size=5, max_size=15))
-@settings(max_examples=100, deadline=None)
+@given(trades=st.lists(_LOSING_TRADE_ST, min_size=5, max_size=15))
+@settings(deadline=None)
 def test_pattern_distribution_consistency(trades):
     """
     Property 16 擴展: 虧損模式佔比一致性
@@ -263,19 +270,21 @@ def test_pattern_distribution_consistency(trades):
         f"模式數量 {len(patterns)} 不等於分布中的原因數量 {len(distribution)}"
     
     # 驗證：每個模式的佔比應該與分布中的佔比一致
-    for pattern in patterns:
-        assert pattern.pattern_name in distribution, \
-            f"模式 '{pattern.pattern_name}' 不在分布中"
-        
-        dist_percentage = distribution[pattern.pattern_name]
-        assert abs(pattern.percentage - dist_percentage) < 0.01, \
-            f"模式 '{pattern.pattern_name}' 的佔比 {pattern.percentage}% " \
-            f"與分布中的佔比 {dist_percentage}% 不一致"
+    names = [pattern.pattern_name for pattern in patterns]
+    missing = set(names) - distribution.keys()
+    assert not missing, f"模式 {missing} 不在分布中"
+    
+    pattern_pct = np.fromiter((p.percentage for p in patterns), dtype=np.float64, count=len(patterns))
+    dist_pct = np.fromiter((distribution[name] for name in names), dtype=np.float64, count=len(names))
+    mismatched = np.abs(pattern_pct - dist_pct) >= 0.01
+    assert not mismatched.any(), \
+        f"模式 {[n for n, bad in zip(names, mismatched) if bad]} 的佔比 " \
+        f"{pattern_pct[mismatched].tolist()}% 與分布中的佔比 {dist_pct[mismatched].tolist()}% 不一致"
 
 
 # Feature: multi-strategy-system, 錯誤處理: 非虧損交易應該拋出異常
-@given(trade=losing_trade())
-@settings(max_examples=50, deadline=None)
+@given(trade=_LOSING_TRADE_ST)
+@settings(deadline=None)
 def test_winning_trade_raises_error(trade):
     """
     錯誤處理: 非虧損交易應該拋出異常
@@ -9,6 +9,8 @@ from hypothesis import given, strategies as st, settings, assume, HealthCheck
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from functools import lru_cache
+import math
 from typing import Dict, List, Any
 
 from src.analysis.optimizer import Optimizer, OptimizationResult
@@ -35,23 +37,18 @@ def market_data_strategy(draw):
         min_size=n_candles, max_size=n_candles,
     ))
 
-    timestamps = [datetime.now() - timedelta(hours=i) for i in range(n_candles, 0, -1)]
-    opens, highs, lows, closes = [], [], [], []
-    price = base_price
-    for ch in changes:
-        o = price
-        c = price * (1 + ch)
-        opens.append(o)
-        highs.append(max(o, c) * 1.005)
-        lows.append(min(o, c) * 0.995)
-        closes.append(c)
-        price = c
-    data = {
+    # 每小時一根，最後一根在一小時前
+    timestamps = pd.date_range(end=datetime.now() - timedelta(hours=1), periods=n_candles, freq='h')
+    closes = base_price * np.cumprod(1 + np.asarray(changes))
+    opens = np.r_[base_price, closes[:-1]]
+    df = pd.DataFrame({
         'timestamp': timestamps,
-        'open': opens, 'high': highs, 'low': lows, 'close': closes,
-        'volume': [1000.0] * n_candles,
-    }
-    df = pd.DataFrame(data)
+        'open': opens,
+        'high': np.maximum(opens, closes) * 1.005,
+        'low': np.minimum(opens, closes) * 0.995,
+        'close': closes,
+        'volume': np.full(n_candles, 1000.0),
+    })
     return {'1h': df}
 
 
@@ -74,18 +71,9 @@ def param_grid_strategy(draw):
     return param_grid
 
 
-# Feature: multi-strategy-system, Property 12: 參數優化數據分離
-@given(market_data_strategy())
-@settings(max_examples=100, deadline=None,
-          suppress_health_check=[HealthCheck.data_too_large])
-def test_data_separation(market_data):
-    """
-    對於任何參數優化過程，訓練集和驗證集不應該有重疊的數據點。
-    
-    Validates: Requirements 5.4
-    """
-    # 創建基礎配置
-    base_config = {
+def _base_config() -> Dict[str, Any]:
+    """屬性測試共用的基礎配置（Optimizer 評估時會 deepcopy，不會被修改）"""
+    return {
         'strategy_id': 'test-strategy',
         'strategy_name': 'Test Strategy',
         'version': '1.0.0',
@@ -107,11 +95,50 @@ def test_data_separation(market_data):
         'exit_conditions': {},
         'notifications': {},
     }
+
+
+@lru_cache(maxsize=None)
+def _flat_market_optimizer(strategy_class: type) -> Optimizer:
+    """200 根價格不變 K 棒上、已切好訓練/驗證集的優化器
+    
+    網格/隨機搜索只讀取優化器狀態，各 Hypothesis 範例可共用同一個實例，
+    不必每個範例重建 DataFrame 並重新切分。
+    """
+    n_candles = 200
+    # 每小時一根，最後一根在一小時前（只讀一次時鐘）
+    timestamps = pd.date_range(end=datetime.now() - timedelta(hours=1), periods=n_candles, freq='h')
+    base_price = 10000.0
+    
+    data = {
+        'timestamp': timestamps,
+        'open': [base_price] * n_candles,
+        'high': [base_price * 1.01] * n_candles,
+        'low': [base_price * 0.99] * n_candles,
+        'close': [base_price] * n_candles,
+        'volume': [1000.0] * n_candles,
+    }
+    
+    return Optimizer(
+        strategy_class=strategy_class,
+        base_config=_base_config(),
+        market_data={'1h': pd.DataFrame(data)},
+        train_ratio=0.7,
+    )
+
+
+# Feature: multi-strategy-system, Property 12: 參數優化數據分離
+@given(market_data_strategy())
+@settings(deadline=None, suppress_health_check=[HealthCheck.data_too_large])
+def test_data_separation(market_data):
+    """
+    對於任何參數優化過程，訓練集和驗證集不應該有重疊的數據點。
     
+    Validates: Requirements 5.4
+    """
     # 創建優化器
     optimizer = Optimizer(
         strategy_class=MultiTimeframeStrategy,
-        base_config=base_config,
+        base_config=_base_config(),
         market_data=market_data,
         train_ratio=0.7,
     )
@@ -121,12 +148,8 @@ def test_data_separation(market_data):
         train_df = optimizer.train_data[timeframe]
         validation_df = optimizer.validation_data[timeframe]
         
-        # 獲取時間戳
-        train_timestamps = set(train_df['timestamp'].tolist())
-        validation_timestamps = set(validation_df['timestamp'].tolist())
-        
-        # 驗證沒有重疊
-        overlap = train_timestamps.intersection(validation_timestamps)
+        # 驗證沒有重疊（Index 交集直接在 int64 時間戳上運算，不轉成 Python 物件）
+        overlap = pd.Index(train_df['timestamp']).intersection(pd.Index(validation_df['timestamp']))
         assert len(overlap) == 0, f"訓練集和驗證集有 {len(overlap)} 個重疊的數據點"
         
         # 驗證訓練集在驗證集之前
@@ -138,68 +161,20 @@ def test_data_separation(market_data):
 
 # Feature: multi-strategy-system, Property 13: 網格搜索完整性
 @given(param_grid_strategy())
-@settings(max_examples=50, deadline=None)
+@settings(deadline=None)
 def test_grid_search_completeness(param_grid):
     """
     對於任何定義的參數網格，網格搜索應該測試所有可能的參數組合。
     
     Validates: Requirements 5.1
     """
-    # 計算預期的組合數
-    expected_combinations = 1
-    for values in param_grid.values():
-        expected_combinations *= len(values)
-    
-    # 如果組合數太大，跳過測試
+    # 先只由網格算出預期組合數並檢查假設，被拒絕的範例不做任何建置
+    # （param_grid_strategy 最多 3 個參數 × 4 個值 = 64 組，此假設目前不會拒絕範例）
+    expected_combinations = math.prod(len(values) for values in param_grid.values())
     assume(expected_combinations <= 100)
     
-    # 創建簡單的市場數據
-    n_candles = 200
-    timestamps = [datetime.now() - timedelta(hours=i) for i in range(n_candles, 0, -1)]
-    base_price = 10000.0
-    
-    data = {
-        'timestamp': timestamps,
-        'open': [base_price] * n_candles,
-        'high': [base_price * 1.01] * n_candles,
-        'low': [base_price * 0.99] * n_candles,
-        'close': [base_price] * n_candles,
-        'volume': [1000.0] * n_candles,
-    }
-    
-    market_data = {'1h': pd.DataFrame(data)}
-    
-    # 創建基礎配置
-    base_config = {
-        'strategy_id': 'test-strategy',
-        'strategy_name': 'Test Strategy',
-        'version': '1.0.0',
-        'enabled': True,
-        'symbol': 'BTCUSDT',
-        'timeframes': ['1h'],
-        'parameters': {
-            'stop_loss_atr': 1.5,
-            'take_profit_atr': 3.0,
-        },
-        'risk_management': {
-            'position_size': 0.1,
-            'leverage': 1,
-            'max_trades_per_day': 10,
-            'max_consecutive_losses': 5,
-            'daily_loss_limit': 0.5,
-        },
-        'entry_conditions': [],
-        'exit_conditions': {},
-        'notifications': {},
-    }
-    
-    # 創建優化器
-    optimizer = Optimizer(
-        strategy_class=BreakoutStrategy,  # 單週期策略，可在單一 '1h' 測試資料上跑
-        base_config=base_config,
-        market_data=market_data,
-        train_ratio=0.7,
-    )
+    # 單週期策略，可在單一 '1h' 測試資料上跑
+    optimizer = _flat_market_optimizer(BreakoutStrategy)
 
     # 執行網格搜索
     result = optimizer.grid_search(param_grid)
@@ -208,17 +183,18 @@ def test_grid_search_completeness(param_grid):
     assert len(result.all_results) == expected_combinations, \
         f"應該測試 {expected_combinations} 個組合，實際測試了 {len(result.all_results)} 個"
     
-    # 驗證所有參數組合都是唯一的
+    # 驗證所有參數組合都是唯一的（鍵集合固定，按網格順序取值即可，不必排序）
+    param_names = tuple(param_grid)
     tested_combinations = set()
     for res in result.all_results:
-        params_tuple = tuple(sorted(res['params'].items()))
+        params_tuple = tuple(res['params'][name] for name in param_names)
         assert params_tuple not in tested_combinations, "發現重複的參數組合"
         tested_combinations.add(params_tuple)
 
 
 # Feature: multi-strategy-system, Property 14: 優化報告完整性
 @given(st.integers(min_value=5, max_value=20))
-@settings(max_examples=50, deadline=None)
+@settings(deadline=None)
 def test_optimization_report_completeness(n_iterations):
     """
     對於任何完成的參數優化，生成的報告應該包含最佳參數、訓練集性能、
@@ -226,62 +202,16 @@ def test_optimization_report_completeness(n_iterations):
     
     Validates: Requirements 5.6, 5.7
     """
-    # 創建簡單的市場數據
-    n_candles = 200
-    timestamps = [datetime.now() - timedelta(hours=i) for i in range(n_candles, 0, -1)]
-    base_price = 10000.0
-    
-    data = {
-        'timestamp': timestamps,
-        'open': [base_price] * n_candles,
-        'high': [base_price * 1.01] * n_candles,
-        'low': [base_price * 0.99] * n_candles,
-        'close': [base_price] * n_candles,
-        'volume': [1000.0] * n_candles,
-    }
-    
-    market_data = {'1h': pd.DataFrame(data)}
-    
-    # 創建基礎配置
-    base_config = {
-        'strategy_id': 'test-strategy',
-        'strategy_name': 'Test Strategy',
-        'version': '1.0.0',
-        'enabled': True,
-        'symbol': 'BTCUSDT',
-        'timeframes': ['1h'],
-        'parameters': {
-            'stop_loss_atr': 1.5,
-            'take_profit_atr': 3.0,
-        },
-        'risk_management': {
-            'position_size': 0.1,
-            'leverage': 1,
-            'max_trades_per_day': 10,
-            'max_consecutive_losses': 5,
-            'daily_loss_limit': 0.5,
-        },
-        'entry_conditions': [],
-        'exit_conditions': {},
-        'notifications': {},
-    }
-    
-    # 創建優化器
-    optimizer = Optimizer(
-        strategy_class=MultiTimeframeStrategy,
-        base_config=base_config,
-        market_data=market_data,
-        train_ratio=0.7,
-    )
+    optimizer = _flat_market_optimizer(MultiTimeframeStrategy)
     
     # 定義參數分佈
     param_distributions = {
-        'param_1': lambda: np.random.uniform(0.5, 5.0),
-        'param_2': lambda: np.random.uniform(1.0, 10.0),
+        'param_1': (0.5, 5.0),
+        'param_2': (1.0, 10.0),
     }
     
-    # 執行隨機搜索
-    result = optimizer.random_search(param_distributions, n_iterations=n_iterations)
+    # 執行隨機搜索（平盤數據上各組參數評分相同，連續 3 次未改善即停止）
+    result = optimizer.random_search(param_distributions, n_iterations=n_iterations, patience=3)
     
     # 驗證結果包含所有必需字段
     assert result.best_params is not None, "結果應該包含最佳參數"
@@ -320,7 +250,8 @@ def test_optimizer_initialization():
     """測試優化器初始化"""
     # 創建簡單的市場數據
     n_candles = 100
-    timestamps = [datetime.now() - timedelta(hours=i) for i in range(n_candles, 0, -1)]
+    # 每小時一根，最後一根在一小時前（只讀一次時鐘）
+    timestamps = pd.date_range(end=datetime.now() - timedelta(hours=1), periods=n_candles, freq='h')
     
     data = {
         'timestamp': timestamps,
@@ -333,31 +264,11 @@ def test_optimizer_initialization():
     
     market_data = {'1h': pd.DataFrame(data)}
     
-    base_config = {
-        'strategy_id': 'test-strategy',
-        'strategy_name': 'Test Strategy',
-        'version': '1.0.0',
-        'enabled': True,
-        'symbol': 'BTCUSDT',
-        'timeframes': ['1h'],
-        'parameters': {},
-        'risk_management': {
-            'position_size': 0.1,
-            'leverage': 1,
-            'max_trades_per_day': 10,
-            'max_consecutive_losses': 5,
-            'daily_loss_limit': 0.5,
-        },
-        'entry_conditions': [],
-        'exit_conditions': {},
-        'notifications': {},
-    }
-    
     # 測試不同的訓練集比例
     for train_ratio in [0.5, 0.6, 0.7, 0.8]:
         optimizer = Optimizer(
             strategy_class=MultiTimeframeStrategy,
-            base_config=base_config,
+            base_config=_base_config(),
             market_data=market_data,
             train_ratio=train_ratio,
         )
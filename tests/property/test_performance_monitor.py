@@ -72,7 +72,7 @@ def trades_list_strategy(draw, strategy_id: str, min_size: int = 1, max_size: in
 
 
 # Feature: multi-strategy-system, Property 20: 實時收益率計算正確性
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 @given(
     strategy_id=strategy_id_strategy(),
     initial_capital=st.floats(min_value=100, max_value=100000),
@@ -119,7 +119,7 @@ def test_return_rate_calculation_correctness(strategy_id, initial_capital, trade
 
 
 # Feature: multi-strategy-system, Property 21: 異常警報觸發
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 @given(
     strategy_id=strategy_id_strategy(),
     initial_capital=st.floats(min_value=1000, max_value=10000),
@@ -166,7 +166,7 @@ def test_anomaly_alert_trigger(strategy_id, initial_capital, consecutive_losses)
 
 
 # Feature: multi-strategy-system, Property 22: 策略退化檢測
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 @given(
     strategy_id=strategy_id_strategy(),
     initial_capital=st.floats(min_value=1000, max_value=10000),
@@ -249,7 +249,7 @@ def test_strategy_degradation_detection(
 
 
 # Feature: multi-strategy-system, Property 23: 連續虧損自動暫停
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 @given(
     strategy_id=strategy_id_strategy(),
     initial_capital=st.floats(min_value=1000, max_value=10000),
@@ -301,7 +301,7 @@ def test_consecutive_loss_auto_halt(strategy_id, initial_capital, consecutive_lo
 
 
 # 額外測試：指標歷史記錄
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 @given(
     strategy_id=strategy_id_strategy(),
     initial_capital=st.floats(min_value=1000, max_value=10000),
@@ -334,7 +334,7 @@ def test_metrics_history_tracking(strategy_id, initial_capital, trades):
 
 
 # 額外測試：回測基準比較
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 @given(
     strategy_id=strategy_id_strategy(),
     initial_capital=st.floats(min_value=1000, max_value=10000),
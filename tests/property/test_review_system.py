@@ -76,7 +76,7 @@ def trade_note_strategy(draw, trade_id: str):
     note_text=st.text(min_size=1, max_size=200),
     tags=st.lists(st.text(min_size=1, max_size=20), max_size=5)
 )
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_trade_note_roundtrip(trade, note_text, tags):
     """
     對於任何交易，添加註記和標籤後，查詢該交易應該返回相同的註記和標籤。
@@ -111,7 +111,7 @@ def test_trade_note_roundtrip(trade, note_text, tags):
     note_text=st.text(min_size=1, max_size=200),
     tags=st.lists(st.text(min_size=1, max_size=20), max_size=5)
 )
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_trade_note_persistence_roundtrip(trade, note_text, tags):
     """
     對於任何交易，添加註記後保存，重新載入系統應該返回相同的註記。
@@ -149,7 +149,7 @@ def test_trade_note_persistence_roundtrip(trade, note_text, tags):
         max_value=datetime(2024, 12, 31)
     )
 )
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_review_report_time_range(trades, report_date):
     """
     對於任何覆盤報告（每日/每週/每月），報告中包含的交易時間應該都在指定的時間範圍內。
@@ -184,7 +184,7 @@ def test_review_report_time_range(trades, report_date):
         max_value=datetime(2024, 12, 24)
     )
 )
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_weekly_report_time_range(trades, week_start):
     """
     對於任何週報告，報告中包含的交易時間應該都在指定週內。
@@ -216,7 +216,7 @@ def test_weekly_report_time_range(trades, week_start):
     year=st.integers(min_value=2024, max_value=2024),
     month=st.integers(min_value=1, max_value=12)
 )
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_monthly_report_time_range(trades, year, month):
     """
     對於任何月報告，報告中包含的交易時間應該都在指定月份內。
@@ -250,7 +250,7 @@ def test_monthly_report_time_range(trades, year, month):
 @given(
     trades=st.lists(trade_strategy(), min_size=1, max_size=10)
 )
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_review_data_export_import_roundtrip(trades):
     """
     對於任何覆盤數據，導出到文件後再導入，應該得到等價的數據（所有關鍵字段相同）。
@@ -317,7 +317,7 @@ def test_review_data_export_import_roundtrip(trades):
     export_start_offset=st.integers(min_value=0, max_value=5),
     export_days=st.integers(min_value=1, max_value=10)
 )
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_partial_review_data_export_import(trades, export_start_offset, export_days):
     """
     對於任何部分覆盤數據（指定時間範圍），導出後再導入應該只包含該時間範圍內的數據。
@@ -358,7 +358,7 @@ def test_partial_review_data_export_import(trades, export_start_offset, export_d
 # ========== 額外的正確性測試 ==========
 
 @given(trade=trade_strategy())
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_execution_quality_score_range(trade):
     """執行質量評分應該在 0-100 範圍內"""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -375,7 +375,7 @@ def test_execution_quality_score_range(trade):
 
 
 @given(trades=st.lists(trade_strategy(), min_size=1, max_size=20))
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_report_statistics_consistency(trades):
     """報告統計數據應該與實際交易一致"""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -9,7 +9,8 @@ from hypothesis import given, strategies as st, assume
 from datetime import datetime
 
 from src.managers.risk_manager import RiskManager
-from src.models.risk import RiskConfig, GlobalRiskState
+from src.models import risk as risk_models
+from src.models.risk import RiskConfig, GlobalRiskState, RiskEvent
 from src.models.trading import Signal, Trade
 from src.models.state import StrategyState
 
@@ -334,6 +335,102 @@ def test_risk_event_recording(initial_capital, config, num_violations):
         assert 'action_taken' in event_dict
 
 
+# Feature: multi-strategy-system, Property 27: 批次更新與逐筆更新等價
+@given(
+    initial_capital=st.floats(min_value=1000, max_value=100000),
+    config=risk_config_strategy(),
+    trades=st.lists(trade_strategy(), min_size=0, max_size=30),
+    open_position=st.floats(min_value=0, max_value=500000),
+)
+def test_update_batch_matches_per_trade_updates(initial_capital, config, trades, open_position):
+    """
+    對於任何交易序列，update_batch 的結果應與逐筆 update_risk_state +
+    should_halt_trading 完全相同（資金、峰值、倉位、暫停狀態與風險事件）。
+    """
+    sequential = RiskManager(config, initial_capital)
+    batch = RiskManager(config, initial_capital)
+    for manager in (sequential, batch):
+        manager.add_position("test-strategy", open_position)
+    
+    for trade in trades:
+        sequential.update_risk_state(trade)
+        expected = sequential.should_halt_trading()
+    if not trades:
+        expected = sequential.should_halt_trading()
+    
+    assert batch.update_batch(trades) == expected
+    
+    seq_state, batch_state = sequential.global_state, batch.global_state
+    assert batch_state.current_capital == seq_state.current_capital
+    assert batch_state.peak_capital == seq_state.peak_capital
+    assert batch_state.daily_pnl == seq_state.daily_pnl
+    assert batch_state.strategy_positions == pytest.approx(seq_state.strategy_positions)
+    assert batch_state.trading_halted == seq_state.trading_halted
+    assert batch_state.halt_reason == seq_state.halt_reason
+    assert [(e.event_type, e.trigger_value) for e in batch_state.risk_events] == \
+        [(e.event_type, e.trigger_value) for e in seq_state.risk_events]
+
+
+# Feature: multi-strategy-system, Property 28: 暫停判斷快速路徑與完整檢查一致
+@given(
+    config=risk_config_strategy(),
+    peak_capital=st.floats(min_value=1000, max_value=100000),
+    capital_ratio=st.floats(min_value=0.3, max_value=1.5),
+    daily_start_ratio=st.floats(min_value=0.5, max_value=1.5),
+)
+def test_should_halt_trading_matches_check_global_risk(config, peak_capital, capital_ratio, daily_start_ratio):
+    """
+    對於任何資金狀態，should_halt_trading 的判斷與原因應與 check_global_risk 一致，
+    且資金在峰值、今日未虧損時不記錄任何風險事件。
+    """
+    managers = [RiskManager(config, peak_capital) for _ in range(2)]
+    for manager in managers:
+        state = manager.global_state
+        state.daily_start_capital = peak_capital * daily_start_ratio
+        state.update_capital(peak_capital * capital_ratio)
+    
+    should_halt, reason = managers[0].should_halt_trading()
+    passed, expected_reason = managers[1].check_global_risk()
+    
+    assert should_halt == (not passed)
+    assert reason == expected_reason
+    assert len(managers[0].global_state.risk_events) == len(managers[1].global_state.risk_events)
+
+
+# Feature: multi-strategy-system, Property 29: 風險比例快取隨欄位賦值失效
+@given(
+    writes=st.lists(
+        st.tuples(
+            st.sampled_from(['current_capital', 'peak_capital', 'daily_start_capital',
+                             'daily_pnl', 'total_position_value', 'update_capital']),
+            st.floats(min_value=-1000, max_value=100000),
+        ),
+        max_size=10,
+    ),
+)
+def test_cached_risk_ratios_follow_field_writes(writes):
+    """
+    對於任何欄位賦值與 update_capital 序列，快取的回撤、今日虧損與倉位使用率
+    應與未查詢過、直接寫入相同欄位值的狀態計算結果相同。
+    """
+    state = GlobalRiskState(initial_capital=1000.0, current_capital=1000.0,
+                            peak_capital=1000.0, daily_start_capital=1000.0)
+    for name, value in writes:
+        state.get_current_drawdown(), state.get_daily_loss_pct(), state.get_position_usage()
+        if name == 'update_capital':
+            state.update_capital(value)
+        else:
+            setattr(state, name, value)
+    
+    fresh = GlobalRiskState(initial_capital=1000.0, current_capital=1000.0,
+                            peak_capital=1000.0, daily_start_capital=1000.0)
+    for name in ('current_capital', 'peak_capital', 'daily_start_capital', 'daily_pnl', 'total_position_value'):
+        setattr(fresh, name, getattr(state, name))  # 逐欄寫入，繞過 __post_init__ 對 0 值的替換
+    assert state.get_current_drawdown() == fresh.get_current_drawdown()
+    assert state.get_daily_loss_pct() == fresh.get_daily_loss_pct()
+    assert state.get_position_usage() == fresh.get_position_usage()
+
+
 # ============================================================================
 # 單元測試
 # ============================================================================
@@ -466,3 +563,24 @@ def test_reset_daily_stats():
     risk_manager.reset_daily_stats()
     assert risk_manager.global_state.daily_pnl == 0.0
     assert risk_manager.global_state.daily_start_capital == 9500.0
+
+
+def test_risk_events_keep_most_recent(monkeypatch):
+    """測試風險事件只保留最近 MAX_RISK_EVENTS 筆"""
+    monkeypatch.setattr(risk_models, 'MAX_RISK_EVENTS', 3)
+    risk_manager = RiskManager(RiskConfig(), 10000.0)
+    
+    for i in range(5):
+        risk_manager.global_state.add_risk_event(RiskEvent(
+            timestamp=datetime.now(),
+            event_type='position_limit',
+            strategy_id=f"strategy-{i}",
+            trigger_value=0.5,
+            limit_value=0.3,
+            action_taken='reject_signal',
+        ))
+    
+    events = risk_manager.get_risk_events()
+    assert [e.strategy_id for e in events] == ["strategy-2", "strategy-3", "strategy-4"]
+    assert risk_manager.global_state.risk_events[-1].strategy_id == "strategy-4"
+    assert risk_manager.global_state.to_dict()['risk_events_count'] == 3
@@ -180,7 +180,7 @@ class IncompleteStrategy(Strategy):
 
 # Feature: multi-strategy-system, Property 8: 策略接口一致性
 @given(config=strategy_config_strategy())
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_strategy_interface_consistency(config):
     """
     Property 8: 策略接口一致性
@@ -237,7 +237,7 @@ def test_strategy_interface_consistency(config):
 
 
 @given(config=strategy_config_strategy(), market_data=market_data_strategy())
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_strategy_methods_callable(config, market_data):
     """
     驗證策略的所有方法都可以正常調用且返回正確類型
@@ -22,6 +22,10 @@ from src.models.config import StrategyConfig, RiskManagement, ExitConditions, No
 from src.models.state import StrategyState
 
 
+# 專案內建的策略配置目錄（不依賴 pytest 的工作目錄）
+STRATEGIES_DIR = Path(__file__).resolve().parents[2] / "strategies"
+
+
 # ============================================================================
 # 測試數據生成器
 # ============================================================================
@@ -118,7 +122,7 @@ def create_temp_strategy_dir(configs: list) -> Path:
 
 # Feature: multi-strategy-system, Property 1: 策略配置載入完整性
 @given(configs=st.lists(valid_strategy_config_dict(), min_size=1, max_size=5, unique_by=lambda x: x['strategy_id']))
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_strategy_loading_completeness(configs):
     """
     Property 1: 策略配置載入完整性
@@ -162,7 +166,7 @@ def test_strategy_loading_completeness(configs):
     valid_configs=st.lists(valid_strategy_config_dict(), min_size=1, max_size=3, unique_by=lambda x: x['strategy_id']),
     invalid_configs=st.lists(invalid_strategy_config_dict(), min_size=1, max_size=2)
 )
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_config_error_isolation(valid_configs, invalid_configs):
     """
     Property 2: 配置錯誤隔離
@@ -208,7 +212,7 @@ def test_config_error_isolation(valid_configs, invalid_configs):
 
 # Feature: multi-strategy-system, Property 4: 策略狀態隔離
 @given(configs=st.lists(valid_strategy_config_dict(), min_size=2, max_size=5, unique_by=lambda x: x['strategy_id']))
-@settings(max_examples=100, deadline=None)
+@settings(deadline=None)
 def test_strategy_state_isolation(configs):
     """
     Property 4: 策略狀態隔離
@@ -461,5 +465,24 @@ def test_get_summary():
         assert 'strategy2' in summary['strategies']
 
 
+
+def test_load_strategies_idempotent():
+    """測試重複載入沿用既有策略實例，不視為 ID 重複"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shutil.copy(STRATEGIES_DIR / "breakout-strategy.json", temp_dir)
+        manager = StrategyManager(strategies_dir=temp_dir)
+        
+        first = manager.load_strategies()
+        strategy = manager.get_strategy(first[0])
+        second = manager.load_strategies()
+        
+        assert second == first
+        assert manager.get_strategy(first[0]) is strategy
+        
+        # 不同文件使用相同 ID 仍視為重複
+        shutil.copy(Path(temp_dir) / "breakout-strategy.json", Path(temp_dir) / "copy.json")
+        assert manager.load_strategies().count(first[0]) == 1
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,82 @@
+"""
+BreakoutStrategy 向量化進場（generate_signals_batch）
+
+驗證整段向量化算出的進場方向與逐根 generate_signal 的判斷逐根一致，
+以及 prepare() 預算後回測結果與未預算時完全相同。
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.execution.backtest_engine import BacktestEngine
+from src.models.market_data import MarketData, TimeframeData
+from src.strategies.breakout_strategy import BreakoutStrategy
+from tests.fixtures.config import backtest_config
+from tests.fixtures.market_data import random_walk_ohlcv
+
+
+def _config(**params):
+    return backtest_config("breakout-test", **params)
+
+
+def _random_walk(n=400, seed=7):
+    return random_walk_ohlcv(n, seed)
+
+
+def _per_bar_actions(strategy, df):
+    actions = []
+    for i in range(len(df)):
+        window = df.iloc[:i + 1]
+        if len(window) < strategy.lookback_period + 1:
+            actions.append(0)
+            continue
+        tf = TimeframeData(timeframe='1h', ohlcv=window, indicators={})
+        ok, direction = strategy._check_entry_conditions(strategy._calculate_indicators(tf))
+        actions.append(0 if not ok else (1 if direction == 'long' else -1))
+    return np.array(actions, dtype=np.int8)
+
+
+def test_batch_actions_match_per_bar_decisions():
+    strategy = BreakoutStrategy(_config(atr_threshold=0.005, volume_threshold=1.2))
+    df = _random_walk()
+
+    batch = strategy.generate_signals_batch(df)
+
+    assert batch.dtype == np.int8
+    assert len(batch) == len(df)
+    assert (batch != 0).any()
+    np.testing.assert_array_equal(batch, _per_bar_actions(strategy, df))
+
+
+def test_prepared_backtest_matches_unprepared():
+    params = dict(atr_threshold=0.005, volume_threshold=1.2)
+    data = {'1h': _random_walk()}
+
+    prepared = BacktestEngine(10000).run_single_strategy(BreakoutStrategy(_config(**params)), data)
+
+    unprepared_strategy = BreakoutStrategy(_config(**params))
+    unprepared_strategy.prepare = lambda market_data: None
+    unprepared = BacktestEngine(10000).run_single_strategy(unprepared_strategy, data)
+
+    assert len(prepared.trades) > 0
+    assert [(t.entry_time, t.direction, t.exit_price) for t in prepared.trades] == \
+        [(t.entry_time, t.direction, t.exit_price) for t in unprepared.trades]
+    assert prepared.final_capital == unprepared.final_capital
+
+
+def test_live_signal_without_prepare_still_evaluates():
+    strategy = BreakoutStrategy(_config(atr_threshold=0.005, volume_threshold=1.2))
+    df = _random_walk()
+    idx = int(np.flatnonzero(strategy.generate_signals_batch(df))[0])
+    window = df.iloc[:idx + 1]
+    md = MarketData(symbol="BTCUSDT", timestamp=window['timestamp'].iloc[-1],
+                    timeframes={'1h': TimeframeData(timeframe='1h', ohlcv=window, indicators={})})
+
+    assert strategy.generate_signal(md).action in ('BUY', 'SELL')
+
+
+def test_backtest_clears_prepared_actions():
+    strategy = BreakoutStrategy(_config(atr_threshold=0.005, volume_threshold=1.2))
+    BacktestEngine(10000).run_single_strategy(strategy, {'1h': _random_walk()})
+
+    assert strategy._batch_actions is None
@@ -0,0 +1,81 @@
+"""
+parsed_env：.env 檔解析
+"""
+
+import pytest
+
+from src.utils import env as env_module
+from src.utils.env import parsed_env
+
+
+_SAMPLE = (
+    "# 註解\n"
+    "export A=1 # 行尾註解\n"
+    "B=\"x ${A} \\n y\" # 行尾註解\n"
+    "C='lit ${A} \\' q'\n"
+    "D=${MISSING_ENV_KEY:-dflt}/${A}\n"
+    "E=a#b\n"
+    "F=\n"
+    "G=\"multi\n"
+    "line\"\n"
+    "H = spaced  \n"
+    "NO_VALUE\n"
+)
+
+_EXPECTED = {
+    'A': '1',
+    'B': 'x 1 \n y',
+    'C': "lit 1 ' q",
+    'D': 'dflt/1',
+    'E': 'a#b',
+    'F': '',
+    'G': 'multi\nline',
+    'H': 'spaced',
+}
+
+
+@pytest.fixture
+def sample_env(tmp_path, monkeypatch):
+    monkeypatch.delenv('MISSING_ENV_KEY', raising=False)
+    env_file = tmp_path / '.env'
+    env_file.write_text(_SAMPLE, encoding='utf-8')
+    return env_file
+
+
+def test_fallback_parser_handles_dotenv_syntax(sample_env, monkeypatch):
+    monkeypatch.setattr(env_module, 'dotenv_values', None)
+    assert parsed_env(sample_env) == _EXPECTED
+
+
+def test_fallback_parser_matches_dotenv(sample_env):
+    dotenv = pytest.importorskip('dotenv')
+    expected = {k: v for k, v in dotenv.dotenv_values(sample_env).items() if v is not None}
+    assert env_module._parse_env_text(sample_env.read_text(encoding='utf-8')) == expected
+
+
+def test_rereads_modified_file_and_returns_copies(tmp_path, monkeypatch):
+    env_file = tmp_path / '.env'
+    env_file.write_text('SYMBOL=ETHUSDT\n', encoding='utf-8')
+    first = parsed_env(env_file)
+    first['SYMBOL'] = 'changed'
+
+    assert parsed_env(env_file)['SYMBOL'] == 'ETHUSDT'
+    env_file.write_text('SYMBOL=BTCUSDT\n', encoding='utf-8')
+    assert parsed_env(env_file)['SYMBOL'] == 'BTCUSDT'
+
+
+def test_relative_path_follows_working_directory(tmp_path, monkeypatch):
+    for name in ('a', 'b'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / '.env').write_text(f'SYMBOL={name}\n', encoding='utf-8')
+
+    monkeypatch.chdir(tmp_path / 'a')
+    assert parsed_env()['SYMBOL'] == 'a'
+    monkeypatch.chdir(tmp_path / 'b')
+    assert parsed_env()['SYMBOL'] == 'b'
+
+
+def test_missing_file_returns_empty(tmp_path):
+    assert parsed_env(tmp_path / 'missing.env') == {}
+    (tmp_path / 'missing.env').write_text('A=1\n', encoding='utf-8')
+    assert parsed_env(tmp_path / 'missing.env') == {'A': '1'}
@@ -0,0 +1,82 @@
+"""
+IncrementalRolling：逐根增量滾動視窗
+
+驗證逐根餵入「截至當根」的序列時，增量結果與 pandas rolling 一致；
+跳根、回補與同根值變動時整窗重建。
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.utils.rolling import IncrementalRolling, frame_keys
+
+
+def _series(n=1200, seed=3):
+    rng = np.random.default_rng(seed)
+    return np.arange(n), rng.normal(100, 10, n)
+
+
+def test_sliding_matches_pandas_rolling():
+    keys, values = _series()
+    window = 20
+    expected = pd.Series(values).rolling(window)
+    mean, high, low = expected.mean(), expected.max(), expected.min()
+    roll = IncrementalRolling(window)
+
+    for i in range(len(values)):
+        start = max(0, i + 1 - 300)  # 引擎只給最近 300 根
+        roll.update(keys[start:i + 1], values[start:i + 1])
+        if i < window - 1:
+            assert np.isnan(roll.mean)
+            continue
+        assert abs(roll.mean - mean[i]) < 1e-9
+        assert roll.max == high[i]
+        assert roll.min == low[i]
+
+
+def test_nan_only_affects_windows_containing_it():
+    keys, values = _series(400)
+    values[50] = np.nan
+    values[60:63] = np.nan
+    window = 20
+    expected = pd.Series(values).rolling(window)
+    mean, high, low = expected.mean(), expected.max(), expected.min()
+    roll = IncrementalRolling(window)
+
+    for i in range(window - 1, len(values)):
+        roll.update(keys[:i + 1], values[:i + 1])
+        np.testing.assert_allclose([roll.mean, roll.max, roll.min],
+                                   [mean[i], high[i], low[i]], rtol=1e-9, equal_nan=True)
+
+
+def test_rebuilds_on_gap_and_rewind():
+    keys, values = _series(200)
+    roll = IncrementalRolling(10)
+    roll.update(keys[:100], values[:100])
+
+    roll.update(keys[:150], values[:150])  # 跳根
+    assert abs(roll.mean - values[140:150].mean()) < 1e-9
+
+    roll.update(keys[:60], values[:60])  # 回補/倒退
+    assert abs(roll.mean - values[50:60].mean()) < 1e-9
+    assert roll.max == values[50:60].max()
+
+
+def test_same_bar_with_updated_value_rebuilds():
+    keys, values = _series(50)
+    roll = IncrementalRolling(10)
+    roll.update(keys, values)
+
+    live = values.copy()
+    live[-1] += 5.0  # 未收盤 K 線值變動
+    roll.update(keys, live)
+
+    assert abs(roll.mean - live[-10:].mean()) < 1e-9
+
+
+def test_frame_keys_prefers_timestamp_column():
+    ts = pd.date_range('2024-01-01', periods=3, freq='h')
+    df = pd.DataFrame({'timestamp': ts, 'close': [1.0, 2.0, 3.0]}, index=[7, 8, 9])
+
+    assert (frame_keys(df) == ts.to_numpy()).all()
+    assert (frame_keys(df.drop(columns='timestamp')) == np.array([7, 8, 9])).all()
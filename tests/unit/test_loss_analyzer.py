@@ -283,6 +283,31 @@ def test_loss_history_recording(analyzer, sample_losing_trade):
     assert analyzer.loss_history[0].trade_id == sample_losing_trade.trade_id
 
 
+def test_analyze_trades_matches_single_analysis(analyzer):
+    """測試批次分析與逐筆分析結果相同"""
+    trades = [
+        create_trade("batch-001", "long", 50000.0, 49000.0, "止損", stop_loss=49800.0),
+        create_trade("batch-002", "short", 3000.0, 3100.0, "止損", entry_hours_ago=0.5),
+        create_trade("batch-003", "long", 100.0, 95.0, "手動平倉", entry_hours_ago=30),
+    ]
+    
+    analyses = analyzer.analyze_trades(trades)
+    expected = [LossAnalyzer().analyze_trade(t) for t in trades]
+    
+    assert analyses == expected
+    assert analyzer.loss_history == expected
+
+
+def test_analyze_trades_rejects_winning_trade_without_recording(analyzer, sample_losing_trade):
+    """測試批次中有獲利交易時拋出錯誤且不寫入歷史"""
+    winning = create_trade("win-001", "long", 50000.0, 51000.0, "獲利")
+    
+    with pytest.raises(ValueError):
+        analyzer.analyze_trades([sample_losing_trade, winning])
+    
+    assert analyzer.loss_history == []
+
+
 def test_track_improvement_trend(analyzer):
     """測試追蹤改善趨勢"""
     trades = []
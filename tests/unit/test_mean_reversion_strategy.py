@@ -0,0 +1,101 @@
+"""
+MeanReversionStrategy 最新值指標核心
+
+驗證 _rsi_last_nb / _atr_last_nb 與逐序列計算的 _calculate_rsi / _calculate_atr
+最後一根相同（含資料不足、無漲跌等邊界），以及 prepare 批次預篩不改變回測交易。
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.execution.backtest_engine import BacktestEngine
+from src.strategies.mean_reversion_strategy import MeanReversionStrategy, _atr_last_nb, _rsi_last_nb
+from tests.fixtures.config import backtest_config
+from tests.fixtures.market_data import random_walk_ohlcv
+
+
+def _config(**params):
+    return backtest_config("mean-reversion-test", ["15m", "1h"],
+                           position_size=0.15, leverage=3, take_profit_atr=2.0, **params)
+
+
+def _random_walk(n=300, seed=11, freq='h'):
+    return random_walk_ohlcv(n, seed, freq)
+
+
+@pytest.mark.parametrize("n", [1, 13, 14, 15, 60, 300])
+def test_last_value_kernels_match_series(n):
+    strategy = MeanReversionStrategy(_config())
+    df = _random_walk().iloc[:n]
+    close = df['close'].to_numpy()
+
+    expected_rsi = strategy._calculate_rsi(df['close'], 14).iloc[-1]
+    expected_atr = strategy._calculate_atr(df, 14).iloc[-1]
+
+    np.testing.assert_allclose(_rsi_last_nb(close, 14), expected_rsi, rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(
+        _atr_last_nb(df['high'].to_numpy(), df['low'].to_numpy(), close, 14),
+        expected_atr, rtol=1e-12, equal_nan=True)
+
+
+def test_rsi_kernel_flat_and_one_sided_series():
+    strategy = MeanReversionStrategy(_config())
+    for close in (np.full(30, 100.0), np.arange(30, dtype=float), np.arange(30, 0, -1, dtype=float)):
+        expected = strategy._calculate_rsi(pd.Series(close), 14).iloc[-1]
+        np.testing.assert_allclose(_rsi_last_nb(close, 14), expected, equal_nan=True)
+
+
+def _rolling_bands(close, period, std_dev):
+    middle = close.rolling(period).mean()
+    std = close.rolling(period).std()
+    return middle + std * std_dev, middle, middle - std * std_dev
+
+
+@pytest.mark.parametrize("period", [1, 20])
+def test_bollinger_bands_match_rolling_with_nan(period):
+    strategy = MeanReversionStrategy(_config())
+    close = _random_walk(n=100)['close'].copy()
+    close.iloc[10] = np.nan
+
+    for actual, expected in zip(strategy._calculate_bollinger_bands(close, period, 2.0),
+                                _rolling_bands(close, period, 2.0)):
+        pd.testing.assert_series_equal(actual, expected, rtol=1e-9)
+    # NaN 只影響含它的窗格，之後的窗格照常有值
+    assert strategy._calculate_bollinger_bands(close, period, 2.0)[1].iloc[-5:].notna().all()
+
+
+def _two_timeframe_data(n=1200, seed=5):
+    """15m 隨機漫步與由其重取樣的 1h 數據（timestamp 欄位）"""
+    df_15m = _random_walk(n, seed, freq='15min')
+    df_15m['open'] = df_15m['close'].shift(1).fillna(df_15m['close'].iloc[0])
+    df_15m['volume'] = np.random.default_rng(seed).uniform(800, 1200, n)
+    df_1h = (df_15m.set_index('timestamp')
+             .resample('1h')
+             .agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+             .reset_index())
+    return {'15m': df_15m, '1h': df_1h}
+
+
+def test_batch_prefilter_keeps_backtest_trades():
+    """prepare 預篩只跳過不可能進場的根：回測交易與逐根判斷完全相同"""
+    data = _two_timeframe_data()
+    config = _config(rsi_oversold=40, rsi_overbought=60, deviation_threshold=0.005)
+    
+    batched = BacktestEngine(1000.0).run_single_strategy(MeanReversionStrategy(config), data)
+    
+    per_bar_strategy = MeanReversionStrategy(config)
+    per_bar_strategy.prepare = lambda market_data: None
+    per_bar = BacktestEngine(1000.0).run_single_strategy(per_bar_strategy, data)
+    
+    assert per_bar.total_trades > 0
+    assert [(t.entry_time, t.exit_time, t.direction, t.exit_price) for t in batched.trades] == \
+        [(t.entry_time, t.exit_time, t.direction, t.exit_price) for t in per_bar.trades]
+
+
+def test_backtest_clears_prepared_candidates():
+    """回測結束後清除預篩結果，之後的逐根判斷不受舊數據影響"""
+    strategy = MeanReversionStrategy(_config(rsi_oversold=40, rsi_overbought=60))
+    BacktestEngine(1000.0).run_single_strategy(strategy, _two_timeframe_data())
+    
+    assert strategy._batch_candidates is None
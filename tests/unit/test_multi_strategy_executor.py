@@ -313,6 +313,25 @@ def test_generate_signals_disabled_strategy(executor, test_strategy, market_data
     assert len(signals) == 0
 
 
+def test_generate_signals_skipped_when_halted(executor, test_strategy, market_data):
+    """測試全局暫停交易時不呼叫策略生成信號"""
+    test_strategy.signal_action = 'BUY'
+    executor.add_strategy(test_strategy)
+    
+    executor.risk_manager.global_state.halt_trading("測試暫停")
+    signals = executor.generate_signals(market_data)
+    
+    assert len(signals) == 0
+    assert test_strategy.call_count == 0
+    
+    # 恢復後照常生成
+    executor.risk_manager.global_state.resume_trading()
+    signals = executor.generate_signals(market_data)
+    
+    assert len(signals) == 1
+    assert test_strategy.call_count == 1
+
+
 def test_filter_signals_priority(executor, market_data):
     """測試信號優先級過濾"""
     # 創建兩個策略
@@ -559,6 +578,17 @@ def test_get_trade_history_all_strategies(executor, market_data):
     assert len(all_history) >= 1  # 至少有一個交易
 
 
+def test_reset_trade_history(executor, test_strategy):
+    """測試清空交易歷史"""
+    executor.add_strategy(test_strategy)
+    executor.trade_history["test-strategy-1"].append(object())
+    
+    executor.reset_trade_history()
+    
+    assert executor.trade_history == {"test-strategy-1": []}
+    assert executor.get_trade_history() == []
+
+
 def test_reset_daily_stats(executor, test_strategy):
     """測試重置每日統計"""
     executor.add_strategy(test_strategy)
@@ -9,7 +9,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-from src.strategies.multi_timeframe_strategy import MultiTimeframeStrategy
+from src.strategies.multi_timeframe_strategy import MultiTimeframeStrategy, Trend
 from src.models.config import StrategyConfig, RiskManagement, ExitConditions, NotificationConfig
 from src.models.market_data import MarketData, TimeframeData
 from src.models.trading import Position
@@ -53,16 +53,17 @@ def market_data():
     # 生成測試數據
     n_candles = 100
     base_price = 3000.0
+    rng = np.random.default_rng(42)
     
     def generate_ohlcv(n, base):
         dates = pd.date_range(end=datetime.now(), periods=n, freq='15min')
         return pd.DataFrame({
             'timestamp': dates,
-            'open': [base + np.random.randn() * 10 for _ in range(n)],
-            'high': [base + np.random.randn() * 10 + 5 for _ in range(n)],
-            'low': [base + np.random.randn() * 10 - 5 for _ in range(n)],
-            'close': [base + np.random.randn() * 10 for _ in range(n)],
-            'volume': [1000 + np.random.randn() * 100 for _ in range(n)],
+            'open': [base + rng.standard_normal() * 10 for _ in range(n)],
+            'high': [base + rng.standard_normal() * 10 + 5 for _ in range(n)],
+            'low': [base + rng.standard_normal() * 10 - 5 for _ in range(n)],
+            'close': [base + rng.standard_normal() * 10 for _ in range(n)],
+            'volume': [1000 + rng.standard_normal() * 100 for _ in range(n)],
         })
     
     # 創建多週期數據
@@ -241,11 +242,13 @@ def test_calculate_indicators(strategy_config, market_data):
     assert 'volume_ratio' in indicators
     
     # 驗證指標值合理
-    assert indicators['trend_1d'] in ['Uptrend', 'Downtrend', 'Sideways', 'Unknown']
+    assert indicators['trend_1d'] in list(Trend)
     assert 0 <= indicators['rsi_15m'] <= 100
     assert indicators['atr_1h'] >= 0
     assert indicators['price'] > 0
     assert indicators['volume_ratio'] >= 0
+    assert indicators['dist_ema20'] == abs(indicators['price'] - indicators['ema20_1h']) / indicators['ema20_1h']
+    assert indicators['dist_ema50'] == abs(indicators['price'] - indicators['ema50_1h']) / indicators['ema50_1h']
 
 
 def test_calculate_confidence(strategy_config):
@@ -254,9 +257,9 @@ def test_calculate_confidence(strategy_config):
     
     # 高置信度場景
     high_confidence_indicators = {
-        'trend_1d': 'Uptrend',
-        'trend_4h': 'Uptrend',
-        'trend_1h': 'Uptrend',
+        'trend_1d': Trend.UP,
+        'trend_4h': Trend.UP,
+        'trend_1h': Trend.UP,
         'rsi_15m': 50.0,
         'price': 3000.0,
         'ema20_1h': 2995.0,
@@ -269,9 +272,9 @@ def test_calculate_confidence(strategy_config):
     
     # 低置信度場景
     low_confidence_indicators = {
-        'trend_1d': 'Downtrend',
-        'trend_4h': 'Uptrend',
-        'trend_1h': 'Uptrend',
+        'trend_1d': Trend.DOWN,
+        'trend_4h': Trend.UP,
+        'trend_1h': Trend.UP,
         'rsi_15m': 75.0,
         'price': 3000.0,
         'ema20_1h': 2900.0,
@@ -289,8 +292,8 @@ def test_check_entry_conditions(strategy_config):
     
     # 滿足條件的場景
     good_indicators = {
-        'trend_4h': 'Uptrend',
-        'trend_1h': 'Uptrend',
+        'trend_4h': Trend.UP,
+        'trend_1h': Trend.UP,
         'rsi_15m': 50.0,
         'price': 3000.0,
         'ema20_1h': 2995.0,
@@ -304,7 +307,7 @@ def test_check_entry_conditions(strategy_config):
     
     # 趨勢不一致
     bad_trend_indicators = good_indicators.copy()
-    bad_trend_indicators['trend_1h'] = 'Downtrend'
+    bad_trend_indicators['trend_1h'] = Trend.DOWN
     
     should_enter, direction = strategy._check_entry_conditions(bad_trend_indicators)
     assert not should_enter
@@ -330,3 +333,299 @@ def test_check_entry_conditions(strategy_config):
     
     should_enter, direction = strategy._check_entry_conditions(bad_volume_indicators)
     assert not should_enter
+
+
+def test_incremental_ema_matches_full_ewm(strategy_config):
+    """測試遞迴 EMA 逐根推進與整段 ewm 一致（含未收盤 K 線更新）"""
+    strategy = MultiTimeframeStrategy(strategy_config)
+    n = 120
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'close': 3000 + np.cumsum(rng.standard_normal(n) * 10),
+    })
+    expected_fast = df['close'].ewm(span=20, adjust=False).mean()
+    expected_slow = df['close'].ewm(span=50, adjust=False).mean()
+    
+    for i in range(60, n):
+        tf = TimeframeData(timeframe='1h', ohlcv=df.iloc[:i + 1], indicators={})
+        ema_fast, ema_slow = strategy._update_emas(tf, 20, 50)
+        assert abs(ema_fast - expected_fast.iloc[i]) < 1e-9
+        assert abs(ema_slow - expected_slow.iloc[i]) < 1e-9
+    
+    # 同一根收盤價變動：以前一根 EMA 重算
+    live = df.copy()
+    live.loc[n - 1, 'close'] += 50
+    tf = TimeframeData(timeframe='1h', ohlcv=live, indicators={})
+    live_expected = live['close'].ewm(span=20, adjust=False).mean().iloc[-1]
+    assert abs(strategy._update_emas(tf, 20, 50)[0] - live_expected) < 1e-9
+
+
+def _wilder_reference(values, period):
+    """Wilder RMA 參考實作：前 period 個簡單平均為種子，之後 (prev*(p-1)+x)/p"""
+    out = [np.nan] * len(values)
+    avg = float(np.mean(values[:period]))
+    out[period - 1] = avg
+    for i in range(period, len(values)):
+        avg = (avg * (period - 1) + values[i]) / period
+        out[i] = avg
+    return out
+
+
+def test_wilder_rsi_atr_incremental_matches_reference(strategy_config):
+    """測試 Wilder RSI/ATR 逐根遞迴結果與參考實作一致"""
+    strategy = MultiTimeframeStrategy(strategy_config)
+    n = 80
+    rng = np.random.default_rng(3)
+    close = 3000 + np.cumsum(rng.standard_normal(n) * 10)
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='15min'),
+        'open': close,
+        'high': close + rng.random(n) * 5,
+        'low': close - rng.random(n) * 5,
+        'close': close,
+        'volume': np.full(n, 1000.0),
+    })
+    delta = np.diff(close)
+    avg_gain = _wilder_reference(np.where(delta > 0, delta, 0.0), 14)
+    avg_loss = _wilder_reference(np.where(delta < 0, -delta, 0.0), 14)
+    prev_close = close[:-1]
+    tr = np.maximum(df['high'].values[1:] - df['low'].values[1:],
+                    np.maximum(np.abs(df['high'].values[1:] - prev_close),
+                               np.abs(df['low'].values[1:] - prev_close)))
+    atr = _wilder_reference(tr, 14)
+    
+    for i in range(14, n):
+        tf = TimeframeData(timeframe='15m', ohlcv=df.iloc[:i + 1], indicators={})
+        expected_rsi = 100 - 100 / (1 + avg_gain[i - 1] / avg_loss[i - 1])
+        assert abs(strategy._calculate_rsi(tf, 14) - expected_rsi) < 1e-9
+        assert abs(strategy._calculate_atr(tf, 14) - atr[i - 1]) < 1e-9
+
+
+def test_timeframe_data_column_arrays_are_cached():
+    """測試 TimeframeData 欄位陣列為連續 float64 且同一實例只轉換一次"""
+    df = pd.DataFrame({
+        'open': [1, 2, 3],
+        'high': [2, 3, 4],
+        'low': [0, 1, 2],
+        'close': [1, 2, 3],
+        'volume': [10, 20, 30],
+    })
+    tf = TimeframeData(timeframe='1h', ohlcv=df, indicators={})
+    
+    assert tf.close_np.dtype == np.float64
+    assert tf.close_np.flags['C_CONTIGUOUS']
+    assert tf.close_np is tf.close_np
+    np.testing.assert_array_equal(tf.volume_np, [10.0, 20.0, 30.0])
+    assert tf.column_array('close', np.float32).dtype == np.float32
+    assert tf.column_array('close', np.float32) is tf.column_array('close', np.float32)
+    assert tf.close_np.dtype == np.float64
+
+
+def test_entry_conditions_batch_matches_scalar(strategy_config):
+    """測試向量化進場條件與逐根判斷一致"""
+    strategy = MultiTimeframeStrategy(strategy_config)
+    rng = np.random.default_rng(7)
+    n = 500
+    labels = np.array([Trend.UP, Trend.DOWN, Trend.SIDEWAYS, Trend.UNKNOWN], dtype=np.int8)
+    trend_4h = labels[rng.integers(0, 4, n)]
+    trend_1h = np.where(rng.random(n) < 0.7, trend_4h, labels[rng.integers(0, 4, n)])
+    rsi = rng.uniform(10, 90, n)
+    ema20 = rng.uniform(2900, 3100, n)
+    ema50 = rng.uniform(2900, 3100, n)
+    price = ema20 * rng.uniform(0.95, 1.05, n)
+    volume_ratio = rng.uniform(0.5, 2.0, n)
+    
+    directions = strategy.check_entry_conditions_batch(
+        trend_4h, trend_1h, rsi, price, ema20, ema50, volume_ratio)
+    
+    for i in range(n):
+        should_enter, direction = strategy._check_entry_conditions({
+            'trend_4h': trend_4h[i], 'trend_1h': trend_1h[i], 'rsi_15m': rsi[i],
+            'price': price[i], 'ema20_1h': ema20[i], 'ema50_1h': ema50[i],
+            'volume_ratio': volume_ratio[i],
+        })
+        expected = 0 if not should_enter else (1 if direction == 'long' else -1)
+        assert directions[i] == expected
+    assert (directions != 0).any()
+
+
+def test_bar_state_shared_by_generate_signal_and_should_exit(strategy_config, market_data, monkeypatch):
+    """測試同一根 generate_signal 與 should_exit 只計算一次指標"""
+    strategy = MultiTimeframeStrategy(strategy_config)
+    calls = []
+    original = strategy._calculate_indicators
+    monkeypatch.setattr(strategy, '_calculate_indicators',
+                        lambda *args: calls.append(1) or original(*args))
+    position = Position(
+        strategy_id="test-multi-timeframe",
+        symbol="ETHUSDT",
+        direction='long',
+        entry_time=datetime.now(),
+        entry_price=3000.0,
+        size=1.0,
+        stop_loss=0.0,
+        take_profit=1e9,
+        leverage=5,
+        unrealized_pnl=0.0
+    )
+    
+    signal = strategy.generate_signal(market_data)
+    strategy.should_exit(position, market_data)
+    
+    assert len(calls) == 1
+    if signal.action != 'HOLD':
+        assert signal.metadata['trend_4h'] == strategy._compute_bar_state(market_data).trend_4h
+
+
+def test_hold_signal_carries_no_metadata(strategy_config, market_data):
+    """測試 HOLD 信號不附帶指標 metadata"""
+    strategy = MultiTimeframeStrategy(strategy_config)
+    strategy._rsi_lo, strategy._rsi_hi = 101.0, 102.0  # RSI 不可能落在範圍內 → 必定 HOLD
+    
+    signal = strategy.generate_signal(market_data)
+    
+    assert signal.action == 'HOLD'
+    assert signal.metadata == {}
+    assert signal.timestamp == market_data.timestamp
+
+
+def _confidence_reference(ind):
+    """舊版 if/elif 置信度（分段表的對照）"""
+    confidence = 0.0
+    if ind['trend_1d'] == ind['trend_4h'] == ind['trend_1h']:
+        confidence += 0.4
+    elif ind['trend_4h'] == ind['trend_1h']:
+        confidence += 0.3
+    rsi = ind['rsi_15m']
+    if 40 <= rsi <= 60:
+        confidence += 0.2
+    elif 35 <= rsi <= 65:
+        confidence += 0.15
+    elif 30 <= rsi <= 70:
+        confidence += 0.1
+    min_dist = min(ind['dist_ema20'], ind['dist_ema50'])
+    if min_dist < 0.01:
+        confidence += 0.2
+    elif min_dist < 0.02:
+        confidence += 0.15
+    elif min_dist < 0.03:
+        confidence += 0.1
+    if ind['volume_ratio'] > 1.5:
+        confidence += 0.2
+    elif ind['volume_ratio'] > 1.2:
+        confidence += 0.15
+    elif ind['volume_ratio'] > 1.0:
+        confidence += 0.1
+    return min(confidence, 1.0)
+
+
+def test_confidence_tables_match_reference(strategy_config):
+    """測試置信度分段表（含端點）與 if/elif 版及批次版一致"""
+    strategy = MultiTimeframeStrategy(strategy_config)
+    rng = np.random.default_rng(11)
+    edges_rsi = [30, 35, 40, 60, 65, 70, 29.9, 70.1, 50]
+    edges_dist = [0.0, 0.01, 0.02, 0.03, 0.005, 0.5]
+    edges_vol = [1.0, 1.2, 1.5, 0.9, 1.1, 3.0]
+    labels = np.array([Trend.UP, Trend.DOWN, Trend.SIDEWAYS], dtype=np.int8)
+    n = 300
+    trend_1d, trend_4h, trend_1h = (labels[rng.integers(0, 3, n)] for _ in range(3))
+    rsi = np.array(edges_rsi)[rng.integers(0, len(edges_rsi), n)]
+    dist_ema20 = np.array(edges_dist)[rng.integers(0, len(edges_dist), n)]
+    dist_ema50 = np.array(edges_dist)[rng.integers(0, len(edges_dist), n)]
+    volume_ratio = np.array(edges_vol)[rng.integers(0, len(edges_vol), n)]
+    
+    batch = strategy.calculate_confidence_batch(
+        trend_1d, trend_4h, trend_1h, rsi, dist_ema20, dist_ema50, volume_ratio)
+    
+    for i in range(n):
+        ind = {
+            'trend_1d': trend_1d[i], 'trend_4h': trend_4h[i], 'trend_1h': trend_1h[i],
+            'rsi_15m': float(rsi[i]), 'dist_ema20': float(dist_ema20[i]),
+            'dist_ema50': float(dist_ema50[i]), 'volume_ratio': float(volume_ratio[i]),
+        }
+        expected = _confidence_reference(ind)
+        assert strategy._calculate_confidence(ind) == expected
+        assert abs(batch[i] - expected) < 1e-12
+
+
+def _multi_timeframe_frames(days=20, seed=5):
+    """以 15m 隨機漫步重採樣出 1h/4h/1d（BacktestEngine 用的週期 -> DataFrame）"""
+    rng = np.random.default_rng(seed)
+    n = 96 * days
+    close = 3000 + np.cumsum(rng.normal(0, 6, n))
+    base = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='15min'),
+        'open': np.r_[close[0], close[:-1]],
+        'close': close,
+        'volume': rng.uniform(50, 300, n),
+    })
+    base['high'] = np.maximum(base['open'], base['close']) + rng.uniform(0, 8, n)
+    base['low'] = np.minimum(base['open'], base['close']) - rng.uniform(0, 8, n)
+    frames = {'15m': base[['timestamp', 'open', 'high', 'low', 'close', 'volume']]}
+    for tf, rule in (('1h', '1h'), ('4h', '4h'), ('1d', '1D')):
+        g = base.set_index('timestamp').resample(rule)
+        frames[tf] = pd.DataFrame({
+            'open': g['open'].first(), 'high': g['high'].max(), 'low': g['low'].min(),
+            'close': g['close'].last(), 'volume': g['volume'].sum(),
+        }).reset_index()
+    return frames
+
+
+def test_batch_indicators_match_per_bar_state(strategy_config):
+    """測試整段向量化指標與逐根（引擎同款 300 根切片）BarState 一致"""
+    frames = _multi_timeframe_frames()
+    timestamps = frames['1h']['timestamp']
+    strategy = MultiTimeframeStrategy(strategy_config)
+    batch = strategy._batch_indicators(frames, timestamps.to_numpy())
+    
+    per_bar = MultiTimeframeStrategy(strategy_config)
+    for i, ts in enumerate(timestamps):
+        if i % 3 == 1:
+            continue  # 跳過部分根：遞迴狀態須能接回，不重新播種
+        tfs = {tf: TimeframeData(tf, df[df['timestamp'] <= ts].iloc[-300:], {})
+               for tf, df in frames.items()}
+        state = per_bar._compute_bar_state(MarketData('ETHUSDT', ts, tfs))
+        for field, value in state.to_dict().items():
+            if isinstance(value, Trend):
+                assert batch[field][i] == value, (i, field)
+            else:
+                assert batch[field][i] == pytest.approx(value, rel=1e-12, abs=1e-12), (i, field)
+    
+    directions = strategy.generate_signals_batch(frames)
+    assert directions.dtype == np.int8
+    assert len(directions) == len(timestamps)
+
+
+def test_prepared_backtest_matches_unprepared(strategy_config):
+    """測試 prepare() 預算後的回測結果與逐根計算完全相同"""
+    from src.execution.backtest_engine import BacktestEngine
+    
+    frames = _multi_timeframe_frames()
+    prepared = BacktestEngine(10000).run_single_strategy(
+        MultiTimeframeStrategy(strategy_config), frames)
+    
+    unprepared_strategy = MultiTimeframeStrategy(strategy_config)
+    unprepared_strategy.prepare = lambda market_data: None
+    unprepared = BacktestEngine(10000).run_single_strategy(unprepared_strategy, frames)
+    
+    assert len(prepared.trades) > 0
+    assert [(t.entry_time, t.direction, t.exit_price) for t in prepared.trades] == \
+        [(t.entry_time, t.direction, t.exit_price) for t in unprepared.trades]
+    assert prepared.final_capital == unprepared.final_capital
+
+
+def test_backtest_clears_prepared_batch(strategy_config):
+    """測試回測結束（含例外）後清除 prepare() 的批次預算"""
+    from src.execution.backtest_engine import BacktestEngine
+    
+    frames = _multi_timeframe_frames()
+    strategy = MultiTimeframeStrategy(strategy_config)
+    BacktestEngine(10000).run_single_strategy(strategy, frames)
+    assert strategy._batch_index is None and strategy._batch_actions is None
+    
+    # 遍歷中途出錯也要清除
+    strategy.generate_signal = lambda market_data: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        BacktestEngine(10000).run_single_strategy(strategy, frames)
+    assert strategy._batch_index is None
@@ -12,6 +12,7 @@ from unittest.mock import Mock, patch
 
 from src.analysis.optimizer import Optimizer, OptimizationResult
 from src.strategies.multi_timeframe_strategy import MultiTimeframeStrategy
+from tests.fixtures.market_data import random_walk_ohlcv
 
 
 def create_simple_market_data(n_candles=200):
@@ -166,6 +167,57 @@ class TestGridSearch:
         
         # 驗證結果
         assert len(result.all_results) <= 5
+    
+    def test_parallel_grid_search_matches_sequential(self):
+        """測試 n_jobs > 1 的網格搜索結果與依序執行相同"""
+        from src.strategies.breakout_strategy import BreakoutStrategy
+        
+        market_data = {'1h': random_walk_ohlcv(300, seed=5)}
+        param_grid = {
+            'parameters.atr_threshold': [0.004, 0.005],
+            'parameters.volume_threshold': [1.0, 1.2],
+        }
+        
+        def run(n_jobs):
+            optimizer = Optimizer(
+                strategy_class=BreakoutStrategy,
+                base_config=create_base_config(),
+                market_data=market_data,
+                n_jobs=n_jobs,
+            )
+            return optimizer.grid_search(param_grid)
+        
+        sequential = run(None)
+        parallel = run(2)
+        
+        assert parallel.all_results == sequential.all_results
+        assert parallel.best_params == sequential.best_params
+        # 交易 ID 為隨機 UUID，只比較績效指標
+        without_trades = lambda perf: {k: v for k, v in perf.items() if k != 'trades'}
+        assert without_trades(parallel.validation_performance) == \
+            without_trades(sequential.validation_performance)
+    
+    def test_repeated_grid_search_reuses_evaluations(self):
+        """測試重複的參數組合只回測一次"""
+        from src.strategies.breakout_strategy import BreakoutStrategy
+        
+        # 單週期策略，可在只有 '1h' 的測試資料上完成回測
+        optimizer = Optimizer(
+            strategy_class=BreakoutStrategy,
+            base_config=create_base_config(),
+            market_data=create_simple_market_data(),
+        )
+        param_grid = {'parameters.volume_threshold': [1.0, 1.2]}
+        
+        first = optimizer.grid_search(param_grid)
+        assert len(first.all_results) == 2
+        
+        with patch.object(optimizer, '_evaluate_params', wraps=optimizer._evaluate_params) as spy:
+            second = optimizer.grid_search(param_grid)
+        
+        assert spy.call_count == 0
+        assert second.all_results == first.all_results
+        assert second.best_params == first.best_params
 
 
 class TestRandomSearch:
@@ -223,6 +275,45 @@ class TestRandomSearch:
         # 至少有一些參數不同
         if len(params1) > 0 and len(params2) > 0:
             assert params1 != params2
+    
+    def test_random_search_bounds(self):
+        """測試以 (min, max) 邊界定義的參數分佈"""
+        market_data = create_simple_market_data()
+        base_config = create_base_config()
+        
+        optimizer = Optimizer(
+            strategy_class=MultiTimeframeStrategy,
+            base_config=base_config,
+            market_data=market_data,
+        )
+        
+        # 邊界與採樣函數可混用
+        param_distributions = {
+            'parameters.stop_loss_atr': (0.5, 3.0),
+            'parameters.take_profit_atr': lambda: np.random.uniform(1.0, 5.0),
+        }
+        
+        result = optimizer.random_search(param_distributions, n_iterations=5)
+        
+        assert result.method == 'random_search'
+        for entry in result.all_results:
+            value = entry['params']['parameters.stop_loss_atr']
+            assert isinstance(value, float)
+            assert 0.5 <= value <= 3.0
+    
+    def test_random_search_patience(self):
+        """測試評分連續未改善時提前停止"""
+        optimizer = Optimizer(
+            strategy_class=MultiTimeframeStrategy,
+            base_config=create_base_config(),
+            market_data=create_simple_market_data(),
+        )
+        
+        # 平盤數據上每組參數的評分相同：第一次之後不再改善
+        param_distributions = {'parameters.stop_loss_atr': (0.5, 3.0)}
+        result = optimizer.random_search(param_distributions, n_iterations=20, patience=3)
+        
+        assert len(result.all_results) <= 4
 
 
 class TestBayesianOptimization:
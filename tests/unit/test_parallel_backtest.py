@@ -0,0 +1,39 @@
+"""
+run_multi_strategy 平行回測（max_workers）
+
+驗證以 ProcessPoolExecutor 平行跑多個獨立策略的結果與依序執行完全相同。
+"""
+
+from src.execution.backtest_engine import BacktestEngine
+from src.strategies.breakout_strategy import BreakoutStrategy
+from tests.fixtures.config import backtest_config
+from tests.fixtures.market_data import random_walk_ohlcv
+
+
+def _market_data(n=300, seed=5):
+    return {'1h': random_walk_ohlcv(n, seed)}
+
+
+def _strategies():
+    return [
+        BreakoutStrategy(backtest_config("breakout-a", atr_threshold=0.005, volume_threshold=1.2)),
+        BreakoutStrategy(backtest_config("breakout-b", atr_threshold=0.004, volume_threshold=1.0,
+                                         lookback_period=10)),
+    ]
+
+
+def test_parallel_results_match_sequential():
+    data = _market_data()
+    allocation = {"breakout-a": 0.6, "breakout-b": 0.4}
+
+    sequential = BacktestEngine(10000).run_multi_strategy(_strategies(), data, allocation)
+    parallel = BacktestEngine(10000).run_multi_strategy(
+        _strategies(), data, allocation, max_workers=2)
+
+    assert list(parallel) == list(sequential)
+    for strategy_id, result in sequential.items():
+        other = parallel[strategy_id]
+        assert other.initial_capital == result.initial_capital
+        assert other.final_capital == result.final_capital
+        assert [(t.entry_time, t.exit_price) for t in other.trades] == \
+            [(t.entry_time, t.exit_price) for t in result.trades]
@@ -31,8 +31,7 @@ def test_scalping_v11_runs_through_honest_engine():
     path = Path("market_data_BTCUSDT_1h.csv")
     if not path.exists():
         pytest.skip("無 BTCUSDT 1h 資料")
-    df = pd.read_csv(path)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = pd.read_csv(path, parse_dates=['timestamp'])
     df = df.tail(500).reset_index(drop=True)  # 小切片求快
     market_data = {"1h": df}
 
@@ -20,6 +20,8 @@ from pathlib import Path
 # 添加項目根目錄到路徑
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from src.utils.env import parsed_env
+
 # 導入 MarketAnalyzer
 try:
     from src.analysis.market_analyzer import MarketAnalyzer
@@ -35,6 +37,9 @@ class TradingAlertSystem:
     def __init__(self, symbol='ETHUSDT', telegram_token=None, chat_id=None, strategy_mode=None):
         self.symbol = symbol
         
+        # Binance / Telegram 共用的 HTTP 連線池（keep-alive，避免每次請求重做 TCP+TLS 握手）
+        self.http = requests.Session()
+        
         # 初始化 MarketAnalyzer
         if MARKET_ANALYZER_AVAILABLE:
             self.analyzer = MarketAnalyzer()
@@ -121,18 +126,8 @@ class TradingAlertSystem:
         if value:
             return value
         
-        # 再檢查 .env 文件
-        env_file = Path('.env')
-        if env_file.exists():
-            with open(env_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        env_key, env_value = line.split('=', 1)
-                        if env_key.strip() == key:
-                            return env_value.strip()
-        
-        return None
+        # 再檢查 .env 文件（每次重新讀取，修改後不必重啟）
+        return parsed_env().get(key)
     
     def _interval_to_seconds(self, interval: str) -> int:
         """轉換時間週期為秒數"""
@@ -190,7 +185,7 @@ class TradingAlertSystem:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=10)
             response.raise_for_status()
             klines = response.json()
             
@@ -372,7 +367,7 @@ class TradingAlertSystem:
         }
         
         try:
-            response = requests.post(url, data=data, timeout=10)
+            response = self.http.post(url, data=data, timeout=10)
             response.raise_for_status()
             print("✅ Telegram 通知已發送")
         except Exception as e:
@@ -495,13 +490,7 @@ def main():
         check_interval = int(os.getenv('CHECK_INTERVAL', '300'))
         
         # 載入 .env 文件中的配置
-        config = {}
-        with open(env_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    config[key.strip()] = value.strip()
+        config = parsed_env()
         
         symbol = config.get('SYMBOL', 'ETHUSDT')
         check_interval = int(config.get('CHECK_INTERVAL', '300'))